@@ -0,0 +1,123 @@
+"""
+Contention stress test for appointment booking.
+
+Many sessions (threads, each running its own event loop like a VoiceAgent)
+race to book a small set of slots, both directly and through
+hold -> confirm. The shared availability index starts cold, so the sessions
+also race to build it. The run fails if any appointment id is handed out
+twice or any slot ends up booked more than once.
+
+Usage:
+    python benchmarks/bench_booking_contention.py [--sessions 16] [--attempts 500]
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import pathlib
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from common import business_logic  # noqa: E402
+from common.availability import AvailabilityIndex  # noqa: E402
+
+
+async def session(session_id, slots, attempts, outcomes):
+    rng = random.Random(session_id)
+    customer_id = f"CUST{session_id:04d}"
+    for _ in range(attempts):
+        slot = rng.choice(slots)
+        if rng.random() < 0.5:
+            result = await business_logic.schedule_appointment(customer_id, slot, "Wellness Check")
+        else:
+            hold = await business_logic.hold_appointment_slot(slot)
+            if "error" in hold:
+                outcomes.append(("conflict", None))
+                continue
+            if rng.random() < 0.2:
+                await business_logic.release_appointment_hold(hold["hold_id"])
+                outcomes.append(("released", None))
+                continue
+            result = await business_logic.schedule_appointment(
+                customer_id, None, "Wellness Check", hold_id=hold["hold_id"]
+            )
+        if "error" in result:
+            outcomes.append(("conflict", None))
+        else:
+            outcomes.append(("booked", result))
+
+
+def run_session(session_id, slots, attempts, outcomes, barrier):
+    barrier.wait()
+    asyncio.run(session(session_id, slots, attempts, outcomes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=16)
+    parser.add_argument("--attempts", type=int, default=500)
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    # Start from an empty appointment book so every free slot is contended
+    business_logic.reset_mock_data(
+        business_logic.generate_mock_data(
+            {"customers": max(args.sessions, 1), "appointments": 0, "orders": 0},
+            include_sample=False,
+        )
+    )
+    # Slots come from a private index, leaving the shared one for the sessions to build
+    index = AvailabilityIndex.from_times([])
+    start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    slots = index.available_slots(start, start + timedelta(days=args.days) - timedelta(seconds=1))
+
+    outcomes = []
+    barrier = threading.Barrier(args.sessions)
+    threads = [
+        threading.Thread(target=run_session, args=(i, slots, args.attempts, outcomes, barrier))
+        for i in range(args.sessions)
+    ]
+    began = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+
+    counts = collections.Counter(kind for kind, _ in outcomes)
+    booked = [result for kind, result in outcomes if kind == "booked"]
+    duplicate_ids = [i for i, n in collections.Counter(b["id"] for b in booked).items() if n > 1]
+    double_booked = [d for d, n in collections.Counter(b["date"] for b in booked).items() if n > 1]
+
+    results = {
+        "sessions": args.sessions,
+        "operations": len(outcomes),
+        "slots": len(slots),
+        "booked": counts["booked"],
+        "conflicts": counts["conflict"],
+        "released": counts["released"],
+        "duplicate_ids": len(duplicate_ids),
+        "double_booked_slots": len(double_booked),
+        "ops_per_s": len(outcomes) / elapsed,
+    }
+    ok = not duplicate_ids and not double_booked and counts["booked"] <= len(slots)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for key, value in results.items():
+            print(f"{key:>20}: {value:,.0f}" if isinstance(value, float) else f"{key:>20}: {value}")
+        print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
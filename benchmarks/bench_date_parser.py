@@ -0,0 +1,74 @@
+"""
+Throughput benchmark for the local date/time parser.
+
+Parses a corpus of caller phrases cold (LRU cache cleared before every
+parse) and warm (repeated phrases served from the cache), and reports
+microseconds per parse and how many phrases resolved to a date.
+
+Usage:
+    python benchmarks/bench_date_parser.py [--rounds 2000] [--json]
+"""
+
+import argparse
+import json
+import pathlib
+import sys
+import time
+from datetime import date
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from common import date_parser  # noqa: E402
+
+PHRASES = [
+    "today", "tomorrow", "tomorrow morning", "day after tomorrow", "this weekend",
+    "next Tuesday at 3pm", "Friday", "next week", "next week Wednesday", "in two weeks",
+    "in a couple of days", "3 days from now", "March 14th", "the fourteenth of March",
+    "the 14th", "9/3", "2025-09-03", "at 3pm", "half past two on Monday", "noon on Friday",
+    "Saturday at 10:30", "this evening", "sometime soon",
+]
+
+
+def run(rounds, cold):
+    reference = date(2025, 8, 28)
+    date_parser.cache_clear()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for phrase in PHRASES:
+            if cold:
+                date_parser.cache_clear()
+            date_parser.parse_date_phrase(phrase, reference)
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(PHRASES)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=2000, help="Passes over the phrase corpus")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    reference = date(2025, 8, 28)
+    resolved = sum(
+        date_parser.parse_date_phrase(p, reference).date is not None for p in PHRASES
+    )
+    results = {
+        "phrases": len(PHRASES),
+        "resolved": resolved,
+        "cold_us_per_parse": run(max(1, args.rounds // 10), cold=True),
+        "warm_us_per_parse": run(args.rounds, cold=False),
+        "cache": date_parser.cache_info()._asdict(),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{resolved}/{len(PHRASES)} phrases resolved to a date")
+    print(f"  cold {results['cold_us_per_parse']:8.2f} us/parse")
+    print(f"  warm {results['warm_us_per_parse']:8.2f} us/parse")
+
+
+if __name__ == "__main__":
+    main()
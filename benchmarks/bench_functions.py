@@ -0,0 +1,278 @@
+"""
+Function-layer benchmark: every FUNCTION_MAP handler at several data sizes.
+
+For each scale (a multiple of MOCK_DATA_SIZE) the shared mock data is
+replaced with a freshly generated store, and each handler is called with
+realistic arguments drawn from that store. Reported per function:
+latency percentiles, bytes allocated per call (tracemalloc, measured in a
+separate pass so tracing does not skew latency), the size of the shaped
+JSON response sent to the agent, and how many calls returned an error.
+
+Results are written as JSON so two commits can be compared:
+
+    python benchmarks/bench_functions.py --output before.json
+    (check out another commit)
+    python benchmarks/bench_functions.py --output after.json --compare before.json
+
+Usage:
+    python benchmarks/bench_functions.py [--scales 1 10 100] [--iterations 200] [--repeat 3]
+        [--output results.json] [--compare baseline.json] [--threshold 0.2]
+        [--min-delta-us 25] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import pathlib
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from common.agent_functions import FUNCTION_MAP  # noqa: E402
+from common.business_logic import (  # noqa: E402
+    SERVICES,
+    generate_bulk_mock_data,
+    get_availability_index,
+    get_mock_data,
+    hold_appointment_slot,
+    release_appointment_hold,
+    reset_mock_data,
+)
+from common.response_shaping import encode_response, shape_response  # noqa: E402
+
+# Functions that need the live websocket and are not part of the function layer
+SKIPPED = {"agent_filler", "end_call"}
+
+DATE_PHRASES = [
+    "tomorrow", "next Tuesday at 3pm", "this weekend", "in two weeks", "the 14th", "Friday morning",
+]
+
+
+def _random_day(rng, days=60):
+    day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return day + timedelta(days=rng.randint(1, days))
+
+
+def _free_slot(rng):
+    """An ISO start time that is currently open, so write calls exercise the success path."""
+    index = get_availability_index()
+    # A year ahead, so bookings made by earlier passes (and dense bulk data) don't exhaust the search
+    for _ in range(20):
+        day = _random_day(rng, days=365)
+        slots = index.available_slots(day, day + timedelta(days=1) - timedelta(seconds=1))
+        if slots:
+            return rng.choice(slots)
+    return (_random_day(rng) + timedelta(hours=10)).isoformat()
+
+
+async def _params(function_name, store, rng):
+    """Arguments for one call of `function_name`; may do untimed setup (e.g. holding a slot)."""
+    row = rng.randrange(store.customer_count)
+    customer = store.customer_dict(row)
+    if function_name == "find_customer":
+        field = rng.choice(("customer_id", "phone", "email"))
+        key = "id" if field == "customer_id" else field
+        return {field: customer[key]}
+    if function_name in ("get_appointments", "get_orders", "get_customer_overview"):
+        return {"customer_id": customer["id"]}
+    if function_name == "create_appointment":
+        return {
+            "customer_id": customer["id"],
+            "date": _free_slot(rng),
+            "service": rng.choice(SERVICES),
+        }
+    if function_name == "hold_appointment":
+        return {"date": _free_slot(rng)}
+    if function_name == "release_hold":
+        held = await hold_appointment_slot(_free_slot(rng))
+        return {"hold_id": held.get("hold_id", "missing")}
+    if function_name == "check_availability":
+        start = _random_day(rng, days=14)
+        return {"start_date": start.isoformat(), "end_date": (start + timedelta(days=7)).isoformat()}
+    if function_name == "bookings":
+        return {"date": _random_day(rng).strftime("%Y-%m-%d")}
+    if function_name in ("check_date", "find_available_times"):
+        return {"text": rng.choice(DATE_PHRASES)}
+    if function_name == "create_event":
+        return {
+            "name": customer["name"],
+            "email_lowercase": customer["email"],
+            "phone": customer["phone"],
+            "start_time": _free_slot(rng)[:16],
+        }
+    return {}
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def bench_function(function_name, store, iterations, repeat, seed):
+    func = FUNCTION_MAP[function_name]
+    rng = random.Random(seed)
+
+    # Warm up lazily built indexes so the first call does not dominate
+    await func(await _params(function_name, store, rng))
+
+    # Best of `repeat` timed passes (by median) keeps comparisons stable on a busy machine;
+    # every pass draws the same arguments
+    latencies = None
+    for _ in range(repeat):
+        rng = random.Random(seed)
+        timings, sizes, errors = [], [], 0
+        for _ in range(iterations):
+            params = await _params(function_name, store, rng)
+            start = time.perf_counter()
+            result = await func(params)
+            timings.append(time.perf_counter() - start)
+            sizes.append(len(encode_response(shape_response(function_name, result))))
+            errors += isinstance(result, dict) and "error" in result
+            if function_name == "hold_appointment" and "hold_id" in result:
+                # Keep later passes from finding their slots already held
+                await release_appointment_hold(result["hold_id"])
+        if latencies is None or statistics.median(timings) < statistics.median(latencies):
+            latencies, best_sizes, best_errors = timings, sizes, errors
+    sizes, errors = best_sizes, best_errors
+
+    allocations = []
+    tracemalloc.start()
+    for _ in range(min(iterations, 50)):
+        params = await _params(function_name, store, rng)
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        await func(params)
+        allocations.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+
+    return {
+        "calls": iterations,
+        "mean_us": statistics.fmean(latencies) * 1e6,
+        "p50_us": _percentile(latencies, 50) * 1e6,
+        "p95_us": _percentile(latencies, 95) * 1e6,
+        "p99_us": _percentile(latencies, 99) * 1e6,
+        "alloc_peak_bytes": statistics.fmean(allocations),
+        "response_bytes": statistics.fmean(sizes),
+        "errors": errors,
+    }
+
+
+async def run(scales, iterations, repeat, seed):
+    results = {}
+    for scale in scales:
+        # Same data for every run on a given day, so runs can be compared
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        reset_mock_data(generate_bulk_mock_data(scale, seed=seed, reference_time=today))
+        store = get_mock_data()
+        get_availability_index()
+        rows = store.customer_count + store.appointment_count + store.order_count
+        functions = {}
+        for function_name in FUNCTION_MAP:
+            if function_name not in SKIPPED:
+                functions[function_name] = await bench_function(
+                    function_name, store, iterations, repeat, seed
+                )
+        results[f"{scale:g}"] = {"rows": rows, "functions": functions}
+    reset_mock_data()
+    return results
+
+
+def _commit():
+    proc = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+    )
+    return proc.stdout.strip() or None
+
+
+def compare(results, baseline, threshold, min_delta_us):
+    """
+    Print per-function changes against a baseline run. Returns the regressions
+    in median latency, allocations and response size (p95 is shown, not gated).
+    """
+    regressions = []
+    for scale, current in results.items():
+        previous = baseline["results"].get(scale)
+        if previous is None:
+            continue
+        print(f"scale {scale} vs {baseline['meta'].get('commit') or 'baseline'}")
+        for function_name, stats in current["functions"].items():
+            old = previous["functions"].get(function_name)
+            if old is None:
+                print(f"  {function_name:<22} new")
+                continue
+            changes = []
+            for metric in ("p50_us", "p95_us", "alloc_peak_bytes", "response_bytes"):
+                ratio = stats[metric] / old[metric] if old[metric] else 1.0
+                changes.append(f"{metric} {ratio:5.2f}x")
+                # Tail percentiles and small absolute latency changes are scheduling noise
+                if metric == "p95_us":
+                    continue
+                noise = metric.endswith("_us") and stats[metric] - old[metric] < min_delta_us
+                if ratio > 1 + threshold and not noise:
+                    regressions.append((scale, function_name, metric, ratio))
+            print(f"  {function_name:<22} " + "  ".join(changes))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10, 100],
+                        help="Multiples of MOCK_DATA_SIZE")
+    parser.add_argument("--iterations", type=int, default=200, help="Timed calls per function")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes per function (best kept)")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for data and arguments")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON file from an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Relative increase reported as a regression in --compare")
+    parser.add_argument("--min-delta-us", type=float, default=25,
+                        help="Ignore latency increases smaller than this in --compare")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "iterations": args.iterations,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": asyncio.run(run(args.scales, args.iterations, args.repeat, args.seed)),
+    }
+
+    if args.output:
+        pathlib.Path(args.output).write_text(json.dumps(report, indent=2))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for scale, current in report["results"].items():
+            print(f"scale {scale} ({current['rows']:,} rows)")
+            for function_name, stats in current["functions"].items():
+                print(
+                    f"  {function_name:<22} p50 {stats['p50_us']:9.1f} us  p95 {stats['p95_us']:9.1f} us"
+                    f"  alloc {stats['alloc_peak_bytes']:9.0f} B  response {stats['response_bytes']:7.0f} B"
+                    f"  errors {stats['errors']}"
+                )
+
+    if args.compare:
+        baseline = json.loads(pathlib.Path(args.compare).read_text())
+        regressions = compare(report["results"], baseline, args.threshold, args.min_delta_us)
+        for scale, function_name, metric, ratio in regressions:
+            print(f"REGRESSION scale {scale} {function_name} {metric} {ratio:.2f}x")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Memory-footprint benchmark for the mock data store.
+
+Reports bytes per row and MB per million rows for the columnar MockStore,
+compared with the same rows materialized as one dict per record (the
+representation used before the columnar store).
+
+Usage:
+    python benchmarks/bench_memory.py [--scale 300] [--json]
+"""
+
+import argparse
+import gc
+import json
+import pathlib
+import sys
+import tracemalloc
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from common.business_logic import generate_bulk_mock_data  # noqa: E402
+
+TABLES = ("customers", "appointments", "orders")
+
+
+def measure(build):
+    """Return (object, bytes allocated and still held) for build()."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=float, default=300, help="Multiple of MOCK_DATA_SIZE")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    store, columnar_bytes = measure(lambda: generate_bulk_mock_data(args.scale))
+    rows = store.customer_count + store.appointment_count + store.order_count
+
+    tables, dict_bytes = measure(store.to_dict)
+    del tables
+
+    results = {
+        "scale": args.scale,
+        "rows": rows,
+        "columnar": {
+            "bytes_per_row": columnar_bytes / rows,
+            "mb_per_million_rows": columnar_bytes / rows,  # bytes/row * 1e6 / 1e6
+        },
+        "dicts": {
+            "bytes_per_row": dict_bytes / rows,
+            "mb_per_million_rows": dict_bytes / rows,
+        },
+    }
+    results["reduction"] = dict_bytes / columnar_bytes
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{rows:,} rows (scale {args.scale:g})")
+    for name in ("columnar", "dicts"):
+        stats = results[name]
+        print(
+            f"  {name:<9} {stats['bytes_per_row']:8.1f} bytes/row"
+            f"  {stats['mb_per_million_rows']:8.1f} MB per million rows"
+        )
+    print(f"  columnar store is {results['reduction']:.1f}x smaller")
+
+
+if __name__ == "__main__":
+    main()
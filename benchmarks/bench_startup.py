@@ -0,0 +1,100 @@
+"""
+Startup-time benchmark for the voice agent server.
+
+Measures how long a fresh interpreter takes to import the server modules
+(mock data must not be generated on the import path), how long the first
+lazy mock data generation takes, and how bulk generation scales.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5] [--scale 100 1000]
+"""
+
+import argparse
+import json
+import pathlib
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def time_import(module, repeat):
+    """Import `module` in fresh interpreters and return the wall-clock times in seconds."""
+    code = (
+        "import time; t = time.perf_counter(); "
+        f"import {module}; "
+        "print(time.perf_counter() - t)"
+    )
+    timings = []
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            error = proc.stderr.strip().splitlines()[-1] if proc.stderr else "unknown error"
+            return {"error": error}
+        timings.append(float(proc.stdout.strip().splitlines()[-1]))
+    return {
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "max_s": max(timings),
+    }
+
+
+def time_call(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scale", type=float, nargs="*", default=[1, 100, 1000])
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    from common import business_logic
+
+    results = {"imports": {}, "first_generation_s": None, "bulk": []}
+    for module in ["common.business_logic", "common.agent_functions", "client"]:
+        results["imports"][module] = time_import(module, args.repeat)
+
+    business_logic.reset_mock_data()
+    results["first_generation_s"], _ = time_call(business_logic.get_mock_data)
+
+    for scale in args.scale:
+        elapsed, data = time_call(business_logic.generate_bulk_mock_data, scale)
+        rows = data.customer_count + data.appointment_count + data.order_count
+        results["bulk"].append(
+            {"scale": scale, "rows": rows, "seconds": elapsed, "rows_per_s": rows / elapsed}
+        )
+        del data
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("Cold import (fresh interpreter):")
+    for module, stats in results["imports"].items():
+        if "error" in stats:
+            print(f"  {module:<26} skipped ({stats['error']})")
+        else:
+            print(
+                f"  {module:<26} min {stats['min_s'] * 1000:7.1f} ms"
+                f"  median {stats['median_s'] * 1000:7.1f} ms"
+            )
+    print(f"First get_mock_data(): {results['first_generation_s'] * 1000:.1f} ms")
+    print("Bulk generation:")
+    for row in results["bulk"]:
+        print(
+            f"  scale {row['scale']:>7g}: {row['rows']:>10,} rows in {row['seconds']:.2f} s"
+            f" ({row['rows_per_s']:,.0f} rows/s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
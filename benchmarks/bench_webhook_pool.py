@@ -0,0 +1,119 @@
+"""
+Per-call latency of webhook requests: pooled sessions vs a session per call.
+
+Starts the local webhook stand-in (common/webhook_standin.py) with no
+injected latency, points a WEBHOOK_CONFIG-style endpoint at it, and times
+sequential bookings calls made the old way (a new ClientSession, and so a
+new connection, for every request) and through WebhookClient (one
+keep-alive session reused across calls). The stand-in is plain HTTP on
+localhost, so the saving shown is the session and TCP setup only; against
+a remote HTTPS endpoint DNS and the TLS handshake add to it. Pass
+--latency-ms to give the stand-in a constant per-request delay.
+
+Usage:
+    python benchmarks/bench_webhook_pool.py [--calls 300] [--latency-ms 0] [--json]
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import pathlib
+import statistics
+import sys
+import time
+
+import aiohttp
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from common.webhook_client import WebhookClient  # noqa: E402
+from common.webhook_standin import PREFIXES, WebhookStandin, start_standin  # noqa: E402
+
+
+# A weekday a week out, so the stand-in answers with a full day of times
+DATE = (datetime.date.today() + datetime.timedelta(days=7 - datetime.date.today().weekday())).isoformat()
+
+
+async def call(session, url):
+    async with session.post(url, json={"chatinput": DATE}) as response:
+        return await response.json()
+
+
+async def per_call_sessions(url, calls):
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        async with aiohttp.ClientSession() as session:
+            await call(session, url)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def pooled_session(endpoints, url, calls):
+    client = WebhookClient(endpoints)
+    timings = []
+    try:
+        for _ in range(calls):
+            start = time.perf_counter()
+            await call(client.session("stub"), url)
+            timings.append(time.perf_counter() - start)
+    finally:
+        await client.close()
+    return timings
+
+
+def summarize(timings):
+    ordered = sorted(timings)
+    return {
+        "mean_ms": statistics.fmean(timings) * 1e3,
+        "p50_ms": ordered[len(ordered) // 2] * 1e3,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1e3,
+    }
+
+
+async def run(calls, latency_ms):
+    latency = {"seed": None, "backends": {"default": {"value": latency_ms / 1e3}}, "functions": {}}
+    runner, base_url = await start_standin(WebhookStandin(latency))
+    base = f"{base_url}{PREFIXES['n8n_webhooks']}"
+    url = f"{base}/bookings"
+    endpoints = {"stub": {"url": base, "timeout": 10}}
+    try:
+        await per_call_sessions(url, 10)  # warm up the server
+        return {
+            "calls": calls,
+            "per_call_session": summarize(await per_call_sessions(url, calls)),
+            "pooled_session": summarize(await pooled_session(endpoints, url, calls)),
+        }
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=300, help="Sequential calls per mode")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Stand-in delay per request")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.calls, args.latency_ms))
+    saved = results["per_call_session"]["mean_ms"] - results["pooled_session"]["mean_ms"]
+    results["saved_per_call_ms"] = saved
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{args.calls} sequential calls to the local webhook stand-in ({args.latency_ms:g} ms delay)")
+    for mode in ("per_call_session", "pooled_session"):
+        stats = results[mode]
+        print(
+            f"  {mode:<17} mean {stats['mean_ms']:6.3f} ms  p50 {stats['p50_ms']:6.3f} ms"
+            f"  p95 {stats['p95_ms']:6.3f} ms"
+        )
+    print(f"  pooled session saves {saved:.3f} ms per call")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from flask import Flask, render_template, jsonify
+from flask import Flask, render_template, jsonify, request
 from flask_socketio import SocketIO
 import pyaudio
 import asyncio
@@ -15,8 +15,17 @@ from datetime import datetime
 from common.agent_functions import FUNCTION_MAP
 from common.agent_templates import AgentTemplates, AGENT_AUDIO_SAMPLE_RATE
 import logging
-from common.business_logic import MOCK_DATA
+from common.business_logic import get_mock_data
 from common.log_formatter import CustomFormatter
+from common.backend_router import FUNCTION_ROUTER
+from common.dispatcher import FunctionDispatcher
+from common.tracing import SessionTrace
+from common.health import HEALTH_MONITOR
+from common.response_shaping import (
+    RESPONSE_SIZE_STATS,
+    encode_response,
+    shape_response,
+)
 
 
 # Configure Flask and SocketIO
@@ -56,6 +65,12 @@ class VoiceAgent:
         self.browser_audio = browser_audio  # For browser microphone input
         self.browser_output = browser_audio  # Use same setting for browser output
         self.agent_templates = AgentTemplates(industry, voiceModel, voiceName)
+        self.trace = SessionTrace()
+        self.dispatcher = FunctionDispatcher(
+            function_map=FUNCTION_ROUTER,
+            inject_message=self.inject_message,
+            trace=self.trace,
+        )
 
     def set_loop(self, loop):
         self.loop = loop
@@ -162,6 +177,25 @@ class VoiceAgent:
             except Exception as e:
                 logger.error(f"Error terminating audio: {e}")
 
+    async def inject_message(self, inject_message):
+        """Inject an agent message on the current connection (used for latency fillers)."""
+        if self.ws:
+            await inject_agent_message(self.ws, inject_message)
+
+    async def send_function_response(self, function_call_id, function_name, result):
+        """Shape and encode a function result once, then send and log the same payload."""
+        content = encode_response(shape_response(function_name, result))
+        response = {
+            "type": "FunctionCallResponse",
+            "id": function_call_id,
+            "name": function_name,
+            "content": content,
+        }
+        await self.ws.send(encode_response(response))
+        RESPONSE_SIZE_STATS.record(function_name, len(content))
+        logger.info(f"Function response sent: {content}")
+        logger.info(f"Function Response Size: {len(content)} bytes")
+
     async def sender(self):
         try:
             # Log when sender starts
@@ -213,6 +247,7 @@ class VoiceAgent:
 
                             if message_json.get("role") == "user":
                                 last_user_message = current_time
+                                self.trace.next_turn()
                                 in_function_chain = False
                             elif message_json.get("role") == "assistant":
                                 in_function_chain = False
@@ -261,20 +296,16 @@ class VoiceAgent:
                                         function_response = result["function_response"]
 
                                         # First send the function response
-                                        response = {
-                                            "type": "FunctionCallResponse",
-                                            "id": function_call_id,
-                                            "name": function_name,
-                                            "content": json.dumps(function_response),
-                                        }
-                                        await self.ws.send(json.dumps(response))
-                                        logger.info(
-                                            f"Function response sent: {json.dumps(function_response)}"
+                                        await self.send_function_response(
+                                            function_call_id,
+                                            function_name,
+                                            function_response,
                                         )
 
                                         # Update the last function response time
                                         last_function_response_time = time.time()
                                         # Then just inject the message and continue
+                                        self.dispatcher.note_filler()
                                         await inject_agent_message(
                                             self.ws, inject_message
                                         )
@@ -287,15 +318,10 @@ class VoiceAgent:
                                         close_message = result["close_message"]
 
                                         # First send the function response
-                                        response = {
-                                            "type": "FunctionCallResponse",
-                                            "id": function_call_id,
-                                            "name": function_name,
-                                            "content": json.dumps(function_response),
-                                        }
-                                        await self.ws.send(json.dumps(response))
-                                        logger.info(
-                                            f"Function response sent: {json.dumps(function_response)}"
+                                        await self.send_function_response(
+                                            function_call_id,
+                                            function_name,
+                                            function_response,
                                         )
 
                                         # Update the last function response time
@@ -312,7 +338,9 @@ class VoiceAgent:
                                         self.is_running = False
                                         break
                                 else:
-                                    result = await func(parameters)
+                                    result = await self.dispatcher.dispatch(
+                                        function_name, parameters
+                                    )
 
                                 execution_time = time.time() - start_time
                                 logger.info(
@@ -320,15 +348,8 @@ class VoiceAgent:
                                 )
 
                                 # Send the response back
-                                response = {
-                                    "type": "FunctionCallResponse",
-                                    "id": function_call_id,
-                                    "name": function_name,
-                                    "content": json.dumps(result),
-                                }
-                                await self.ws.send(json.dumps(response))
-                                logger.info(
-                                    f"Function response sent: {json.dumps(result)}"
+                                await self.send_function_response(
+                                    function_call_id, function_name, result
                                 )
 
                                 # Update the last function response time
@@ -337,18 +358,16 @@ class VoiceAgent:
                             except Exception as e:
                                 logger.error(f"Error executing function: {str(e)}")
                                 result = {"error": str(e)}
-                                response = {
-                                    "type": "FunctionCallResponse",
-                                    "id": function_call_id,
-                                    "name": function_name,
-                                    "content": json.dumps(result),
-                                }
-                                await self.ws.send(json.dumps(response))
+                                await self.send_function_response(
+                                    function_call_id, function_name, result
+                                )
 
                         elif message_type == "Welcome":
                             logger.info(
                                 f"Connected with session ID: {message_json.get('session_id')}"
                             )
+                            if message_json.get("session_id"):
+                                self.trace.session_id = message_json["session_id"]
                         elif message_type == "CloseConnection":
                             logger.info("Closing connection...")
                             await self.ws.close()
@@ -538,11 +557,45 @@ def get_audio_devices():
 # Flask routes
 @app.route("/")
 def index():
-    # Get the sample data from MOCK_DATA
-    sample_data = MOCK_DATA.get("sample_data", [])
+    # Get the sample data from the mock data (generated on first request)
+    sample_data = get_mock_data().sample_data
     return render_template("index.html", sample_data=sample_data)
 
 
+@app.route("/metrics")
+def metrics():
+    # Function-layer metrics for monitoring and capacity planning
+    webhooks = sys.modules.get("common.webhook_functions")
+    return jsonify(
+        {
+            "response_sizes": RESPONSE_SIZE_STATS.snapshot(),
+            "session": voice_agent.dispatcher.stats() if voice_agent else {},
+            "backends": FUNCTION_ROUTER.stats(),
+            "webhooks": webhooks.webhook_stats() if webhooks else {},
+        }
+    )
+
+
+@app.route("/health")
+def health():
+    # Rolling probe scores for external backends (registered when webhooks are loaded)
+    backends = HEALTH_MONITOR.scores()
+    degraded = [name for name, score in backends.items() if score["degraded"]]
+    return jsonify({"status": "degraded" if degraded else "ok", "degraded": degraded, "backends": backends})
+
+
+@app.route("/backends", methods=["GET", "POST"])
+def backends():
+    # Show or change which backend serves each function, e.g. POST {"find_customer": "sqlite"}
+    if request.method == "POST":
+        try:
+            for function_name, backend in (request.get_json(silent=True) or {}).items():
+                FUNCTION_ROUTER.assign(function_name, backend)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+    return jsonify(FUNCTION_ROUTER.stats())
+
+
 @app.route("/audio-devices")
 def audio_devices():
     # Get available audio devices
@@ -647,6 +700,11 @@ def run_async_voice_agent():
                         asyncio.gather(*pending, return_exceptions=True)
                     )
 
+                # Close pooled webhook sessions opened on this loop, if webhooks were used
+                webhooks = sys.modules.get("common.webhook_functions")
+                if webhooks:
+                    loop.run_until_complete(webhooks.WEBHOOK_CLIENT.close())
+
                 loop.run_until_complete(loop.shutdown_asyncgens())
             finally:
                 loop.close()
@@ -658,6 +716,8 @@ def run_async_voice_agent():
 def handle_start_voice_agent(data=None):
     global voice_agent
     logger.info(f"Starting voice agent with data: {data}")
+    # Background work of the function backends in use (e.g. the webhook booking outbox)
+    FUNCTION_ROUTER.start()
     if voice_agent is None:
         # Get industry from data or default to deepgram
         industry = data.get("industry", "deepgram") if data else "deepgram"
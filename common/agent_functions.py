@@ -6,10 +6,17 @@ from .business_logic import (
     get_customer_appointments,
     get_customer_orders,
     schedule_appointment,
+    hold_appointment_slot,
+    release_appointment_hold,
     get_available_appointment_slots,
+    get_available_times,
+    get_next_available_times,
+    get_availability_index,
     prepare_agent_filler_message,
     prepare_farewell_message,
 )
+from .date_parser import parse_date_phrase
+from .response_shaping import shape_response
 
 
 async def find_customer(params):
@@ -17,8 +24,11 @@ async def find_customer(params):
     phone = params.get("phone")
     email = params.get("email")
     customer_id = params.get("customer_id")
+    name = params.get("name")
 
-    result = await get_customer(phone=phone, email=email, customer_id=customer_id)
+    result = await get_customer(
+        phone=phone, email=email, customer_id=customer_id, name=name
+    )
     return result
 
 
@@ -42,16 +52,87 @@ async def get_orders(params):
     return result
 
 
+async def get_customer_overview(params):
+    """
+    Look up a customer and their upcoming appointments and recent orders in one call.
+    With a customer_id all three lookups run concurrently; otherwise the customer is
+    resolved first and the appointment and order lookups run concurrently.
+    """
+    phone = params.get("phone")
+    email = params.get("email")
+    customer_id = params.get("customer_id")
+    name = params.get("name")
+
+    if customer_id and not (phone or email):
+        customer, appointments, orders = await asyncio.gather(
+            get_customer(customer_id=customer_id),
+            get_customer_appointments(customer_id),
+            get_customer_orders(customer_id),
+        )
+        if "error" in customer:
+            return customer
+    else:
+        customer = await get_customer(
+            phone=phone, email=email, customer_id=customer_id, name=name
+        )
+        if "error" in customer:
+            return customer
+        appointments, orders = await asyncio.gather(
+            get_customer_appointments(customer["id"]),
+            get_customer_orders(customer["id"]),
+        )
+
+    appointments = shape_response("get_appointments", appointments)
+    orders = shape_response("get_orders", orders)
+    overview = {
+        "customer": {
+            "id": customer["id"],
+            "name": customer["name"],
+            "phone": customer["phone"],
+            "email": customer["email"],
+        },
+        # Soonest first, so the first entry is the next appointment
+        "upcoming_appointments": appointments["appointments"],
+        "recent_orders": orders["orders"],
+    }
+    if appointments.get("more"):
+        overview["more_appointments"] = appointments["more"]
+    if orders.get("more"):
+        overview["more_orders"] = orders["more"]
+    return overview
+
+
 async def create_appointment(params):
     """Schedule a new appointment."""
     customer_id = params.get("customer_id")
     date = params.get("date")
     service = params.get("service")
+    hold_id = params.get("hold_id")
 
-    if not all([customer_id, date, service]):
-        return {"error": "customer_id, date, and service are required"}
+    if not all([customer_id, date or hold_id, service]):
+        return {"error": "customer_id, service, and either date or hold_id are required"}
 
-    result = await schedule_appointment(customer_id, date, service)
+    result = await schedule_appointment(customer_id, date, service, hold_id=hold_id)
+    return result
+
+
+async def hold_appointment(params):
+    """Hold an appointment slot while the caller confirms their details."""
+    date = params.get("date")
+    if not date:
+        return {"error": "date is required"}
+
+    result = await hold_appointment_slot(date)
+    return result
+
+
+async def release_hold(params):
+    """Release a held appointment slot."""
+    hold_id = params.get("hold_id")
+    if not hold_id:
+        return {"error": "hold_id is required"}
+
+    result = await release_appointment_hold(hold_id)
     return result
 
 
@@ -86,70 +167,31 @@ async def end_call(websocket, params):
     return result
 
 
+def _parse_phrase(params):
+    """Parse params['text'] with the local date parser, or return an error dict."""
+    phrase = params.get("text", "").strip()
+    if not phrase:
+        return None, {"error": "text is required"}
+    parsed = parse_date_phrase(phrase, params.get("reference_date"))
+    if parsed.date is None:
+        return None, {
+            "error": f"Could not understand the date in {phrase!r}",
+            "hint": "Ask the caller for a day, e.g. 'tomorrow', 'next Tuesday' or 'March 14th'",
+        }
+    return parsed, None
+
+
 async def check_date(params):
     """Parse natural language date/time into ISO 8601 format in clinic timezone (Central Time)."""
-    from datetime import datetime, timedelta
-    import re
-    
-    phrase = params.get("text", "").lower().strip()
-    reference_date = params.get("reference_date")
-    
-    if not phrase:
-        return {"error": "phrase is required"}
-    
-    # Use reference date if provided, otherwise current time in Central timezone
-    if reference_date:
-        try:
-            today = datetime.fromisoformat(reference_date.replace('Z', '+00:00')).replace(tzinfo=None)
-        except:
-            today = datetime.now()
-    else:
-        today = datetime.now()  # Clinic timezone (Central Time)
-    
-    # Enhanced natural language parsing
-    target_date = None
-    
-    # Handle specific phrases
-    if any(word in phrase for word in ["today", "this morning", "this afternoon", "tonight"]):
-        target_date = today
-    elif any(word in phrase for word in ["tomorrow", "next day"]):
-        target_date = today + timedelta(days=1)
-    elif "day after tomorrow" in phrase:
-        target_date = today + timedelta(days=2)
-    elif "next week" in phrase:
-        target_date = today + timedelta(days=7)
-    elif "this week" in phrase:
-        target_date = today
-    
-    # Handle weekdays with "next" prefix
-    weekdays = {
-        "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3,
-        "friday": 4, "saturday": 5, "sunday": 6
-    }
-    
-    if not target_date:
-        for day_name, day_num in weekdays.items():
-            if day_name in phrase:
-                days_ahead = day_num - today.weekday()
-                if days_ahead <= 0 or "next" in phrase:
-                    days_ahead += 7  # Next occurrence
-                target_date = today + timedelta(days=days_ahead)
-                break
-    
-    # Handle relative dates
-    if not target_date:
-        if re.search(r'\d+\s*days?\s*(from\s*now|later)', phrase):
-            match = re.search(r'(\d+)\s*days?', phrase)
-            if match:
-                days = int(match.group(1))
-                target_date = today + timedelta(days=days)
-    
-    # Default fallback
-    if not target_date:
-        target_date = today + timedelta(days=1)  # Default to tomorrow
-    
+    parsed, error = _parse_phrase(params)
+    if error:
+        return error
+
     # Return ISO format (YYYY-MM-DD for compatibility with bookings function)
-    return {"date": target_date.strftime("%Y-%m-%d")}
+    result = {"date": parsed.date.strftime("%Y-%m-%d")}
+    if parsed.time:
+        result["time"] = parsed.time
+    return result
 
 
 async def bookings(params):
@@ -159,23 +201,52 @@ async def bookings(params):
     if not date:
         return {"error": "Date is required"}
     
-    # Use the existing availability checker with date range
-    start_date = f"{date}T00:00:00"
-    end_date = f"{date}T23:59:59"
-    
-    result = await get_available_appointment_slots(start_date, end_date)
-    
-    # Convert to the expected format - list of times in HH:MM format
-    if "available_slots" in result:
-        times = []
-        for slot in result["available_slots"]:
-            # Extract time from ISO datetime
-            time_part = slot.split("T")[1].split(":")[0:2]  # Get HH:MM
-            time_str = ":".join(time_part)
-            times.append(time_str)
-        return {"times": times}
-    
-    return {"times": []}
+    result = await get_available_times(date)
+    return result
+
+
+# Time-of-day windows for find_available_times, as [earliest, latest) in HH:MM
+TIME_PREFERENCES = {
+    "any": ("00:00", "24:00"),
+    "morning": ("00:00", "12:00"),
+    "afternoon": ("12:00", "17:00"),
+    "evening": ("17:00", "24:00"),
+}
+
+
+async def find_available_times(params):
+    """
+    Resolve a natural language date phrase locally and return available times on that
+    day and the following days, replacing a check_date call followed by bookings.
+    """
+    parsed, error = _parse_phrase(params)
+    if error:
+        return error
+    # An explicit preference wins over a part of day heard in the phrase ("tomorrow morning")
+    time_preference = params.get("time_preference") or parsed.part_of_day or "any"
+    earliest, latest = TIME_PREFERENCES.get(time_preference, TIME_PREFERENCES["any"])
+
+    requested = parsed.date.strftime("%Y-%m-%d")
+    result = await get_next_available_times(requested, earliest, latest)
+
+    days = result["days"]
+    response = {
+        "requested_date": requested,
+        "requested_date_available": bool(days) and days[0]["date"] == requested,
+        "days": days,
+    }
+    if parsed.time:
+        # Spoken hours rarely fall on a slot start (3pm is inside the 14:45 slot), so check the
+        # slot containing the time, as create_appointment would book it
+        slot = get_availability_index().slot_start(f"{requested}T{parsed.time}")
+        slot_time = slot.strftime("%H:%M") if slot else None
+        response["requested_time"] = parsed.time
+        response["requested_time_available"] = (
+            response["requested_date_available"] and slot_time in days[0]["times"]
+        )
+        if slot_time and slot_time != parsed.time:
+            response["requested_slot"] = slot_time
+    return response
 
 
 async def create_event(params):
@@ -209,8 +280,9 @@ FUNCTION_DEFINITIONS = [
     {
         "name": "check_date",
         "description": """Parse natural language date/time like 'next Tuesday at 3pm' into YYYY-MM-DD format.
-        Handles phrases like 'today', 'tomorrow', 'Monday', 'next week', 'day after tomorrow', etc.
-        Returns standardized date format in clinic timezone (Central Time) for use with bookings function.""",
+        Handles phrases like 'today', 'tomorrow', 'Monday', 'next week', 'day after tomorrow', 'March 14th', 'the 14th', 'in two weeks', etc.
+        Returns standardized date format in clinic timezone (Central Time) for use with bookings function, plus a 24-hour HH:MM time if one was said.
+        Returns an error if the phrase contains no date; ask the caller instead of guessing.""",
         "parameters": {
             "type": "object",
             "properties": {
@@ -226,6 +298,34 @@ FUNCTION_DEFINITIONS = [
             "required": ["text"]
         }
     },
+    {
+        "name": "find_available_times",
+        "description": """Find available appointment times from the caller's own words in ONE call.
+        Use this instead of calling check_date and then bookings: it resolves phrases like 'tomorrow', 'next Tuesday'
+        or 'Saturday morning' to a date and returns the open 24-hour HH:MM start times on that day and the next days that have openings.
+        If requested_date_available is false, the requested day is full or closed; offer the nearest day in the list.
+        If the caller named a time ('Tuesday at 3pm'), requested_time_available says whether the slot containing it is open;
+        requested_slot is that slot's start time when it differs from the time the caller said.""",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "text": {
+                    "type": "string",
+                    "description": "User-provided date phrase (e.g., 'tomorrow morning', 'next Monday at 3pm', 'the 14th')"
+                },
+                "time_preference": {
+                    "type": "string",
+                    "description": "Part of the day the caller prefers, if they said one",
+                    "enum": ["any", "morning", "afternoon", "evening"]
+                },
+                "reference_date": {
+                    "type": "string",
+                    "description": "ISO date used as 'today' context, e.g., 2025-08-28T00:00:00 (optional)"
+                }
+            },
+            "required": ["text"]
+        }
+    },
     {
         "name": "bookings",
         "description": """Get list of available appointment times for a specific date.
@@ -288,7 +388,11 @@ FUNCTION_DEFINITIONS = [
         Email address recognition:
         - Spoken naturally: 'my email is john dot smith at example dot com' → Format as 'john.smith@example.com'
         - With domain: 'john@example.com' → Use as is
-        - Spelled out: 'j o h n at example dot com' → Format as 'john@example.com'""",
+        - Spelled out: 'j o h n at example dot com' → Format as 'john@example.com'
+
+        If there is no exact match, the response lists "candidates" ranked by similarity (customer_id, name,
+        last 4 phone digits). Confirm the right one with the caller (e.g. "Is that the number ending in 1234?")
+        and use its customer_id. The caller's name can also be given to help narrow the match.""",
         "parameters": {
             "type": "object",
             "properties": {
@@ -312,6 +416,40 @@ FUNCTION_DEFINITIONS = [
                     - Remove spaces between spelled out letters
                     Example: 'j dot smith at example dot com' → 'j.smith@example.com'""",
                 },
+                "name": {
+                    "type": "string",
+                    "description": "Customer's full name as heard, used to find close matches when an identifier isn't found exactly.",
+                },
+            },
+        },
+    },
+    {
+        "name": "get_customer_overview",
+        "description": """Look up a customer together with their upcoming appointments and most recent orders in ONE call. Use this function when:
+        - A customer asks about both appointments and orders (e.g. 'When is my next appointment and did my order ship?')
+        - You need the customer's account and their appointment or order status, and have not looked them up yet
+
+        Prefer this over calling find_customer, get_appointments and get_orders one after another.
+        Identify the customer with customer_id, phone or email, formatted as described for find_customer.""",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "customer_id": {
+                    "type": "string",
+                    "description": "Customer's ID in CUSTXXXX format (e.g. 'CUST0042').",
+                },
+                "phone": {
+                    "type": "string",
+                    "description": "Phone number with country code, e.g. '+15551234567'.",
+                },
+                "email": {
+                    "type": "string",
+                    "description": "Email address, e.g. 'john.smith@example.com'.",
+                },
+                "name": {
+                    "type": "string",
+                    "description": "Customer's full name as heard, used to find close matches when an identifier isn't found exactly.",
+                },
             },
         },
     },
@@ -362,7 +500,9 @@ FUNCTION_DEFINITIONS = [
         Before scheduling:
         1. Verify customer account exists using find_customer
         2. Check availability using check_availability
-        3. Confirm date/time and service type with customer before booking""",
+        3. Confirm date/time and service type with customer before booking
+        Pass either the date or, if the slot was held with hold_appointment, its hold_id.
+        When both are given they must name the same slot.""",
         "parameters": {
             "type": "object",
             "properties": {
@@ -370,9 +510,13 @@ FUNCTION_DEFINITIONS = [
                     "type": "string",
                     "description": "Customer's ID in CUSTXXXX format. Must be obtained from find_customer first.",
                 },
+                "hold_id": {
+                    "type": "string",
+                    "description": "hold_id returned by hold_appointment for the chosen time slot. Required unless date is given.",
+                },
                 "date": {
                     "type": "string",
-                    "description": "Appointment date and time in ISO format (YYYY-MM-DDTHH:MM:SS). Must be a time slot confirmed as available.",
+                    "description": "Appointment date and time in ISO format (YYYY-MM-DDTHH:MM:SS). Must be a time slot confirmed as available. Required unless hold_id is given.",
                 },
                 "service": {
                     "type": "string",
@@ -380,7 +524,38 @@ FUNCTION_DEFINITIONS = [
                     "enum": ["Initial Consultation", "Chiropractic Adjustment", "Follow-up Visit", "Wellness Check", "Maintenance Care", "Pain Assessment"],
                 },
             },
-            "required": ["customer_id", "date", "service"],
+            "required": ["customer_id", "service"],
+        },
+    },
+    {
+        "name": "hold_appointment",
+        "description": """Hold a time slot for a couple of minutes so no other caller can take it. Use this function when:
+        - The customer has picked a time from check_availability and you still need to confirm details
+
+        Pass the returned hold_id to create_appointment. If the customer changes their mind, call release_hold.""",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "date": {
+                    "type": "string",
+                    "description": "Appointment date and time in ISO format (YYYY-MM-DDTHH:MM:SS) from check_availability.",
+                },
+            },
+            "required": ["date"],
+        },
+    },
+    {
+        "name": "release_hold",
+        "description": """Release a slot held with hold_appointment when the customer picks a different time or stops booking.""",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "hold_id": {
+                    "type": "string",
+                    "description": "The hold_id returned by hold_appointment.",
+                },
+            },
+            "required": ["hold_id"],
         },
     },
     {
@@ -440,11 +615,15 @@ FUNCTION_DEFINITIONS = [
 FUNCTION_MAP = {
     "check_date": check_date,
     "bookings": bookings,
+    "find_available_times": find_available_times,
     "create_event": create_event,
     "find_customer": find_customer,
     "get_appointments": get_appointments,
     "get_orders": get_orders,
+    "get_customer_overview": get_customer_overview,
     "create_appointment": create_appointment,
+    "hold_appointment": hold_appointment,
+    "release_hold": release_hold,
     "check_availability": check_availability,
     "agent_filler": agent_filler,
     "end_call": end_call,
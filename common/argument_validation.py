@@ -0,0 +1,288 @@
+"""
+Local normalization and validation of function-call arguments.
+
+Each schema in FUNCTION_DEFINITIONS is compiled once into a list of per-field
+coercers. Before a handler runs, its arguments are normalized locally
+(customer ids padded to CUSTnnnn, phones in E.164, spoken emails, ISO dates,
+enum values matched case-insensitively; times with a UTC offset converted to
+clinic time in CLINIC_TIMEZONE), so formatting slips by the LLM no
+longer cost a failed call and another decision round trip. Arguments that
+cannot be repaired produce precise correction hints instead.
+"""
+
+import difflib
+import re
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from common.agent_functions import FUNCTION_DEFINITIONS
+from common.config import CLINIC_TIMEZONE
+from common.normalizers import normalize_customer_id, normalize_email, normalize_phone
+
+# Date formats announced in schema descriptions, most specific first
+_DATE_FORMATS = [
+    ("YYYY-MM-DDTHH:MM:SS", "%Y-%m-%dT%H:%M:%S"),
+    ("YYYY-MM-DDTHH:MM", "%Y-%m-%dT%H:%M"),
+    ("YYYY-MM-DD", "%Y-%m-%d"),
+]
+_CLINIC_TZ = ZoneInfo(CLINIC_TIMEZONE)
+_DATE_FIELDS = {"date", "start_date", "end_date", "start_time", "reference_date"}
+# Range bounds given as a bare date cover the whole day; other date-time fields need a time
+_DAY_BOUNDS = {"start_date": time.min, "end_date": time(23, 59, 59)}
+_DATE_RE = re.compile(
+    r"^\s*(\d{4})-(\d{1,2})-(\d{1,2})"
+    r"(?:[T\s]+(\d{1,2})(?::(\d{2}))?(?::(\d{2}))?(?:\.\d+)?\s*(am|pm|a\.m\.|p\.m\.)?)?"
+    r"\s*(z|[+-]\d{2}:?\d{2})?\s*$",
+    re.IGNORECASE,
+)
+# Optional fields passed to the handler as heard when they cannot be repaired:
+# identifiers feed fuzzy lookups, and context fields have a handler default
+# (an unreadable reference_date means today, an unknown time_preference means any)
+_PASS_THROUGH = {"customer_id", "phone", "email", "reference_date", "time_preference"}
+
+
+class ArgumentError(ValueError):
+    """Raised by a coercer when a value cannot be repaired."""
+
+
+def _coerce_customer_id(value):
+    normalized = normalize_customer_id(value)
+    if normalized is None:
+        raise ArgumentError(f"expected a customer ID like CUST0042, got {value!r}")
+    return normalized
+
+
+def _coerce_phone(value):
+    normalized = normalize_phone(value)
+    if normalized is None:
+        raise ArgumentError(f"expected a 10-digit phone number like +15551234567, got {value!r}")
+    return normalized
+
+
+def _coerce_email(value):
+    normalized = normalize_email(value)
+    if normalized is None:
+        raise ArgumentError(f"expected an email address like john.smith@example.com, got {value!r}")
+    return normalized
+
+
+def _utc_offset(zone):
+    if zone.lower() == "z":
+        return timezone.utc
+    sign = -1 if zone[0] == "-" else 1
+    digits = zone[1:].replace(":", "")
+    return timezone(sign * timedelta(hours=int(digits[:2]), minutes=int(digits[2:])))
+
+
+def _parse_date(value):
+    """
+    Parse ISO-like dates and times, including '2025-08-28 3pm'. A time with
+    Z or a UTC offset is converted to clinic time (CLINIC_TIMEZONE), whatever
+    zone the server runs in.
+    """
+    match = _DATE_RE.match(str(value))
+    if not match:
+        raise ArgumentError(f"expected an ISO date like 2025-08-28T15:00:00, got {value!r}")
+    year, month, day, hour, minute, second, meridiem, zone = match.groups()
+    hour = int(hour or 0)
+    if meridiem:
+        meridiem = meridiem.lower()[0]
+        if hour == 12:
+            hour = 0
+        if meridiem == "p":
+            hour += 12
+    try:
+        parsed = datetime(int(year), int(month), int(day), hour, int(minute or 0), int(second or 0))
+    except ValueError as e:
+        raise ArgumentError(f"{value!r} is not a valid date ({e})") from None
+    has_time = match.group(4) is not None
+    if zone and has_time:
+        try:
+            parsed = parsed.replace(tzinfo=_utc_offset(zone)).astimezone(_CLINIC_TZ).replace(tzinfo=None)
+        except ValueError:
+            raise ArgumentError(
+                f"{value!r} has an invalid UTC offset; give the time in clinic time without an offset"
+            ) from None
+    return parsed, has_time
+
+
+def _date_coercer(fmt, marker, day_time=None):
+    """Coercer to `fmt`; a bare date gets `day_time` if given, else a format with HH needs a time."""
+    def coerce(value):
+        parsed, has_time = _parse_date(value)
+        if not has_time and day_time is not None:
+            parsed = datetime.combine(parsed.date(), day_time)
+        elif fmt is not None and "HH" in marker and not has_time:
+            raise ArgumentError(f"expected {marker} including a time, got {value!r}")
+        return parsed.isoformat() if fmt is None else parsed.strftime(fmt)
+
+    return coerce
+
+
+def _enum_coercer(options):
+    """Match case and spacing slips and near-certain typos; otherwise hint at the closest option."""
+    lookup = {option.lower(): option for option in options}
+
+    def coerce(value):
+        key = " ".join(str(value).lower().replace("_", " ").split())
+        if key in lookup:
+            return lookup[key]
+        close = difflib.get_close_matches(key, list(lookup), n=1, cutoff=0.85)
+        if close:
+            return lookup[close[0]]
+        hint = f"expected one of {', '.join(options)}, got {value!r}"
+        close = difflib.get_close_matches(key, list(lookup), n=1, cutoff=0.6)
+        if close:
+            hint += f" (did you mean {lookup[close[0]]!r}?)"
+        raise ArgumentError(hint)
+
+    return coerce
+
+
+def _string_coercer(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    if not isinstance(value, str):
+        raise ArgumentError(f"expected a string, got {type(value).__name__}")
+    return value.strip()
+
+
+def _id_rescued(value, coerced):
+    """A customer id that needed more than upper-casing (e.g. padding '42' to CUST0042)."""
+    return coerced != str(value).strip().upper()
+
+
+def _email_rescued(value, coerced):
+    """An email that needed more than lower-casing (e.g. 'john at example dot com')."""
+    return coerced != str(value).strip().lower()
+
+
+def _date_rescued(value, coerced):
+    """A time given with am/pm or a UTC offset, which the handler would not parse."""
+    match = _DATE_RE.match(str(value))
+    return bool(match and match.group(4) is not None and (match.group(7) or match.group(8)))
+
+
+# Field -> test for corrections that turn a value the handler would reject
+# into one it accepts; other corrections (case, spacing, enum case) are cosmetic
+_RESCUES = {
+    "customer_id": _id_rescued,
+    "phone": lambda value, coerced: True,
+    "email": _email_rescued,
+    "email_lowercase": _email_rescued,
+}
+_RESCUES.update(dict.fromkeys(_DATE_FIELDS, _date_rescued))
+
+
+def _field_coercer(name, schema):
+    """Pick the coercer for one property from its name, enum and described format."""
+    if "enum" in schema:
+        return _enum_coercer(schema["enum"])
+    if name == "customer_id":
+        return _coerce_customer_id
+    if name == "phone":
+        return _coerce_phone
+    if name in ("email", "email_lowercase"):
+        return _coerce_email
+    if name in _DATE_FIELDS:
+        description = schema.get("description", "")
+        for marker, fmt in _DATE_FORMATS:
+            if marker in description:
+                return _date_coercer(fmt, marker, _DAY_BOUNDS.get(name))
+        return _date_coercer(None, "ISO", _DAY_BOUNDS.get(name))
+    if schema.get("type") == "string":
+        return _string_coercer
+    return None
+
+
+class ValidationResult:
+    __slots__ = ("params", "corrections", "errors", "rescued")
+
+    def __init__(self, params, corrections, errors, rescued=False):
+        self.params = params
+        self.corrections = corrections
+        self.errors = errors
+        self.rescued = rescued  # a correction made an argument the handler would reject usable
+
+    def error_response(self, function_name):
+        return {"error": f"Invalid arguments for {function_name}", "hints": self.errors}
+
+
+class ArgumentValidator:
+    """Compiled validator and coercer for one function schema."""
+
+    def __init__(self, definition):
+        parameters = definition.get("parameters", {})
+        self.required = list(parameters.get("required", []))
+        self.fields = []
+        for name, schema in parameters.get("properties", {}).items():
+            coercer = _field_coercer(name, schema)
+            if coercer is not None:
+                self.fields.append((name, coercer, name in self.required))
+
+    def validate(self, params):
+        params = dict(params or {})
+        corrections = []
+        rescued = False
+        errors = [f"{name}: required" for name in self.required if params.get(name) in (None, "")]
+
+        for name, coerce, required in self.fields:
+            value = params.get(name)
+            if value in (None, ""):
+                continue
+            try:
+                coerced = coerce(value)
+            except ArgumentError as e:
+                if required or name not in _PASS_THROUGH:
+                    errors.append(f"{name}: {e}")
+                continue
+            if coerced != value:
+                params[name] = coerced
+                if not isinstance(value, str) or coerced != value.strip():
+                    corrections.append(f"{name}: {value!r} -> {coerced!r}")
+                    rescues = _RESCUES.get(name)
+                    rescued = rescued or bool(rescues and rescues(value, coerced))
+
+        return ValidationResult(params, corrections, errors, rescued)
+
+
+class ValidatorRegistry:
+    """Validators for every function definition plus per-function counters."""
+
+    def __init__(self, definitions):
+        self.validators = {d["name"]: ArgumentValidator(d) for d in definitions}
+        self._stats = {}
+
+    def validate(self, function_name, params):
+        validator = self.validators.get(function_name)
+        if validator is None:
+            return ValidationResult(params, [], [])
+        result = validator.validate(params)
+        stats = self._stats.setdefault(
+            function_name, {"calls": 0, "corrected": 0, "rescued": 0, "rejected": 0}
+        )
+        stats["calls"] += 1
+        if result.errors:
+            stats["rejected"] += 1
+        elif result.corrections:
+            stats["corrected"] += 1
+            if result.rescued:
+                stats["rescued"] += 1
+        return result
+
+    def stats(self):
+        """
+        Per-function counts. `round_trips_saved` counts only rescued calls: those
+        with a correction the handler could not have done itself (a padded
+        customer id, a phone put in E.164, a spoken email, a time with am/pm or a
+        UTC offset), which would otherwise have come back as a miss or error.
+        Cosmetic corrections such as case or spacing are in `corrected` only.
+        """
+        report = {name: dict(stats) for name, stats in self._stats.items()}
+        return {
+            "functions": report,
+            "round_trips_saved": sum(stats["rescued"] for stats in report.values()),
+        }
+
+
+ARGUMENT_VALIDATORS = ValidatorRegistry(FUNCTION_DEFINITIONS)
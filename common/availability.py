@@ -0,0 +1,277 @@
+"""
+Precomputed appointment availability for the clinic.
+
+Every weekday has a fixed grid of bookable slots derived from CLINIC_HOURS.
+Bookings are kept per calendar day as an integer bitmap over that grid, so
+answering "what is free between X and Y" is a few bit operations per day
+instead of a scan over every appointment for every candidate slot.
+
+Slots can also be held for a short time while a caller confirms their
+details (hold -> confirm or release). Holds expire on their own after a TTL.
+Each day is guarded by one of a set of striped locks, so sessions booking
+different days never wait on each other and no lock is held across awaits.
+"""
+
+import threading
+import time
+import uuid
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+
+from common.config import APPOINTMENT_HOLD_TTL, APPOINTMENT_SLOT_MINUTES, CLINIC_HOURS
+
+_LOCK_STRIPES = 64
+
+
+def _parse_hhmm(value):
+    """Convert a 24-hour HH:MM string into minutes after midnight."""
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def _build_day_grid(intervals, slot_minutes):
+    """Return the slot start minutes that fit inside the given opening intervals."""
+    starts = []
+    for opens, closes in intervals:
+        start = _parse_hhmm(opens)
+        end = _parse_hhmm(closes)
+        while start + slot_minutes <= end:
+            starts.append(start)
+            start += slot_minutes
+    return tuple(starts)
+
+
+def _to_datetime(value):
+    """Accept a datetime or an ISO string and return a naive clinic-local datetime."""
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+
+
+def _iter_bits(mask):
+    """Yield the indexes of set bits in ascending order."""
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
+
+
+class AvailabilityIndex:
+    """Per-day slot bitmaps over the clinic's opening hours."""
+
+    def __init__(self, hours=None, slot_minutes=APPOINTMENT_SLOT_MINUTES):
+        hours = CLINIC_HOURS if hours is None else hours
+        self.slot_minutes = slot_minutes
+        self._grids = [
+            _build_day_grid(hours.get(weekday, []), slot_minutes) for weekday in range(7)
+        ]
+        self._full_masks = [(1 << len(grid)) - 1 for grid in self._grids]
+        self._times = [
+            tuple(f"{start // 60:02d}:{start % 60:02d}" for start in grid)
+            for grid in self._grids
+        ]
+        # date ordinal -> bitmap of booked slot indexes
+        self._booked = {}
+        # date ordinal -> {slot index: (hold id, expiry on the monotonic clock)}
+        self._holds = {}
+        # hold id -> (date ordinal, slot index)
+        self._hold_slots = {}
+        self._locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+
+    def _lock_for(self, ordinal):
+        return self._locks[ordinal % _LOCK_STRIPES]
+
+    def _locate(self, when):
+        """Return (date ordinal, slot index) for `when`, or None outside opening hours."""
+        when = _to_datetime(when)
+        index = self.slot_index(when)
+        if index is None:
+            return None
+        return when.toordinal(), index
+
+    def _held_mask(self, ordinal, now):
+        """Bitmap of slots with a live hold on a day (expired holds are ignored)."""
+        mask = 0
+        for index, (_, expires) in self._holds.get(ordinal, {}).items():
+            if expires > now:
+                mask |= 1 << index
+        return mask
+
+    def _drop_hold(self, ordinal, index, hold_id):
+        day_holds = self._holds.get(ordinal)
+        if day_holds and day_holds.get(index, (None,))[0] == hold_id:
+            del day_holds[index]
+            if not day_holds:
+                del self._holds[ordinal]
+        self._hold_slots.pop(hold_id, None)
+
+    def slot_index(self, when):
+        """Return the grid index of the slot containing `when`, or None if the clinic is closed."""
+        when = _to_datetime(when)
+        grid = self._grids[when.weekday()]
+        minute = when.hour * 60 + when.minute
+        index = bisect_right(grid, minute) - 1
+        if index < 0 or minute >= grid[index] + self.slot_minutes:
+            return None
+        return index
+
+    def slot_start(self, when):
+        """Return the start of the slot containing `when` as a datetime, or None if the clinic is closed."""
+        when = _to_datetime(when)
+        index = self.slot_index(when)
+        if index is None:
+            return None
+        start = self._grids[when.weekday()][index]
+        return datetime(when.year, when.month, when.day, start // 60, start % 60)
+
+    def book(self, when):
+        """
+        Atomically take the slot containing `when` if it is open, unbooked and not held.
+        Callers store `slot_start(when)` as the appointment time, so records match the grid.
+        Returns False if the slot is outside opening hours or already taken.
+        """
+        located = self._locate(when)
+        if located is None:
+            return False
+        ordinal, index = located
+        bit = 1 << index
+        with self._lock_for(ordinal):
+            if (self._booked.get(ordinal, 0) | self._held_mask(ordinal, time.monotonic())) & bit:
+                return False
+            self._booked[ordinal] = self._booked.get(ordinal, 0) | bit
+        return True
+
+    def cancel(self, when):
+        """Free a booked slot again (e.g. after a cancellation)."""
+        located = self._locate(when)
+        if located is None:
+            return False
+        ordinal, index = located
+        with self._lock_for(ordinal):
+            self._booked[ordinal] = self._booked.get(ordinal, 0) & ~(1 << index)
+        return True
+
+    def hold(self, when, ttl=APPOINTMENT_HOLD_TTL):
+        """
+        Reserve the slot containing `when` for `ttl` seconds.
+        Returns a hold id, or None if the slot is closed, booked or held by someone else.
+        """
+        located = self._locate(when)
+        if located is None:
+            return None
+        ordinal, index = located
+        bit = 1 << index
+        now = time.monotonic()
+        with self._lock_for(ordinal):
+            if (self._booked.get(ordinal, 0) | self._held_mask(ordinal, now)) & bit:
+                return None
+            expired = self._holds.get(ordinal, {}).get(index)
+            if expired:
+                self._hold_slots.pop(expired[0], None)
+            hold_id = uuid.uuid4().hex
+            self._holds.setdefault(ordinal, {})[index] = (hold_id, now + ttl)
+            self._hold_slots[hold_id] = (ordinal, index)
+        return hold_id
+
+    def confirm(self, hold_id):
+        """
+        Turn a hold into a booking. A hold that expired still succeeds as long as
+        nobody else booked or held the slot in the meantime.
+        """
+        located = self._hold_slots.get(hold_id)
+        if located is None:
+            return False
+        ordinal, index = located
+        bit = 1 << index
+        with self._lock_for(ordinal):
+            if self._hold_slots.get(hold_id) != located:
+                return False
+            holder, _ = self._holds.get(ordinal, {}).get(index, (None, 0))
+            if holder != hold_id or self._booked.get(ordinal, 0) & bit:
+                self._hold_slots.pop(hold_id, None)
+                return False
+            self._drop_hold(ordinal, index, hold_id)
+            self._booked[ordinal] = self._booked.get(ordinal, 0) | bit
+        return True
+
+    def release(self, hold_id):
+        """Give up a hold without booking. Returns False if it no longer exists."""
+        located = self._hold_slots.get(hold_id)
+        if located is None:
+            return False
+        ordinal, index = located
+        with self._lock_for(ordinal):
+            if self._hold_slots.get(hold_id) != located:
+                return False
+            self._drop_hold(ordinal, index, hold_id)
+        return True
+
+    def held_slot(self, hold_id):
+        """Return the slot start datetime a hold refers to, or None."""
+        located = self._hold_slots.get(hold_id)
+        if located is None:
+            return None
+        ordinal, index = located
+        day = date.fromordinal(ordinal)
+        start = self._grids[day.weekday()][index]
+        return datetime(day.year, day.month, day.day, start // 60, start % 60)
+
+    def is_available(self, when):
+        """Check whether the slot containing `when` is open, unbooked and not held."""
+        located = self._locate(when)
+        if located is None:
+            return False
+        ordinal, index = located
+        return bool(self.free_mask(date.fromordinal(ordinal)) & (1 << index))
+
+    def free_mask(self, day):
+        """Bitmap of open slots for a calendar day that are neither booked nor held."""
+        ordinal = day.toordinal()
+        taken = self._booked.get(ordinal, 0)
+        if ordinal in self._holds:
+            taken |= self._held_mask(ordinal, time.monotonic())
+        return self._full_masks[day.weekday()] & ~taken
+
+    def available_times(self, day):
+        """List the free slot start times for a day in 24-hour HH:MM format."""
+        if isinstance(day, str):
+            day = date.fromisoformat(day[:10])
+        times = self._times[day.weekday()]
+        return [times[index] for index in _iter_bits(self.free_mask(day))]
+
+    def available_slots(self, start, end):
+        """List free slot start times between `start` and `end` (inclusive) as ISO datetimes."""
+        start = _to_datetime(start)
+        end = _to_datetime(end)
+        slots = []
+        day = start.date()
+        last_day = end.date()
+        while day <= last_day:
+            weekday = day.weekday()
+            grid = self._grids[weekday]
+            mask = self.free_mask(day)
+            if mask:
+                # Trim the bitmap to the requested window on the first and last day
+                if day == start.date():
+                    low = bisect_left(grid, start.hour * 60 + start.minute + (start.second > 0))
+                    mask &= ~((1 << low) - 1)
+                if day == last_day:
+                    high = bisect_right(grid, end.hour * 60 + end.minute)
+                    mask &= (1 << high) - 1
+                prefix = day.isoformat()
+                times = self._times[weekday]
+                slots.extend(f"{prefix}T{times[index]}:00" for index in _iter_bits(mask))
+            day += timedelta(days=1)
+        return slots
+
+    @classmethod
+    def from_times(cls, times, **kwargs):
+        """Build an index with every datetime in `times` marked as booked."""
+        index = cls(**kwargs)
+        booked = index._booked
+        for when in times:
+            located = index._locate(when)
+            if located is not None:
+                ordinal, slot = located
+                booked[ordinal] = booked.get(ordinal, 0) | (1 << slot)
+        return index
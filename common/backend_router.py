@@ -0,0 +1,157 @@
+"""
+Config-driven routing of functions to backends: mock, sqlite or webhook.
+
+FUNCTION_BACKENDS assigns each function a backend; the router is passed to
+the dispatcher as its function map and resolves the handler on every call,
+so `assign()` takes effect for running sessions on their next call. A
+function the assigned backend does not implement, a backend that cannot be
+loaded (webhooks need aiohttp), or a webhook backend whose endpoint the
+health monitor reports as degraded all fall back to FUNCTION_BACKENDS
+["fallback"]. The dispatcher reports each call's duration back through
+`observe()`, giving latency and error counts per backend and function.
+`start()` runs the background work of the backends in use (a backend module
+may define `start_background_tasks()`); the app calls it when it starts
+serving, so importing a backend never starts threads or opens files.
+"""
+
+import importlib
+import logging
+import sys
+import threading
+
+from common.agent_functions import FUNCTION_MAP
+from common.config import FUNCTION_BACKENDS, HEALTH_CHECKS
+from common.health import HEALTH_MONITOR
+from common.webhook_retry import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+# backend -> (module, function map attribute); modules are imported on first use
+BACKENDS = {
+    "mock": ("common.agent_functions", "FUNCTION_MAP"),
+    "sqlite": ("common.sqlite_backend", "SQLITE_FUNCTION_MAP"),
+    "webhook": ("common.webhook_functions", "WEBHOOK_FUNCTION_MAP"),
+}
+
+
+class RoutedHandler:
+    """A backend's handler for one function, tagged with where it came from."""
+
+    __slots__ = ("backend", "function_name", "func")
+
+    def __init__(self, backend, function_name, func):
+        self.backend = backend
+        self.function_name = function_name
+        self.func = func
+
+    def __call__(self, params):
+        return self.func(params)
+
+
+class BackendRouter:
+    def __init__(self, settings=FUNCTION_BACKENDS, health=HEALTH_MONITOR):
+        self.settings = settings
+        self.health = health
+        self._assignments = dict(settings["functions"])
+        self._maps = {}
+        self._started = None  # backends whose background work is running, once start() was called
+        self._lock = threading.Lock()
+        self.latency = LatencyTracker()
+        self._stats = {}
+
+    def _function_map(self, backend):
+        """The backend's function map, or None if it cannot be loaded."""
+        if backend not in self._maps:
+            module_name, attribute = BACKENDS[backend]
+            try:
+                function_map = getattr(importlib.import_module(module_name), attribute)
+            except ImportError as e:
+                logger.error(f"Function backend {backend!r} is unavailable: {e}")
+                function_map = None
+            with self._lock:
+                self._maps.setdefault(backend, function_map)
+        return self._maps[backend]
+
+    def assigned(self, function_name):
+        return self._assignments.get(function_name, self.settings["default"])
+
+    def assign(self, function_name, backend):
+        """Route `function_name` to `backend` from the next call on, in every session."""
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown function backend {backend!r}")
+        if function_name not in FUNCTION_MAP:
+            raise ValueError(f"Unknown function {function_name!r}")
+        with self._lock:
+            self._assignments[function_name] = backend
+        logger.info(f"Routing {function_name} to the {backend} backend")
+        if self._started is not None:
+            self._start(backend)
+
+    def start(self):
+        """Load every backend in use and start its background work (idempotent)."""
+        with self._lock:
+            if self._started is None:
+                self._started = set()
+            backends = set(self._assignments.values()) | {self.settings["default"], self.settings["fallback"]}
+        for backend in backends:
+            self._start(backend)
+
+    def _start(self, backend):
+        with self._lock:
+            if backend in self._started:
+                return
+            self._started.add(backend)
+        if self._function_map(backend) is None:
+            return
+        start = getattr(sys.modules[BACKENDS[backend][0]], "start_background_tasks", None)
+        if start is not None:
+            start()
+
+    def resolve(self, function_name):
+        """Return (backend, handler) for the next call of `function_name`."""
+        backend = self.assigned(function_name)
+        if backend == "webhook":
+            endpoint = HEALTH_CHECKS["functions"].get(function_name)
+            if endpoint and self.health.degraded(endpoint):
+                self._count(backend, function_name, "rerouted")
+                backend = self.settings["fallback"]
+        function_map = self._function_map(backend)
+        func = function_map.get(function_name) if function_map else None
+        if func is None and backend != self.settings["fallback"]:
+            backend = self.settings["fallback"]
+            func = self._function_map(backend).get(function_name)
+        return backend, func
+
+    def get(self, function_name, default=None):
+        """Function-map lookup for the dispatcher: the handler from the function's current backend."""
+        backend, func = self.resolve(function_name)
+        return RoutedHandler(backend, function_name, func) if func else default
+
+    def _count(self, backend, function_name, counter):
+        counters = self._stats.setdefault((backend, function_name), {"calls": 0, "errors": 0, "rerouted": 0})
+        counters[counter] += 1
+
+    def observe(self, handler, seconds, failed=False):
+        """Record one call made through a handler returned by get()."""
+        if not isinstance(handler, RoutedHandler):
+            return
+        key = (handler.backend, handler.function_name)
+        self._count(*key, "calls")
+        if failed:
+            self._count(*key, "errors")
+        self.latency.observe(key, seconds)
+
+    def stats(self):
+        report = {"assignments": {name: self.assigned(name) for name in FUNCTION_MAP}, "backends": {}}
+        for (backend, function_name), counters in list(self._stats.items()):
+            entry = dict(counters)
+            key = (backend, function_name)
+            if self.latency.count(key):
+                entry["p50_ms"] = self.latency.percentile(key, 50) * 1e3
+                entry["p95_ms"] = self.latency.percentile(key, 95) * 1e3
+            report["backends"].setdefault(backend, {})[function_name] = entry
+        return report
+
+
+# Shared by every session's dispatcher, so assign() applies everywhere at once
+FUNCTION_ROUTER = BackendRouter()
@@ -1,15 +1,25 @@
-import asyncio
 import json
 from datetime import datetime, timedelta
 import random
-from common.config import ARTIFICIAL_DELAY, MOCK_DATA_SIZE
+import threading
+import warnings
+from common.config import (
+    MOCK_DATA_SIZE,
+    MOCK_DATA_SEED,
+    MOCK_DATA_SNAPSHOT,
+)
+from common.availability import AvailabilityIndex
+from common.customer_search import CustomerSearchIndex
+from common.data_store import IdAllocator, MockStore, to_timestamp
+from common.latency import LATENCY_MODEL
+from array import array
 import pathlib
 
 
-def save_mock_data(data):
+def save_mock_data(data, output_dir=None, indent=None):
     """Save mock data to a timestamped file in mock_data_outputs directory."""
     # Create mock_data_outputs directory if it doesn't exist
-    output_dir = pathlib.Path("mock_data_outputs")
+    output_dir = pathlib.Path(output_dir or MOCK_DATA_SNAPSHOT["directory"])
     output_dir.mkdir(exist_ok=True)
 
     # Clean up old mock data files
@@ -19,11 +29,24 @@ def save_mock_data(data):
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_file = output_dir / f"mock_data_{timestamp}.json"
 
-    # Save the data with pretty printing
     with open(output_file, "w") as f:
-        json.dump(data, f, indent=2)
+        json.dump(data, f, indent=indent)
 
     print(f"\nMock data saved to: {output_file}")
+    return output_file
+
+
+def save_mock_data_async(store):
+    """Write a mock data snapshot on a background thread so callers never wait on disk I/O."""
+    thread = threading.Thread(
+        target=lambda: save_mock_data(
+            store.to_dict(), MOCK_DATA_SNAPSHOT["directory"], MOCK_DATA_SNAPSHOT["indent"]
+        ),
+        name="mock-data-snapshot",
+        daemon=True,
+    )
+    thread.start()
+    return thread
 
 
 def cleanup_mock_data_files(output_dir):
@@ -35,82 +58,41 @@ def cleanup_mock_data_files(output_dir):
             print(f"Warning: Could not delete {file}: {e}")
 
 
-# Mock data generation
-def generate_mock_data():
-    customers = []
-    appointments = []
-    orders = []
-
-    # Realistic names for chiropractic patients
-    first_names = ["Sarah", "Mike", "Jennifer", "David", "Lisa", "John", "Maria", "Robert", "Emma", "James", "Ashley", "Michael", "Jessica", "Chris", "Amanda", "Daniel", "Michelle", "Ryan", "Stephanie", "Kevin"]
-    last_names = ["Johnson", "Smith", "Williams", "Brown", "Davis", "Miller", "Wilson", "Moore", "Taylor", "Anderson", "Thomas", "Jackson", "White", "Harris", "Martin", "Thompson", "Garcia", "Martinez", "Robinson", "Clark"]
-
-    # Generate customers
-    for i in range(MOCK_DATA_SIZE["customers"]):
-        first_name = random.choice(first_names)
-        last_name = random.choice(last_names)
-        full_name = f"{first_name} {last_name}"
-        customer = {
-            "id": f"CUST{i:04d}",
-            "name": full_name,
-            "phone": f"+1256{i:07d}",  # Using 256 area code for Gadsden, AL
-            "email": f"{first_name.lower()}.{last_name.lower()}@email.com",
-            "joined_date": (
-                datetime.now() - timedelta(days=random.randint(0, 365))
-            ).isoformat(),
-        }
-        customers.append(customer)
-
-    # Generate appointments
-    for i in range(MOCK_DATA_SIZE["appointments"]):
-        customer = random.choice(customers)
-        appointment = {
-            "id": f"APT{i:04d}",
-            "customer_id": customer["id"],
-            "customer_name": customer["name"],
-            "date": (datetime.now() + timedelta(days=random.randint(0, 14))).isoformat(),
-            "service": random.choice([
-                "Initial Consultation", 
-                "Chiropractic Adjustment", 
-                "Follow-up Visit", 
-                "Wellness Check", 
-                "Maintenance Care",
-                "Pain Assessment"
-            ]),
-            "status": random.choice(["Scheduled", "Completed", "Cancelled"]),
-        }
-        appointments.append(appointment)
-
-    # Generate orders (wellness products and treatment packages)
-    for i in range(MOCK_DATA_SIZE["orders"]):
-        customer = random.choice(customers)
-        # Chiropractic practice items/packages
-        treatment_packages = [
-            {"name": "4-Visit Adjustment Package", "price": 120.00},
-            {"name": "Initial Exam + Adjustment", "price": 29.00},
-            {"name": "Lumbar Support Pillow", "price": 45.00},
-            {"name": "Posture Corrector", "price": 35.00},
-            {"name": "Ice Pack Therapy Kit", "price": 25.00},
-            {"name": "6-Visit Wellness Plan", "price": 180.00},
-            {"name": "Ergonomic Assessment", "price": 75.00},
-        ]
-        selected_package = random.choice(treatment_packages)
-        order = {
-            "id": f"ORD{i:04d}",
-            "customer_id": customer["id"],
-            "customer_name": customer["name"],
-            "date": (datetime.now() - timedelta(days=random.randint(0, 30))).isoformat(),
-            "items": 1,  # Most orders are single packages or products
-            "item_name": selected_package["name"],
-            "total": selected_package["price"],
-            "status": random.choice(["Completed", "Active", "Expired"]),
-        }
-        orders.append(order)
-
-    # Format sample data for display
+# Realistic names for chiropractic patients
+FIRST_NAMES = ["Sarah", "Mike", "Jennifer", "David", "Lisa", "John", "Maria", "Robert", "Emma", "James", "Ashley", "Michael", "Jessica", "Chris", "Amanda", "Daniel", "Michelle", "Ryan", "Stephanie", "Kevin"]
+LAST_NAMES = ["Johnson", "Smith", "Williams", "Brown", "Davis", "Miller", "Wilson", "Moore", "Taylor", "Anderson", "Thomas", "Jackson", "White", "Harris", "Martin", "Thompson", "Garcia", "Martinez", "Robinson", "Clark"]
+
+SERVICES = [
+    "Initial Consultation",
+    "Chiropractic Adjustment",
+    "Follow-up Visit",
+    "Wellness Check",
+    "Maintenance Care",
+    "Pain Assessment",
+]
+APPOINTMENT_STATUSES = ["Scheduled", "Completed", "Cancelled"]
+
+# Chiropractic practice items/packages
+TREATMENT_PACKAGES = [
+    {"name": "4-Visit Adjustment Package", "price": 120.00},
+    {"name": "Initial Exam + Adjustment", "price": 29.00},
+    {"name": "Lumbar Support Pillow", "price": 45.00},
+    {"name": "Posture Corrector", "price": 35.00},
+    {"name": "Ice Pack Therapy Kit", "price": 25.00},
+    {"name": "6-Visit Wellness Plan", "price": 180.00},
+    {"name": "Ergonomic Assessment", "price": 75.00},
+]
+ORDER_STATUSES = ["Completed", "Active", "Expired"]
+
+# Appointments are generated on half-hour marks between 10:00 and 18:30 clinic time
+APPOINTMENT_START_MINUTES = [600 + 30 * i for i in range(18)]
+
+
+def _build_sample_data(rng, store):
+    """Format a few customers with their first appointments and orders for display."""
     sample_data = []
-    sample_customers = random.sample(customers, 3)
-    for customer in sample_customers:
+    for row in rng.sample(range(store.customer_count), min(3, store.customer_count)):
+        customer = store.customer_dict(row)
         customer_data = {
             "Customer": customer["name"],
             "ID": customer["id"],
@@ -121,10 +103,8 @@ def generate_mock_data():
         }
 
         # Add appointments
-        customer_appointments = [
-            a for a in appointments if a["customer_id"] == customer["id"]
-        ]
-        for apt in customer_appointments[:2]:
+        for apt_row in store.appointment_rows_for(row)[:2]:
+            apt = store.appointment_dict(apt_row)
             customer_data["Appointments"].append(
                 {
                     "Service": apt["service"],
@@ -134,12 +114,12 @@ def generate_mock_data():
             )
 
         # Add orders
-        customer_orders = [o for o in orders if o["customer_id"] == customer["id"]]
-        for order in customer_orders[:2]:
+        for order_row in store.order_rows_for(row)[:2]:
+            order = store.order_dict(order_row)
             customer_data["Orders"].append(
                 {
                     "ID": order["id"],
-                    "Item": order.get("item_name", "Unknown Item"),
+                    "Item": order["item_name"],
                     "Total": f"${order['total']:.2f}",
                     "Status": order["status"],
                     "Date": order["date"][:10],
@@ -148,58 +128,206 @@ def generate_mock_data():
 
         sample_data.append(customer_data)
 
-    # Create data object
-    mock_data = {
-        "customers": customers,
-        "appointments": appointments,
-        "orders": orders,
-        "sample_data": sample_data,
-    }
+    return sample_data
 
-    # Save the mock data
-    save_mock_data(mock_data)
 
-    return mock_data
+def _customer_phones(count):
+    """E.164 digits for +1256 followed by the zero-padded customer number."""
+    # Using 256 area code for Gadsden, AL
+    base = 12560000000
+    phones = array("q", range(base, base + min(count, 10_000_000)))
+    phones.extend(int(f"1256{i:07d}") for i in range(10_000_000, count))
+    return phones
 
 
-# Initialize mock data
-MOCK_DATA = generate_mock_data()
+# Mock data generation
+def generate_mock_data(sizes=None, seed=MOCK_DATA_SEED, reference_time=None, include_sample=True):
+    """
+    Generate customers, appointments and orders into a columnar MockStore.
+
+    The same seed and reference_time always produce the same data. Whole
+    columns are drawn at once from small precomputed code tables, so
+    generating millions of rows takes seconds and little memory.
+    """
+    sizes = sizes or MOCK_DATA_SIZE
+    rng = random.Random(seed)
+    now_ts = to_timestamp(reference_time or datetime.now())
+    today_ts = now_ts - now_ts % 86400
+    store = MockStore()
+
+    name_pairs = [(first, last) for first in FIRST_NAMES for last in LAST_NAMES]
+    name_codes = [store.names.code(f"{first} {last}") for first, last in name_pairs]
+    email_codes = [
+        store.emails.code(f"{first.lower()}.{last.lower()}@email.com") for first, last in name_pairs
+    ]
+    service_codes = [store.services.code(service) for service in SERVICES]
+    appointment_status_codes = [store.appointment_statuses.code(s) for s in APPOINTMENT_STATUSES]
+    package_codes = [store.items.code(package["name"]) for package in TREATMENT_PACKAGES]
+    package_prices = [package["price"] for package in TREATMENT_PACKAGES]
+    order_status_codes = [store.order_statuses.code(s) for s in ORDER_STATUSES]
+
+    # Generate customers
+    customer_count = sizes["customers"]
+    name_picks = rng.choices(range(len(name_pairs)), k=customer_count)
+    store.customer_name = array("H", [name_codes[n] for n in name_picks])
+    store.customer_email = array("I", [email_codes[n] for n in name_picks])
+    store.customer_phone = _customer_phones(customer_count)
+    joined_dates = [now_ts - 86400 * d for d in range(366)]
+    store.customer_joined = array("q", rng.choices(joined_dates, k=customer_count))
+
+    # Generate appointments
+    appointment_count = sizes["appointments"]
+    appointment_dates = [
+        today_ts + 86400 * d + 60 * m for d in range(15) for m in APPOINTMENT_START_MINUTES
+    ]
+    store.appointment_id = array("I", range(appointment_count))
+    store.appointment_ids = IdAllocator(appointment_count)
+    store.appointment_customer = array("I", rng.choices(range(customer_count), k=appointment_count))
+    store.appointment_date = array("q", rng.choices(appointment_dates, k=appointment_count))
+    store.appointment_service = array("H", rng.choices(service_codes, k=appointment_count))
+    store.appointment_status = array("B", rng.choices(appointment_status_codes, k=appointment_count))
+
+    # Generate orders (wellness products and treatment packages)
+    order_count = sizes["orders"]
+    order_dates = [now_ts - 86400 * d for d in range(31)]
+    package_picks = rng.choices(range(len(TREATMENT_PACKAGES)), k=order_count)
+    store.order_customer = array("I", rng.choices(range(customer_count), k=order_count))
+    store.order_date = array("q", rng.choices(order_dates, k=order_count))
+    store.order_items = array("H", [1]) * order_count  # Most orders are single packages or products
+    store.order_item = array("H", [package_codes[p] for p in package_picks])
+    store.order_total = array("d", [package_prices[p] for p in package_picks])
+    store.order_status = array("B", rng.choices(order_status_codes, k=order_count))
+
+    if include_sample:
+        store.sample_data = _build_sample_data(rng, store)
+
+    return store
+
+
+def generate_bulk_mock_data(scale, seed=MOCK_DATA_SEED, reference_time=None):
+    """Generate MOCK_DATA_SIZE multiplied by `scale` rows for scale tests (no sample data)."""
+    sizes = {table: int(count * scale) for table, count in MOCK_DATA_SIZE.items()}
+    return generate_mock_data(sizes, seed=seed, reference_time=reference_time, include_sample=False)
+
+
+_mock_data = None
+_mock_data_lock = threading.Lock()
+
+# Slot availability index, built on first use from the appointments table
+_availability_index = None
+
+# Fuzzy customer search index, built on first use from the customers table
+_customer_search_index = None
+
+
+def get_mock_data():
+    """Return the shared mock data, generating it on first use."""
+    global _mock_data
+    if _mock_data is None:
+        with _mock_data_lock:
+            if _mock_data is None:
+                data = generate_mock_data()
+                if MOCK_DATA_SNAPSHOT["enable"]:
+                    save_mock_data_async(data)
+                _mock_data = data
+    return _mock_data
+
+
+def reset_mock_data(data=None):
+    """Replace the shared mock data (or drop it so it regenerates lazily) and its derived indexes."""
+    global _mock_data, _availability_index, _customer_search_index
+    with _mock_data_lock:
+        _mock_data = data
+        _availability_index = None
+        _customer_search_index = None
+
+
+def get_availability_index():
+    """Return the shared availability index, building it on first use."""
+    global _availability_index
+    index = _availability_index
+    if index is None:
+        # Outside the lock: get_mock_data() takes it too
+        store = get_mock_data()
+        with _mock_data_lock:
+            # Sessions racing here must all get the same index, or they could book one slot twice
+            if _availability_index is None:
+                _availability_index = AvailabilityIndex.from_times(store.booked_appointment_times())
+            index = _availability_index
+    return index
+
+
+def get_customer_search_index():
+    """Return the shared fuzzy customer search index, building it on first use."""
+    global _customer_search_index
+    index = _customer_search_index
+    if index is None:
+        store = get_mock_data()
+        with _mock_data_lock:
+            if _customer_search_index is None:
+                _customer_search_index = CustomerSearchIndex(store)
+            index = _customer_search_index
+    return index
+
+
+def __getattr__(name):
+    # Keep `from common.business_logic import MOCK_DATA` working without generating at import time.
+    # MOCK_DATA used to be a dict of lists; callers get a snapshot in that shape, not the live store.
+    if name == "MOCK_DATA":
+        warnings.warn(
+            "MOCK_DATA is deprecated; use get_mock_data() for the live store",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        return get_mock_data().to_dict()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 async def simulate_delay(delay_type):
-    """Simulate processing delay based on operation type."""
-    await asyncio.sleep(ARTIFICIAL_DELAY[delay_type])
+    """
+    Simulate processing delay based on operation type, using the LATENCY_PROFILES
+    profile for it (or the constant ARTIFICIAL_DELAY value). May raise an
+    injected timeout or error when the profile has fault rates.
+    """
+    await LATENCY_MODEL.apply(delay_type)
 
 
-async def get_customer(phone=None, email=None, customer_id=None):
-    """Look up a customer by phone, email, or ID."""
+async def get_customer(phone=None, email=None, customer_id=None, name=None):
+    """
+    Look up a customer by phone, email, or ID.
+    When there is no exact match, ranked fuzzy candidates (phone, email, name) are returned.
+    """
     await simulate_delay("database")
 
+    store = get_mock_data()
     if phone:
-        customer = next(
-            (c for c in MOCK_DATA["customers"] if c["phone"] == phone), None
-        )
+        row = store.find_customer_by_phone(phone)
     elif email:
-        customer = next(
-            (c for c in MOCK_DATA["customers"] if c["email"] == email), None
-        )
+        row = store.find_customer_by_email(email)
     elif customer_id:
-        customer = next(
-            (c for c in MOCK_DATA["customers"] if c["id"] == customer_id), None
-        )
+        row = store.find_customer_by_id(customer_id)
+    elif name:
+        row = None
     else:
         return {"error": "No search criteria provided"}
 
-    return customer if customer else {"error": "Customer not found"}
+    if row is not None:
+        return store.customer_dict(row)
+
+    candidates = get_customer_search_index().search(phone=phone, email=email, name=name)
+    if candidates:
+        return {"error": "Customer not found", "candidates": candidates}
+    return {"error": "Customer not found"}
 
 
 async def get_customer_appointments(customer_id):
     """Get all appointments for a customer."""
     await simulate_delay("database")
 
-    appointments = [
-        a for a in MOCK_DATA["appointments"] if a["customer_id"] == customer_id
-    ]
+    store = get_mock_data()
+    row = store.find_customer_by_id(customer_id)
+    rows = store.appointment_rows_for(row) if row is not None else []
+    appointments = [store.appointment_dict(apt_row) for apt_row in rows]
     return {"customer_id": customer_id, "appointments": appointments}
 
 
@@ -207,57 +335,123 @@ async def get_customer_orders(customer_id):
     """Get all orders for a customer."""
     await simulate_delay("database")
 
-    orders = [o for o in MOCK_DATA["orders"] if o["customer_id"] == customer_id]
+    store = get_mock_data()
+    row = store.find_customer_by_id(customer_id)
+    rows = store.order_rows_for(row) if row is not None else []
+    orders = [store.order_dict(order_row) for order_row in rows]
     return {"customer_id": customer_id, "orders": orders}
 
 
-async def schedule_appointment(customer_id, date, service):
-    """Schedule a new appointment."""
+def _parse_appointment_date(date):
+    return datetime.fromisoformat(date.replace("Z", "+00:00")).replace(tzinfo=None)
+
+
+async def hold_appointment_slot(date):
+    """Hold an appointment slot for APPOINTMENT_HOLD_TTL seconds while the caller confirms."""
+    await simulate_delay("database")
+
+    try:
+        when = _parse_appointment_date(date)
+    except ValueError:
+        return {"error": f"Invalid date format: {date}. Use YYYY-MM-DDTHH:MM:SS"}
+
+    index = get_availability_index()
+    hold_id = index.hold(when)
+    if hold_id is None:
+        return {"error": "That time slot is not available"}
+    return {"hold_id": hold_id, "date": index.held_slot(hold_id).isoformat()}
+
+
+async def release_appointment_hold(hold_id):
+    """Release a held slot so other callers can book it."""
+    released = get_availability_index().release(hold_id)
+    return {"hold_id": hold_id, "released": released}
+
+
+async def schedule_appointment(customer_id, date, service, hold_id=None):
+    """
+    Schedule a new appointment.
+
+    With a hold_id the held slot is confirmed (a date passed along must be that
+    slot); otherwise the slot is checked and taken in one atomic step. Either
+    way two sessions can never book the same slot, and the appointment is
+    stored at the start of the slot it took.
+    """
     await simulate_delay("database")
 
     # Verify customer exists
-    customer = await get_customer(customer_id=customer_id)
-    if "error" in customer:
-        return customer
+    store = get_mock_data()
+    customer_row = store.find_customer_by_id(customer_id)
+    if customer_row is None:
+        return {"error": "Customer not found"}
+
+    index = get_availability_index()
+    if hold_id:
+        when = index.held_slot(hold_id)
+        if when is not None and date:
+            try:
+                requested = _parse_appointment_date(date)
+            except ValueError:
+                return {"error": f"Invalid date format: {date}. Use YYYY-MM-DDTHH:MM:SS"}
+            # hold() took the slot containing the time the caller asked for, so compare slots
+            if index.slot_start(requested) != when:
+                return {
+                    "error": f"The hold is for {when.isoformat()}, not {requested.isoformat()}. "
+                    "Book the held time, or release the hold and hold the new time first"
+                }
+        if when is None or not index.confirm(hold_id):
+            return {"error": "That hold has expired and the time slot is no longer available"}
+    else:
+        try:
+            requested = _parse_appointment_date(date)
+        except ValueError:
+            return {"error": f"Invalid date format: {date}. Use YYYY-MM-DDTHH:MM:SS"}
+        # Book (and store) the slot containing the requested time, e.g. 16:00 -> the 15:45 slot
+        when = index.slot_start(requested)
+        if when is None or not index.book(when):
+            return {"error": "That time slot is not available"}
 
     # Create new appointment
-    appointment_id = f"APT{len(MOCK_DATA['appointments']):04d}"
-    appointment = {
-        "id": appointment_id,
-        "customer_id": customer_id,
-        "customer_name": customer["name"],
-        "date": date,
-        "service": service,
-        "status": "Scheduled",
-    }
-
-    MOCK_DATA["appointments"].append(appointment)
-    return appointment
+    row = store.add_appointment(customer_row, when, service)
+    return store.appointment_dict(row)
 
 
 async def get_available_appointment_slots(start_date, end_date):
-    """Get available appointment slots."""
+    """Get available appointment slots within the clinic's opening hours."""
     await simulate_delay("database")
 
-    # Convert dates to datetime objects
-    start = datetime.fromisoformat(start_date)
-    end = datetime.fromisoformat(end_date)
-
-    # Generate available slots (9 AM to 5 PM, 1-hour slots)
-    slots = []
-    current = start
-    while current <= end:
-        if current.hour >= 9 and current.hour < 17:
-            slot_time = current.isoformat()
-            # Check if slot is already taken
-            taken = any(a["date"] == slot_time for a in MOCK_DATA["appointments"])
-            if not taken:
-                slots.append(slot_time)
-        current += timedelta(hours=1)
-
+    slots = get_availability_index().available_slots(start_date, end_date)
     return {"available_slots": slots}
 
 
+async def get_available_times(date):
+    """Get available appointment start times (HH:MM) for a single day."""
+    await simulate_delay("database")
+
+    return {"times": get_availability_index().available_times(date)}
+
+
+async def get_next_available_times(start_date, earliest="00:00", latest="24:00", days=3, horizon=14):
+    """
+    Get available start times on `start_date` and the following days.
+    Only times in [earliest, latest) are kept; returns up to `days` days that have
+    at least one such time, looking no further than `horizon` days ahead.
+    """
+    await simulate_delay("database")
+
+    index = get_availability_index()
+    day = datetime.fromisoformat(start_date[:10]).date()
+    found = []
+    for _ in range(horizon):
+        times = [t for t in index.available_times(day) if earliest <= t < latest]
+        if times:
+            found.append({"date": day.isoformat(), "weekday": day.strftime("%A"), "times": times})
+            if len(found) >= days:
+                break
+        day += timedelta(days=1)
+    return {"days": found}
+
+
 async def prepare_agent_filler_message(websocket, message_type):
     """
     Handle agent filler messages while maintaining proper function call protocol.
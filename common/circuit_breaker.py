@@ -0,0 +1,114 @@
+"""
+Circuit breakers for webhook endpoints.
+
+A breaker counts consecutive failed or slow requests to one endpoint. Once
+the count reaches the threshold the circuit opens and calls are refused
+immediately, so callers run their fallback instead of each waiting out a
+full timeout while the endpoint is down. After `open_seconds` the circuit is
+half-open: a limited number of probe requests go through, and the first
+result decides whether it closes again or re-opens. A probe that ends
+without a result (e.g. it was cancelled) must `release()` its slot.
+"""
+
+import threading
+import time
+
+from common.config import CIRCUIT_BREAKER
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, name, settings=CIRCUIT_BREAKER, clock=time.monotonic):
+        self.name = name
+        self.settings = settings
+        self.clock = clock
+        self.state = CLOSED
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probes = 0
+        self._stats = {"opened": 0, "rejected": 0, "failures": 0, "slow_calls": 0, "successes": 0}
+
+    def allow(self):
+        """Return True if a request may be sent now (half-open requests count as probes)."""
+        if not self.settings["enable"]:
+            return True
+        with self._lock:
+            if self.state == OPEN:
+                if self.clock() - self._opened_at < self.settings["open_seconds"]:
+                    self._stats["rejected"] += 1
+                    return False
+                self.state = HALF_OPEN
+                self._probes = 0
+            if self.state == HALF_OPEN:
+                if self._probes >= self.settings["half_open_probes"]:
+                    self._stats["rejected"] += 1
+                    return False
+                self._probes += 1
+            return True
+
+    def record(self, success, seconds=0.0):
+        """Record the outcome of a request that allow() let through."""
+        slow = success and seconds >= self.settings["slow_call_seconds"]
+        with self._lock:
+            if slow:
+                self._stats["slow_calls"] += 1
+            if success and not slow:
+                self._stats["successes"] += 1
+                self._failures = 0
+                self.state = CLOSED
+                return
+            if not success:
+                self._stats["failures"] += 1
+            self._failures += 1
+            if self.state == HALF_OPEN or self._failures >= self.settings["failure_threshold"]:
+                self._open()
+
+    def release(self):
+        """Give back the slot of a request allow() let through whose outcome will not be recorded."""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def _open(self):
+        if self.state != OPEN:
+            self._stats["opened"] += 1
+        self.state = OPEN
+        self._opened_at = self.clock()
+        self._probes = 0
+
+    def stats(self):
+        with self._lock:
+            report = dict(self._stats)
+            report["state"] = self.state
+            report["consecutive_failures"] = self._failures
+            if self.state == OPEN:
+                report["retry_in_s"] = max(
+                    0.0, self.settings["open_seconds"] - (self.clock() - self._opened_at)
+                )
+        return report
+
+
+class CircuitBreakers:
+    """One breaker per endpoint, with settings overridable by the endpoint's "breaker" entry."""
+
+    def __init__(self, endpoints, settings=CIRCUIT_BREAKER):
+        self.endpoints = endpoints
+        self.settings = settings
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint_name):
+        breaker = self._breakers.get(endpoint_name)
+        if breaker is None:
+            settings = dict(self.settings)
+            settings.update(self.endpoints.get(endpoint_name, {}).get("breaker", {}))
+            with self._lock:
+                breaker = self._breakers.setdefault(endpoint_name, CircuitBreaker(endpoint_name, settings))
+        return breaker
+
+    def stats(self):
+        return {name: breaker.stats() for name, breaker in self._breakers.items()}
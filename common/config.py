@@ -4,6 +4,31 @@ ARTIFICIAL_DELAY = {
     "heavy_computation": 0.0 # Not in use in this reference implementation but left as an example for simulating different delays
 }
 
+# Simulated latency and faults, applied by simulate_delay (business logic) and call_webhook (per endpoint)
+# Backends or functions without a profile fall back to the constant ARTIFICIAL_DELAY value (0 for webhooks)
+# - seed: makes every backend/function delay sequence reproducible (None for fresh randomness)
+# - backends: profile per delay type ("database", ...) or WEBHOOK_CONFIG endpoint name ("n8n_webhooks", ...)
+# - functions: profile per FUNCTION_MAP function, overriding its backend profile
+# Profile keys:
+# - distribution: "constant" (value), "lognormal" (median, sigma, optional max) or
+#   "empirical" (percentiles: {percentile: seconds}, linearly interpolated)
+# - timeout_rate: probability the call hangs for `timeout` seconds and then times out
+# - error_rate: probability the call fails after its delay
+LATENCY_PROFILES = {
+    "seed": 42,
+    "backends": {
+        # "database": {"distribution": "lognormal", "median": 0.05, "sigma": 0.5, "max": 2.0},
+        # "n8n_webhooks": {
+        #     "distribution": "empirical",
+        #     "percentiles": {50: 0.35, 90: 0.8, 99: 2.5, 100: 6.0},
+        #     "timeout_rate": 0.005, "timeout": 10, "error_rate": 0.01,
+        # },
+    },
+    "functions": {
+        # "get_orders": {"distribution": "lognormal", "median": 0.12, "sigma": 0.7},
+    },
+}
+
 
 # Mock data settings
 MOCK_DATA_SIZE = {
@@ -12,9 +37,306 @@ MOCK_DATA_SIZE = {
     "orders": 2000
 }
 
-# Database settings (if using SQLite)
-# Not in use in this reference implementation but left as an example for how to potentially integrate with a DB
+# Seed for mock data generation; the same seed always produces the same records (None for a fresh set each run)
+MOCK_DATA_SEED = 42
+
+# Optional JSON snapshot of the generated mock data, written on a background thread
+MOCK_DATA_SNAPSHOT = {
+    "enable": False,
+    "directory": "mock_data_outputs",
+    "indent": None  # Set to 2 for a human-readable dump (slower and much larger)
+}
+
+# Clinic time zone (IANA name); times given with a UTC offset are converted to it
+CLINIC_TIMEZONE = "America/Chicago"
+
+# Clinic opening hours used to build the appointment slot grid (mirrors the hours in PROMPT_TEMPLATE)
+# Keys are weekdays (Monday = 0), values are (open, close) pairs in 24-hour HH:MM clinic local time
+CLINIC_HOURS = {
+    0: [("10:00", "14:00"), ("14:45", "19:00")],
+    1: [("10:00", "14:00"), ("14:45", "19:00")],
+    2: [("10:00", "14:00"), ("14:45", "19:00")],
+    3: [("10:00", "14:00"), ("14:45", "19:00")],
+    4: [("10:00", "14:00"), ("14:45", "19:00")],
+    5: [("10:00", "16:00")],
+    6: [],  # Sunday closed
+}
+
+# Length of a bookable appointment slot in minutes
+APPOINTMENT_SLOT_MINUTES = 30
+
+# How long (seconds) a held slot stays reserved before other callers can take it
+APPOINTMENT_HOLD_TTL = 120
+
+# Per-function shaping of FunctionCallResponse payloads so the LLM reads less
+# - list: key of the record list in the result
+# - omit: drop these fields from each record; fields a backend adds (e.g. the
+#   webhook's "provider" and "confirmation") pass through
+# - upcoming_only: drop records whose "date" is in the past
+# - exclude_status: drop records with these statuses
+# - newest_first: sort records by "date", most recent first
+# - limit: keep at most this many records and report how many more there are
+RESPONSE_SHAPES = {
+    "get_appointments": {
+        "list": "appointments",
+        "omit": ["customer_id", "customer_name"],
+        "upcoming_only": True,
+        "exclude_status": ["Cancelled"],
+        "limit": 5,
+    },
+    "get_orders": {
+        "list": "orders",
+        "omit": ["customer_id", "customer_name"],
+        "newest_first": True,
+        "limit": 5,
+    },
+    "check_availability": {
+        "list": "available_slots",
+        "limit": 20,
+    },
+}
+
+# Per-session read-through cache in front of FUNCTION_MAP handlers
+# - ttl: seconds a cached result stays valid, per read function (functions not listed are never cached)
+# - invalidated_by: write function -> read functions whose cached results it clears
+FUNCTION_CACHE = {
+    "ttl": {
+        "find_customer": 300,
+        "get_appointments": 60,
+        "get_orders": 300,
+        "get_customer_overview": 60,
+        "check_date": 300,
+        "check_availability": 15,
+        "bookings": 15,
+        "find_available_times": 15,
+    },
+    "invalidated_by": {
+        "create_appointment": [
+            "get_appointments", "get_customer_overview",
+            "check_availability", "bookings", "find_available_times",
+        ],
+        "create_event": [
+            "get_appointments", "get_customer_overview",
+            "check_availability", "bookings", "find_available_times",
+        ],
+        "hold_appointment": ["check_availability", "bookings", "find_available_times"],
+        "release_hold": ["check_availability", "bookings", "find_available_times"],
+    },
+}
+
+# Filler messages injected by the dispatcher itself when a function call is slow
+# - threshold: seconds of expected (or elapsed) execution before a filler is spoken
+# - smoothing: weight of the newest sample in the moving latency estimate per function
+# - cooldown: minimum seconds between two fillers, so chained calls don't repeat them
+LATENCY_FILLER = {
+    "enable": True,
+    "threshold": 1.0,
+    "smoothing": 0.3,
+    "cooldown": 8.0,
+    "messages": {
+        "lookup": "Let me look that up for you...",
+        "booking": "I'm booking that for you now, one moment...",
+        "default": "One moment please...",
+    },
+    "function_messages": {
+        "find_customer": "lookup",
+        "get_appointments": "lookup",
+        "get_orders": "lookup",
+        "get_customer_overview": "lookup",
+        "check_availability": "lookup",
+        "bookings": "lookup",
+        "find_available_times": "lookup",
+        "create_appointment": "booking",
+        "create_event": "booking",
+    },
+}
+
+# Where FUNCTION_MAP handlers run, so CPU-heavy work does not stall audio on the session's event loop
+# - default: mode for functions not listed
+# - functions: per-function mode: "inline" (on the event loop), "thread" or "process"
+# - pools: worker counts for the shared thread and process pools
+# Everything runs inline by default: the mock handlers take microseconds, and a "thread" call
+# adds a pool hop plus a fresh event loop (get_orders: ~510 us vs ~77 us inline). Opt a
+# function into "thread" or "process" only when it measurably blocks the loop. Webhook
+# handlers should stay inline, since each thread call's throwaway loop cannot reuse the
+# pooled HTTP session. Process workers hold their own copy of the (seeded) mock data and
+# do not see bookings made in the main process, so only use "process" for functions that
+# don't read them
+FUNCTION_EXECUTION = {
+    "default": "inline",
+    "functions": {},
+    "pools": {
+        "thread": {"max_workers": 4},
+        "process": {"max_workers": 2},
+    },
+}
+
+# Connection pool for each webhook endpoint's long-lived HTTP session
+# (an endpoint in WEBHOOK_CONFIG can override any of these with a "pool" entry)
+# - limit / limit_per_host: maximum open connections in total and per host
+# - ttl_dns_cache: seconds a resolved host name is reused
+# - keepalive_timeout: seconds an idle connection is kept open for reuse
+WEBHOOK_CONNECTION_POOL = {
+    "limit": 20,
+    "limit_per_host": 10,
+    "ttl_dns_cache": 300,
+    "keepalive_timeout": 30,
+}
+
+# Retries for webhook calls that are safe to repeat (GET/PUT/DELETE, or a POST marked idempotent)
+# (an endpoint in WEBHOOK_CONFIG can override any of these with a "retry" entry)
+# - attempts: total tries, including the first
+# - base_delay / max_delay: exponential backoff bounds in seconds; the actual wait is a random
+#   value up to the bound ("full jitter") so retries from many sessions don't arrive together
+# - attempt_timeout: seconds per try, so one stalled request leaves room for another
+# - budget: seconds for all tries together; no retry starts after it is spent
+WEBHOOK_RETRY_POLICY = {
+    "attempts": 3,
+    "base_delay": 0.2,
+    "max_delay": 2.0,
+    "attempt_timeout": 4.0,
+    "budget": 10.0,
+}
+
+# Hedged requests for read paths: if the first try has not answered after the path's
+# recent p95 latency, a second identical request is sent and the first answer wins
+# - paths: endpoint -> webhook paths that may be hedged
+# - percentile: latency percentile used as the hedge delay
+# - min_samples: latency samples needed before hedging (default_delay is used until then)
+# - min_delay: never hedge sooner than this many seconds
+HEDGED_REQUESTS = {
+    "enable": True,
+    "paths": {
+        "n8n_webhooks": ["bookings"],
+        "crm_system": ["customers/search"],
+    },
+    "percentile": 95,
+    "min_samples": 20,
+    "default_delay": 1.5,
+    "min_delay": 0.05,
+}
+
+# Circuit breaker per webhook endpoint: after repeated failures the endpoint is skipped and
+# callers get their fallback immediately instead of waiting out the timeout
+# (an endpoint in WEBHOOK_CONFIG can override any of these with a "breaker" entry)
+# - failure_threshold: consecutive failed or slow requests that open the circuit
+# - slow_call_seconds: a successful request slower than this counts as a failure (latency spike)
+# - open_seconds: how long the circuit stays open before a probe request is let through
+# - half_open_probes: concurrent probe requests allowed while half-open
+CIRCUIT_BREAKER = {
+    "enable": True,
+    "failure_threshold": 5,
+    "slow_call_seconds": 5.0,
+    "open_seconds": 30.0,
+    "half_open_probes": 1,
+}
+
+# Shared cache of webhook lookups, per date for bookings (cleared for a date when create_event books it)
+# - ttl: seconds a result is served without asking the backend
+# - stale_ttl: further seconds a result is still served while it is refreshed in the background
+WEBHOOK_CACHE = {
+    "bookings": {"ttl": 30, "stale_ttl": 120},
+}
+
+# Identical idempotent webhook requests in flight at the same time (same endpoint, path,
+# method, body and query) share one HTTP call and its result, across all sessions
+SINGLE_FLIGHT = {
+    "enable": True,
+}
+
+# Write-behind outbox for bookings: create_event stores the booking locally and confirms
+# right away, and a background worker delivers it to the booking webhook
+# - path: SQLite file holding queued bookings (kept across restarts)
+# - max_attempts: deliveries tried before a booking is marked failed
+# - confirm_timeout: seconds create_event waits for the retry when the same booking failed before
+# - base_delay / max_delay: exponential backoff bounds in seconds between attempts (full jitter)
+# - batch_size: rows delivered concurrently per pass
+BOOKING_OUTBOX = {
+    "enable": True,
+    "path": "booking_outbox.db",
+    "max_attempts": 8,
+    "confirm_timeout": 10.0,
+    "base_delay": 2.0,
+    "max_delay": 300.0,
+    "batch_size": 10,
+}
+
+# Background health probes for external backends (webhook endpoints), run concurrently
+# every `interval` seconds; scores are shown on /health and used by the dispatcher
+# - probe_timeout: seconds before a probe counts as failed
+# - path: webhook path probed on each endpoint
+# - window: recent probes used for availability
+# - smoothing: weight of the newest probe in the moving latency average
+# - slow_seconds: latency above this lowers the score proportionally
+# - degraded_below / min_samples: a backend scoring below this after at least
+#   min_samples probes is degraded, and its functions use their local fallback
+# - functions: function name -> WEBHOOK_CONFIG endpoint its webhook handler calls
+HEALTH_CHECKS = {
+    "enable": True,
+    "interval": 30.0,
+    "probe_timeout": 3.0,
+    "path": "health",
+    "window": 20,
+    "smoothing": 0.3,
+    "slow_seconds": 2.0,
+    "degraded_below": 0.5,
+    "min_samples": 3,
+    "functions": {
+        "bookings": "n8n_webhooks",
+        "create_event": "n8n_webhooks",
+        "find_customer": "crm_system",
+        "get_appointments": "booking_system",
+    },
+}
+
+# Local stand-in for the webhook APIs (python -m common.webhook_standin), for offline tests and benchmarks
+# - latency: LATENCY_PROFILES-style table keyed by route ("check_date", "bookings", "create",
+#   "customers/search", "appointments", "health"); routes without a profile use "default".
+#   Injected errors answer HTTP 500, injected timeouts hang for `timeout` seconds, then HTTP 504
+WEBHOOK_STANDIN = {
+    "host": "127.0.0.1",
+    "port": 8765,
+    "latency": {
+        "seed": 7,
+        "backends": {
+            "default": {"distribution": "lognormal", "median": 0.08, "sigma": 0.4, "max": 1.0},
+            # "bookings": {"distribution": "lognormal", "median": 0.3, "sigma": 0.6,
+            #              "timeout_rate": 0.01, "timeout": 30.0, "error_rate": 0.02},
+        },
+        "functions": {},
+    },
+}
+
+# Backend serving each function, read by the router on every call (common/backend_router.py);
+# change at runtime with FUNCTION_ROUTER.assign() or POST /backends
+# - "mock": in-memory mock data (common/agent_functions.py)
+# - "sqlite": SQLite lookups at DATABASE_CONFIG["path"] (find_customer, get_appointments, get_orders)
+# - "webhook": external APIs in WEBHOOK_CONFIG (bookings, create_event, find_customer, get_appointments)
+# - default: backend for functions not listed in `functions`
+# - fallback: used when the assigned backend lacks the function, cannot be loaded, or is degraded
+FUNCTION_BACKENDS = {
+    "default": "mock",
+    "fallback": "mock",
+    "functions": {
+        # "find_customer": "sqlite",
+        # "get_appointments": "sqlite",
+        # "create_event": "webhook",
+    },
+}
+
+# Trace context and timing for outbound webhook requests (common/tracing.py)
+# - enable: send traceparent/tracestate headers and record DNS/connect/TTFB/body timings
+# - turns: recent turns kept in each session's latency trace (shown under /metrics)
+# - tracestate_key: vendor key of the tracestate entry carrying the session and turn id
+WEBHOOK_TRACING = {
+    "enable": True,
+    "turns": 50,
+    "tracestate_key": "voiceagent",
+}
+
+# Database settings (if using SQLite), used by the "sqlite" function backend
+# With "enable" False the file is rebuilt from the mock data on first use and kept in sync with new bookings
 DATABASE_CONFIG = {
     "path": "business_data.db",
-    "enable": False  # Set to True to use actual SQLite instead of mock data
-} 
\ No newline at end of file
+    "enable": False  # Set to True to use actual SQLite (the existing file) instead of mock data
+}
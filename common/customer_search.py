@@ -0,0 +1,223 @@
+"""
+Fuzzy and phonetic customer search for identifiers mangled by speech-to-text.
+
+Exact lookups fail on a single misheard digit or letter. This index ranks
+likely customers instead:
+
+- phone numbers by edit distance: every number one substitution, adjacent
+  swap, missing or extra digit away from the query is probed against the
+  sorted phone column, so the cost does not grow with the table
+- email local parts by character trigrams, with separators ("dot",
+  underscores) ignored
+- names by Soundex code per word plus trigram similarity
+
+Names and emails are indexed over the distinct interned values of the
+store, which stays small even when the customer table is large.
+"""
+
+from common.normalizers import email_local_key, normalize_email, spoken_digits
+
+_SOUNDEX_CODES = {
+    letter: digit
+    for digit, letters in {
+        "1": "bfpv", "2": "cgjkqsxz", "3": "dt", "4": "l", "5": "mn", "6": "r",
+    }.items()
+    for letter in letters
+}
+
+# Customer rows expanded per matching name or email value
+_ROWS_PER_VALUE = 5
+
+
+def soundex(word):
+    """American Soundex code of a word (e.g. 'Robert' and 'Rupert' -> 'R163')."""
+    word = "".join(ch for ch in word.lower() if ch.isalpha())
+    if not word:
+        return ""
+    digits = []
+    last = _SOUNDEX_CODES.get(word[0])
+    for ch in word[1:]:
+        code = _SOUNDEX_CODES.get(ch)
+        if code and code != last:
+            digits.append(code)
+        if ch not in "hw":
+            last = code
+    return (word[0].upper() + "".join(digits) + "000")[:4]
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def dice(a, b):
+    """Dice coefficient of two trigram sets."""
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def edit_distance(a, b):
+    """Damerau-Levenshtein distance (optimal string alignment) between two short strings."""
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            cost = ca != cb
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def _phone_variants(digits):
+    """Digit strings within one edit of `digits` (substitution, swap, deletion, insertion)."""
+    variants = set()
+    for i in range(len(digits)):
+        for d in "0123456789":
+            if d != digits[i]:
+                variants.add(digits[:i] + d + digits[i + 1 :])
+        variants.add(digits[:i] + digits[i + 1 :])
+        if i + 1 < len(digits):
+            variants.add(digits[:i] + digits[i + 1] + digits[i] + digits[i + 2 :])
+    for i in range(len(digits) + 1):
+        for d in "0123456789":
+            variants.add(digits[:i] + d + digits[i:])
+    variants.discard(digits)
+    return variants
+
+
+class CustomerSearchIndex:
+    """Ranked fuzzy lookup of customers in a MockStore."""
+
+    def __init__(self, store):
+        self.store = store
+        # Soundex code -> name codes, trigram -> name codes
+        self._name_soundex = {}
+        self._name_trigrams = {}
+        self._name_keys = {}
+        for code, name in enumerate(store.names.values):
+            lowered = name.lower()
+            grams = trigrams(lowered)
+            self._name_keys[code] = (lowered, grams, [soundex(w) for w in lowered.split()])
+            for sx in self._name_keys[code][2]:
+                self._name_soundex.setdefault(sx, set()).add(code)
+            for gram in grams:
+                self._name_trigrams.setdefault(gram, set()).add(code)
+        # Trigram of email local part -> email codes
+        self._email_trigrams = {}
+        self._email_keys = {}
+        for code, email in enumerate(store.emails.values):
+            local = email_local_key(email)
+            grams = trigrams(local)
+            self._email_keys[code] = (local, email.split("@", 1)[-1], grams)
+            for gram in grams:
+                self._email_trigrams.setdefault(gram, set()).add(code)
+
+    # -- per-field matching ----------------------------------------------
+
+    def match_phone(self, phone):
+        """Return {row: score} for customers whose phone is within one edit of `phone`."""
+        digits = spoken_digits(phone)
+        if len(digits) == 10:
+            digits = "1" + digits
+        if len(digits) < 7:
+            return {}
+        matches = {}
+        row = self.store.find_customer_by_phone(f"+{digits}")
+        if row is not None:
+            matches[row] = 1.0
+        for variant in _phone_variants(digits):
+            row = self.store.find_customer_by_phone(f"+{variant}")
+            if row is not None and row not in matches:
+                matches[row] = 0.8
+        return matches
+
+    def match_email(self, email, min_score=0.5):
+        """Return {row: score} for customers with a similar email local part."""
+        normalized = normalize_email(email) or str(email).strip().lower()
+        local = email_local_key(normalized)
+        domain = normalized.split("@", 1)[-1] if "@" in normalized else None
+        grams = trigrams(local)
+        candidates = set()
+        for gram in grams:
+            candidates |= self._email_trigrams.get(gram, set())
+        matches = {}
+        for code in candidates:
+            other_local, other_domain, other_grams = self._email_keys[code]
+            score = dice(grams, other_grams)
+            if local == other_local:
+                score = 1.0
+            elif score >= min_score:
+                distance = edit_distance(local, other_local)
+                score = max(score, 1 - distance / max(len(local), len(other_local)))
+            if domain and domain != other_domain:
+                score *= 0.9
+            if score >= min_score:
+                for row in self.store.customer_rows_for_email(code, _ROWS_PER_VALUE):
+                    matches[row] = max(matches.get(row, 0.0), score)
+        return matches
+
+    def match_name(self, name, min_score=0.5):
+        """Return {row: score} for customers whose name sounds or looks like `name`."""
+        lowered = " ".join(name.lower().split())
+        words = lowered.split()
+        codes = [soundex(w) for w in words]
+        grams = trigrams(lowered)
+        candidates = set()
+        for sx in codes:
+            candidates |= self._name_soundex.get(sx, set())
+        for gram in grams:
+            candidates |= self._name_trigrams.get(gram, set())
+        matches = {}
+        for code in candidates:
+            other, other_grams, other_codes = self._name_keys[code]
+            phonetic = sum(1 for sx in codes if sx in other_codes) / max(len(codes), len(other_codes))
+            score = 1.0 if lowered == other else 0.5 * phonetic + 0.5 * dice(grams, other_grams)
+            if score >= min_score:
+                for row in self.store.customer_rows_for_name(code, _ROWS_PER_VALUE):
+                    matches[row] = max(matches.get(row, 0.0), score)
+        return matches
+
+    # -- combined search -------------------------------------------------
+
+    def search(self, phone=None, email=None, name=None, limit=5):
+        """
+        Rank customers against any combination of phone, email and name.
+        A customer's score is the mean of its per-field scores over the fields given.
+        """
+        fields = []
+        if phone:
+            fields.append(("phone", self.match_phone(phone)))
+        if email:
+            fields.append(("email", self.match_email(email)))
+        if name:
+            fields.append(("name", self.match_name(name)))
+        if not fields:
+            return []
+
+        rows = set()
+        for _, matches in fields:
+            rows.update(matches)
+        ranked = []
+        for row in rows:
+            scores = [(field, matches.get(row, 0.0)) for field, matches in fields]
+            total = sum(score for _, score in scores) / len(fields)
+            ranked.append((total, row, [field for field, score in scores if score > 0]))
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+
+        candidates = []
+        for score, row, matched_on in ranked[:limit]:
+            customer = self.store.customer_dict(row)
+            candidates.append(
+                {
+                    "customer_id": customer["id"],
+                    "name": customer["name"],
+                    "phone_last4": customer["phone"][-4:],
+                    "score": round(score, 2),
+                    "matched_on": matched_on,
+                }
+            )
+        return candidates
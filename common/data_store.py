@@ -0,0 +1,349 @@
+"""
+Compact columnar storage for the mock business data.
+
+Records are held as parallel `array` columns instead of one dict per row:
+repeated strings (names, emails, services, statuses, items) are interned
+into small integer codes, dates are integer seconds, and customer and order
+ids are implied by the row number. Rows are only turned back into dicts at
+the function response boundary via `customer_dict`, `appointment_dict` and
+`order_dict`.
+"""
+
+import itertools
+import threading
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+EPOCH = datetime(1970, 1, 1)
+_EPOCH_ORDINAL = EPOCH.toordinal()
+
+
+def to_timestamp(value):
+    """Convert a naive datetime (or ISO string) to integer seconds since EPOCH."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+    return (
+        (value.toordinal() - _EPOCH_ORDINAL) * 86400
+        + value.hour * 3600
+        + value.minute * 60
+        + value.second
+    )
+
+
+def from_timestamp(ts):
+    """Convert integer seconds since EPOCH back to a naive datetime."""
+    return EPOCH + timedelta(seconds=ts)
+
+
+def format_timestamp(ts):
+    return from_timestamp(ts).isoformat()
+
+
+class CategoryPool:
+    """Intern a categorical string column into small integer codes."""
+
+    __slots__ = ("values", "_codes")
+
+    def __init__(self, values=()):
+        self.values = []
+        self._codes = {}
+        for value in values:
+            self.code(value)
+
+    def code(self, value):
+        """Return the code for `value`, adding it to the pool if needed."""
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            self.values.append(value)
+        return code
+
+    def lookup(self, value):
+        """Return the code for `value` or None without adding it."""
+        return self._codes.get(value)
+
+    def __getitem__(self, code):
+        return self.values[code]
+
+    def __len__(self):
+        return len(self.values)
+
+
+class IdAllocator:
+    """Hand out unique, increasing integer ids without a lock."""
+
+    __slots__ = ("_counter",)
+
+    def __init__(self, start=0):
+        # next() on itertools.count is a single C call, so it is atomic under the GIL
+        self._counter = itertools.count(start)
+
+    def allocate(self):
+        return next(self._counter)
+
+
+class _GroupedRowIndex:
+    """Rows of a table grouped by an integer key column, as offsets into one flat array."""
+
+    __slots__ = ("offsets", "rows", "extra")
+
+    def __init__(self, key_column, key_count):
+        counts = array("I", bytes(4 * (key_count + 1)))
+        for key in key_column:
+            counts[key + 1] += 1
+        for i in range(1, key_count + 1):
+            counts[i] += counts[i - 1]
+        self.offsets = counts
+        rows = array("I", bytes(4 * len(key_column)))
+        cursor = array("I", counts[:-1])
+        for row, key in enumerate(key_column):
+            rows[cursor[key]] = row
+            cursor[key] += 1
+        self.rows = rows
+        # Rows appended after the index was built
+        self.extra = {}
+
+    def add(self, key, row):
+        self.extra.setdefault(key, []).append(row)
+
+    def get(self, key, limit=None):
+        if 0 <= key < len(self.offsets) - 1:
+            end = self.offsets[key + 1]
+            if limit is not None:
+                end = min(end, self.offsets[key] + limit)
+            found = list(self.rows[self.offsets[key] : end])
+        else:
+            found = []
+        found.extend(self.extra.get(key, ()))
+        return found if limit is None else found[:limit]
+
+
+class MockStore:
+    """Columnar customers, appointments and orders tables."""
+
+    def __init__(self):
+        self.names = CategoryPool()
+        self.emails = CategoryPool()
+        self.services = CategoryPool()
+        self.appointment_statuses = CategoryPool()
+        self.items = CategoryPool()
+        self.order_statuses = CategoryPool()
+
+        # Customers: row number is the numeric part of the CUSTnnnn id
+        self.customer_name = array("H")
+        self.customer_phone = array("q")  # E.164 digits without the leading '+'
+        self.customer_email = array("I")
+        self.customer_joined = array("q")
+
+        # Appointments: ids come from an allocator so concurrent bookings never collide
+        self.appointment_id = array("I")
+        self.appointment_ids = IdAllocator()
+        self.appointment_customer = array("I")
+        self.appointment_date = array("q")
+        self.appointment_service = array("H")
+        self.appointment_status = array("B")
+
+        # Orders: row number is the numeric part of the ORDnnnn id
+        self.order_customer = array("I")
+        self.order_date = array("q")
+        self.order_items = array("H")
+        self.order_item = array("H")
+        self.order_total = array("d")
+        self.order_status = array("B")
+
+        self.sample_data = []
+
+        # Keeps the columns of a table aligned while a row is appended, and lookup
+        # indexes in step with the rows (they are built and extended under it too)
+        self._append_lock = threading.Lock()
+
+        # Lookup indexes, built lazily on first use
+        self._phone_lookup = None  # (phones are sorted, row by phone when they are not)
+        self._email_rows = None
+        self._customers_by_name = None
+        self._customers_by_email = None
+        self._appointments_by_customer = None
+        self._orders_by_customer = None
+
+    @property
+    def customer_count(self):
+        return len(self.customer_name)
+
+    @property
+    def appointment_count(self):
+        return len(self.appointment_id)
+
+    @property
+    def order_count(self):
+        return len(self.order_customer)
+
+    # -- ids -------------------------------------------------------------
+
+    @staticmethod
+    def customer_id(row):
+        return f"CUST{row:04d}"
+
+    @staticmethod
+    def _parse_id(value, prefix):
+        """Return the row for an id like CUST0042, requiring the exact canonical spelling."""
+        if not value or not value.startswith(prefix):
+            return None
+        digits = value[len(prefix) :]
+        if not digits.isdigit():
+            return None
+        row = int(digits)
+        if f"{prefix}{row:04d}" != value:
+            return None
+        return row
+
+    def _index(self, attribute, build):
+        """
+        Return a lookup index, building it on first use. It is built under the
+        append lock and published whole, so a concurrent append is either in
+        the build or added to the finished index, never missed.
+        """
+        index = getattr(self, attribute)
+        if index is None:
+            with self._append_lock:
+                index = getattr(self, attribute)
+                if index is None:
+                    index = build()
+                    setattr(self, attribute, index)
+        return index
+
+    # -- customers -------------------------------------------------------
+
+    def find_customer_by_id(self, customer_id):
+        row = self._parse_id(customer_id, "CUST")
+        if row is None or row >= self.customer_count:
+            return None
+        return row
+
+    def find_customer_by_phone(self, phone):
+        if not phone or not phone.startswith("+") or not phone[1:].isdigit():
+            return None
+        number = int(phone[1:])
+        phones_sorted, phone_rows = self._index("_phone_lookup", self._build_phone_lookup)
+        if phones_sorted:
+            row = bisect_left(self.customer_phone, number)
+            if row < self.customer_count and self.customer_phone[row] == number:
+                return row
+            return None
+        return phone_rows.get(number)
+
+    def _build_phone_lookup(self):
+        phones = self.customer_phone
+        if all(phones[i] < phones[i + 1] for i in range(len(phones) - 1)):
+            return True, None
+        rows = {}
+        for row, value in enumerate(phones):
+            rows.setdefault(value, row)
+        return False, rows
+
+    def find_customer_by_email(self, email):
+        code = self.emails.lookup(email)
+        if code is None:
+            return None
+        return self._index("_email_rows", self._build_email_rows).get(code)
+
+    def _build_email_rows(self):
+        rows = {}
+        for row, value in enumerate(self.customer_email):
+            rows.setdefault(value, row)
+        return rows
+
+    def customer_rows_for_name(self, name_code, limit=None):
+        """Customer rows sharing an interned name."""
+        index = self._index("_customers_by_name", lambda: _GroupedRowIndex(self.customer_name, len(self.names)))
+        return index.get(name_code, limit)
+
+    def customer_rows_for_email(self, email_code, limit=None):
+        """Customer rows sharing an interned email address."""
+        index = self._index("_customers_by_email", lambda: _GroupedRowIndex(self.customer_email, len(self.emails)))
+        return index.get(email_code, limit)
+
+    def customer_dict(self, row):
+        return {
+            "id": self.customer_id(row),
+            "name": self.names[self.customer_name[row]],
+            "phone": f"+{self.customer_phone[row]}",
+            "email": self.emails[self.customer_email[row]],
+            "joined_date": format_timestamp(self.customer_joined[row]),
+        }
+
+    # -- appointments ----------------------------------------------------
+
+    def appointment_rows_for(self, customer_row):
+        index = self._index(
+            "_appointments_by_customer", lambda: _GroupedRowIndex(self.appointment_customer, self.customer_count)
+        )
+        return index.get(customer_row)
+
+    def add_appointment(self, customer_row, when, service, status="Scheduled"):
+        """Append an appointment with a freshly allocated id and return its row."""
+        appointment_id = self.appointment_ids.allocate()
+        timestamp = to_timestamp(when)
+        with self._append_lock:
+            self.appointment_id.append(appointment_id)
+            self.appointment_customer.append(customer_row)
+            self.appointment_date.append(timestamp)
+            self.appointment_service.append(self.services.code(service))
+            self.appointment_status.append(self.appointment_statuses.code(status))
+            row = len(self.appointment_id) - 1
+            if self._appointments_by_customer is not None:
+                self._appointments_by_customer.add(customer_row, row)
+        return row
+
+    def booked_appointment_times(self):
+        """Yield the datetimes of appointments that still occupy a slot (not cancelled)."""
+        cancelled = self.appointment_statuses.lookup("Cancelled")
+        for ts, status in zip(self.appointment_date, self.appointment_status):
+            if status != cancelled:
+                yield from_timestamp(ts)
+
+    def appointment_dict(self, row):
+        customer = self.appointment_customer[row]
+        return {
+            "id": f"APT{self.appointment_id[row]:04d}",
+            "customer_id": self.customer_id(customer),
+            "customer_name": self.names[self.customer_name[customer]],
+            "date": format_timestamp(self.appointment_date[row]),
+            "service": self.services[self.appointment_service[row]],
+            "status": self.appointment_statuses[self.appointment_status[row]],
+        }
+
+    # -- orders ----------------------------------------------------------
+
+    def order_rows_for(self, customer_row):
+        index = self._index(
+            "_orders_by_customer", lambda: _GroupedRowIndex(self.order_customer, self.customer_count)
+        )
+        return index.get(customer_row)
+
+    def order_dict(self, row):
+        customer = self.order_customer[row]
+        return {
+            "id": f"ORD{row:04d}",
+            "customer_id": self.customer_id(customer),
+            "customer_name": self.names[self.customer_name[customer]],
+            "date": format_timestamp(self.order_date[row]),
+            "items": self.order_items[row],
+            "item_name": self.items[self.order_item[row]],
+            "total": self.order_total[row],
+            "status": self.order_statuses[self.order_status[row]],
+        }
+
+    # -- export ----------------------------------------------------------
+
+    def to_dict(self):
+        """Materialize every table as lists of dicts (for JSON snapshots)."""
+        return {
+            "customers": [self.customer_dict(row) for row in range(self.customer_count)],
+            "appointments": [
+                self.appointment_dict(row) for row in range(self.appointment_count)
+            ],
+            "orders": [self.order_dict(row) for row in range(self.order_count)],
+            "sample_data": self.sample_data,
+        }
@@ -0,0 +1,283 @@
+"""
+Local natural language date and time parser for booking phrases.
+
+Handles the phrases callers actually use: "today", "tomorrow morning",
+"day after tomorrow", "next Tuesday at 3pm", "this weekend", "in two weeks",
+"March 14th", "the 14th", "3/14", "2025-03-14", "half past two", "noon".
+The grammar is compiled once at import, and results are memoized in an LRU
+cache keyed by the phrase and the reference day, so repeated
+phrases within a day cost a dictionary lookup. Phrases that contain no date
+are reported as unparsed instead of silently defaulting to tomorrow.
+"""
+
+import re
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+ParsedPhrase = namedtuple("ParsedPhrase", ["date", "time", "part_of_day"])
+
+_UNITS = [
+    "", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine",
+    "ten", "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen",
+    "seventeen", "eighteen", "nineteen",
+]
+_UNIT_ORDINALS = [
+    "", "first", "second", "third", "fourth", "fifth", "sixth", "seventh", "eighth",
+    "ninth", "tenth", "eleventh", "twelfth", "thirteenth", "fourteenth", "fifteenth",
+    "sixteenth", "seventeenth", "eighteenth", "nineteenth",
+]
+
+
+def _build_ordinals():
+    ordinals = {word: n for n, word in enumerate(_UNIT_ORDINALS) if word}
+    ordinals.update({"twentieth": 20, "thirtieth": 30})
+    for n in range(1, 10):
+        ordinals[f"twenty {_UNIT_ORDINALS[n]}"] = 20 + n
+    ordinals["thirty first"] = 31
+    return ordinals
+
+
+_ORDINAL_WORDS = _build_ordinals()
+_NUMBER_WORDS = {word: n for n, word in enumerate(_UNITS) if word}
+_NUMBER_WORDS.update({"twenty": 20, "thirty": 30})
+
+_MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+_WEEKDAYS = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
+_PARTS_OF_DAY = {
+    "morning": "morning", "afternoon": "afternoon", "evening": "evening",
+    "tonight": "evening", "night": "evening",
+}
+
+
+def _alternation(words):
+    return "|".join(sorted((re.escape(w) for w in words), key=len, reverse=True))
+
+
+_ORDINAL_WORD_RE = re.compile(rf"\b({_alternation(_ORDINAL_WORDS)})\b")
+_NUMBER_WORD_RE = re.compile(rf"\b({_alternation(_NUMBER_WORDS)})\b")
+_CLEAN_RE = re.compile(r"[^a-z0-9:/\- ]+")
+_SPACE_RE = re.compile(r"\s+")
+
+_MONTH = r"(jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*"
+_DAY = r"(\d{1,2})(?:st|nd|rd|th)?"
+_WEEKDAY = r"(mon|tue|tues|wed|wednes|thu|thur|thurs|fri|sat|satur|sun)(?:day)?"
+
+# Date rules, tried in order; each is (compiled pattern, resolver)
+_ISO_RE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+_SLASH_RE = re.compile(r"\b(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?\b")
+_MONTH_DAY_RE = re.compile(rf"\b{_MONTH}\s+(?:the\s+)?{_DAY}\b")
+_DAY_MONTH_RE = re.compile(rf"\b(?:the\s+)?{_DAY}\s+(?:of\s+)?{_MONTH}\b")
+_DAY_AFTER_TOMORROW_RE = re.compile(r"\bday after tomorrow\b")
+_TOMORROW_RE = re.compile(r"\b(tomorrow|tmrw|next day)\b")
+_TODAY_RE = re.compile(r"\b(today|tonight|this (?:morning|afternoon|evening)|right now|now)\b")
+_RELATIVE_RE = re.compile(
+    r"\b(?:in\s+)?(a|an|\d+|a couple of|couple of|a few|few)\s+(day|week|month)s?"
+    r"(?:\s+(?:from (?:now|today)|later|out))?\b"
+)
+_NEXT_WEEK_WEEKDAY_RE = re.compile(rf"\bnext week(?:\s+on)?\s+{_WEEKDAY}\b|\b{_WEEKDAY}\s+(?:of\s+)?next week\b")
+_WEEKDAY_RE = re.compile(rf"\b(?:(this|next|coming|upcoming)\s+)?{_WEEKDAY}\b")
+_WEEKEND_RE = re.compile(r"\b(?:(this|next|coming)\s+)?weekend\b")
+_WEEK_RE = re.compile(r"\b(this|next)\s+week\b")
+_DAY_OF_MONTH_RE = re.compile(r"\b(?:the|on)\s+(\d{1,2})(?:st|nd|rd|th)\b")
+
+# Time rules
+_MERIDIEM_TIME_RE = re.compile(r"\b(\d{1,2})(?::(\d{2}))?\s*(a\s?m|p\s?m)\b")
+_CLOCK_TIME_RE = re.compile(r"\b(\d{1,2}):(\d{2})\b")
+_AT_HOUR_RE = re.compile(r"\b(?:at|around|about|by)\s+(\d{1,2})\b(?!\s*(?:st|nd|rd|th|day|week|month))")
+_PAST_TO_RE = re.compile(r"\b(half|quarter)\s+(past|after|to)\s+(\d{1,2})\b")
+_NOON_RE = re.compile(r"\b(noon|midday|lunchtime|lunch time)\b")
+_PART_OF_DAY_RE = re.compile(r"\b(morning|afternoon|evening|tonight|night)\b")
+
+
+def _normalize(phrase):
+    phrase = phrase.lower().replace("-", " ") if not _ISO_RE.search(phrase) else phrase.lower()
+    phrase = phrase.replace(".", "")
+    phrase = _CLEAN_RE.sub(" ", phrase)
+    phrase = _SPACE_RE.sub(" ", phrase).strip()
+    phrase = _ORDINAL_WORD_RE.sub(lambda m: f"{_ORDINAL_WORDS[m.group(1)]}th", phrase)
+    return _NUMBER_WORD_RE.sub(lambda m: str(_NUMBER_WORDS[m.group(1)]), phrase)
+
+
+def _weekday_number(token):
+    return _WEEKDAYS[token[:3]]
+
+
+def _upcoming_weekday(today, weekday, next_prefix):
+    days_ahead = weekday - today.weekday()
+    if days_ahead <= 0 or next_prefix:
+        days_ahead += 7  # Next occurrence
+    return today + timedelta(days=days_ahead)
+
+
+def _month_day(today, month, day, year=None):
+    """Date for month/day, rolling to next year when no year is given and it has passed."""
+    try:
+        if year is not None:
+            return date(year, month, day)
+        candidate = date(today.year, month, day)
+        if candidate < today:
+            candidate = date(today.year + 1, month, day)
+        return candidate
+    except ValueError:
+        return None
+
+
+def _relative_amount(token):
+    if token.isdigit():
+        return int(token)
+    if "couple" in token:
+        return 2
+    if "few" in token:
+        return 3
+    return 1
+
+
+def _match_date(text, today):
+    """Return (date, span) for the first date rule that matches, or (None, None)."""
+    m = _ISO_RE.search(text)
+    if m:
+        try:
+            return date(int(m.group(1)), int(m.group(2)), int(m.group(3))), m.span()
+        except ValueError:
+            return None, None
+    m = _SLASH_RE.search(text)
+    if m:
+        year = m.group(3)
+        if year is not None:
+            year = int(year) + (2000 if len(year) == 2 else 0)
+        return _month_day(today, int(m.group(1)), int(m.group(2)), year), m.span()
+    m = _MONTH_DAY_RE.search(text)
+    if m:
+        return _month_day(today, _MONTHS[m.group(1)[:3]], int(m.group(2))), m.span()
+    m = _DAY_MONTH_RE.search(text)
+    if m:
+        return _month_day(today, _MONTHS[m.group(2)[:3]], int(m.group(1))), m.span()
+    m = _DAY_AFTER_TOMORROW_RE.search(text)
+    if m:
+        return today + timedelta(days=2), m.span()
+    m = _TOMORROW_RE.search(text)
+    if m:
+        return today + timedelta(days=1), m.span()
+    m = _RELATIVE_RE.search(text)
+    if m:
+        amount = _relative_amount(m.group(1))
+        unit = m.group(2)
+        days = amount * {"day": 1, "week": 7, "month": 30}[unit]
+        return today + timedelta(days=days), m.span()
+    m = _NEXT_WEEK_WEEKDAY_RE.search(text)
+    if m:
+        weekday = _weekday_number(m.group(1) or m.group(2))
+        next_monday = today + timedelta(days=7 - today.weekday())
+        return next_monday + timedelta(days=weekday), m.span()
+    m = _WEEKDAY_RE.search(text)
+    if m:
+        return _upcoming_weekday(today, _weekday_number(m.group(2)), m.group(1) == "next"), m.span()
+    m = _WEEKEND_RE.search(text)
+    if m:
+        saturday = today + timedelta(days=(5 - today.weekday()) % 7)
+        if m.group(1) == "next":
+            saturday += timedelta(days=7)
+        return saturday, m.span()
+    m = _WEEK_RE.search(text)
+    if m:
+        return today + timedelta(days=7 if m.group(1) == "next" else 0), m.span()
+    m = _DAY_OF_MONTH_RE.search(text)
+    if m:
+        day = int(m.group(1))
+        month, year = today.month, today.year
+        for _ in range(3):
+            try:
+                candidate = date(year, month, day)
+                if candidate >= today:
+                    return candidate, m.span()
+            except ValueError:
+                pass
+            month, year = (1, year + 1) if month == 12 else (month + 1, year)
+        return None, m.span()
+    m = _TODAY_RE.search(text)
+    if m:
+        return today, m.span()
+    return None, None
+
+
+def _clinic_hour(hour):
+    """Read a bare hour ("at 3") as clinic hours: 1-7 are afternoon/evening."""
+    return hour + 12 if 1 <= hour <= 7 else hour
+
+
+def _match_time(text):
+    """Return 'HH:MM' for the first time expression, or None."""
+    m = _PAST_TO_RE.search(text)
+    if m:
+        minutes = 30 if m.group(1) == "half" else 15
+        hour = _clinic_hour(int(m.group(3)))
+        total = hour * 60 + (minutes if m.group(2) != "to" else -minutes)
+        return f"{total // 60:02d}:{total % 60:02d}"
+    m = _MERIDIEM_TIME_RE.search(text)
+    if m:
+        hour = int(m.group(1)) % 12
+        if m.group(3).startswith("p"):
+            hour += 12
+        return f"{hour:02d}:{int(m.group(2) or 0):02d}"
+    m = _CLOCK_TIME_RE.search(text)
+    if m:
+        hour, minute = int(m.group(1)), int(m.group(2))
+        if hour < 12 and "morning" not in text:
+            hour = _clinic_hour(hour)
+        if hour < 24 and minute < 60:
+            return f"{hour:02d}:{minute:02d}"
+    if _NOON_RE.search(text):
+        return "12:00"
+    m = _AT_HOUR_RE.search(text)
+    if m:
+        hour = int(m.group(1))
+        if hour <= 12:
+            hour = hour if "morning" in text else _clinic_hour(hour)
+            return f"{hour:02d}:00"
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _parse(phrase, reference_ordinal):
+    today = date.fromordinal(reference_ordinal)
+    text = _normalize(phrase)
+    found, span = _match_date(text, today)
+    remainder = text if span is None else text[: span[0]] + " " + text[span[1] :]
+    time = _match_time(remainder)
+    part = _PART_OF_DAY_RE.search(text)
+    part_of_day = _PARTS_OF_DAY[part.group(1)] if part else None
+    if found is None and span is None and (time or part_of_day):
+        # "at 3pm" or "this evening" with no day means today
+        found = today
+    return ParsedPhrase(found, time, part_of_day)
+
+
+def parse_date_phrase(phrase, reference=None):
+    """
+    Parse a natural language date/time phrase relative to `reference`
+    (a date, datetime or ISO string; defaults to today in clinic time,
+    as does an unreadable string).
+    Returns a ParsedPhrase whose `date` is None when no date was recognized.
+    """
+    if isinstance(reference, str):
+        try:
+            reference = datetime.fromisoformat(reference.replace("Z", "+00:00")).date()
+        except ValueError:
+            reference = None
+    if reference is None:
+        reference = date.today()
+    elif isinstance(reference, datetime):
+        reference = reference.date()
+    return _parse(phrase, reference.toordinal())
+
+
+def cache_info():
+    return _parse.cache_info()
+
+
+def cache_clear():
+    _parse.cache_clear()
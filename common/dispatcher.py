@@ -0,0 +1,173 @@
+"""
+Per-session dispatch of function calls to FUNCTION_MAP handlers.
+
+The dispatcher is the single path from a FunctionCallRequest to a handler:
+arguments are normalized and validated locally, then served from the
+session cache or passed to the handler. While a handler runs, the
+dispatcher masks its latency: if the function is predicted (from a moving
+latency estimate) or observed to take longer than LATENCY_FILLER's
+threshold, it injects a filler message itself instead of relying on the
+LLM to call agent_filler. Handlers run inline or on a worker pool as set by
+FUNCTION_EXECUTION (see common/executor.py). Sessions dispatch through the
+BackendRouter (common/backend_router.py), which picks each function's
+backend per call. While a handler runs, CURRENT_TRACE names the session's
+latency trace, turn and function, so webhook requests it makes carry trace
+headers and are recorded under that turn (see common/tracing.py). Cached
+results are kept per backend, so a function moved to another backend with
+`assign()` is not answered from the old backend's results.
+"""
+
+import asyncio
+import logging
+import time
+
+from common.agent_functions import FUNCTION_MAP
+from common.argument_validation import ARGUMENT_VALIDATORS
+from common.config import LATENCY_FILLER
+from common.executor import FUNCTION_EXECUTOR
+from common.session_cache import SessionCache
+from common.tracing import CURRENT_TRACE, TraceContext
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyEstimator:
+    """Exponentially weighted moving average of execution time per function."""
+
+    def __init__(self, smoothing=LATENCY_FILLER["smoothing"]):
+        self.smoothing = smoothing
+        self._estimates = {}
+        self._samples = {}
+
+    def observe(self, function_name, seconds):
+        previous = self._estimates.get(function_name)
+        if previous is None:
+            self._estimates[function_name] = seconds
+        else:
+            self._estimates[function_name] = previous + self.smoothing * (seconds - previous)
+        self._samples[function_name] = self._samples.get(function_name, 0) + 1
+
+    def predict(self, function_name):
+        """Expected execution time in seconds (0 for functions never seen)."""
+        return self._estimates.get(function_name, 0.0)
+
+    def stats(self):
+        return {
+            name: {"estimate_s": estimate, "samples": self._samples[name]}
+            for name, estimate in self._estimates.items()
+        }
+
+
+class FunctionDispatcher:
+    """Runs FUNCTION_MAP handlers for one voice agent session."""
+
+    def __init__(
+        self,
+        function_map=None,
+        validators=ARGUMENT_VALIDATORS,
+        inject_message=None,
+        executor=FUNCTION_EXECUTOR,
+        trace=None,
+    ):
+        """
+        inject_message: coroutine function taking an InjectAgentMessage dict,
+        used to speak fillers. Without it no fillers are injected.
+        trace: the session's SessionTrace; function runs and their webhook
+        requests are recorded under its current turn.
+        """
+        self.function_map = FUNCTION_MAP if function_map is None else function_map
+        self.trace = trace
+        self.validators = validators
+        self.executor = executor
+        self.cache = SessionCache()
+        self.latency = LatencyEstimator()
+        self.inject_message = inject_message
+        self._last_filler = float("-inf")
+        self._fillers = {"predicted": 0, "observed": 0}
+
+    def note_filler(self):
+        """Record a filler spoken by other means (e.g. the LLM calling agent_filler)."""
+        self._last_filler = time.monotonic()
+
+    async def _inject_filler(self, function_name, reason):
+        if time.monotonic() - self._last_filler < LATENCY_FILLER["cooldown"]:
+            return
+        kind = LATENCY_FILLER["function_messages"].get(function_name, "default")
+        message = {"type": "InjectAgentMessage", "message": LATENCY_FILLER["messages"][kind]}
+        self.note_filler()
+        self._fillers[reason] += 1
+        logger.info(f"Latency filler ({reason}) for {function_name}")
+        try:
+            await self.inject_message(message)
+        except Exception as e:
+            logger.error(f"Error injecting filler: {e}")
+
+    async def _run(self, function_name, func, params):
+        """Run a handler (cache miss), masking it with a filler if it is or becomes slow."""
+        start = time.perf_counter()
+        task = asyncio.ensure_future(self.executor.run(function_name, func, params))
+        try:
+            if self.inject_message and LATENCY_FILLER["enable"]:
+                threshold = LATENCY_FILLER["threshold"]
+                if self.latency.predict(function_name) >= threshold:
+                    await self._inject_filler(function_name, "predicted")
+                else:
+                    done, _ = await asyncio.wait({task}, timeout=threshold)
+                    if not done:
+                        await self._inject_filler(function_name, "observed")
+            return await task
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            if task.done() and not task.cancelled():
+                seconds = time.perf_counter() - start
+                self.latency.observe(function_name, seconds)
+                context = CURRENT_TRACE.get()
+                if context is not None and context.trace is self.trace:
+                    self.trace.record_function(context, seconds)
+                # A BackendRouter function map keeps latency per backend
+                observe = getattr(self.function_map, "observe", None)
+                if observe:
+                    failed = task.exception() is not None or (
+                        isinstance(task.result(), dict) and "error" in task.result()
+                    )
+                    observe(func, seconds, failed)
+
+    async def dispatch(self, function_name, parameters):
+        """Validate the arguments and return the handler's result."""
+        func = self.function_map.get(function_name)
+        if not func:
+            raise ValueError(f"Function {function_name} not found")
+
+        validation = self.validators.validate(function_name, parameters)
+        if validation.errors:
+            logger.info(f"Arguments rejected for {function_name}: {validation.errors}")
+            return validation.error_response(function_name)
+        if validation.corrections:
+            logger.info(f"Arguments corrected for {function_name}: {validation.corrections}")
+
+        token = None
+        if self.trace is not None:
+            token = CURRENT_TRACE.set(TraceContext(self.trace, self.trace.turn, function_name))
+        try:
+            return await self.cache.call(
+                function_name,
+                validation.params,
+                lambda params: self._run(function_name, func, params),
+                # A BackendRouter handler names the backend it resolved to
+                scope=getattr(func, "backend", None),
+            )
+        finally:
+            if token is not None:
+                CURRENT_TRACE.reset(token)
+
+    def stats(self):
+        return {
+            "function_cache": self.cache.stats(),
+            "argument_validation": self.validators.stats(),
+            "latency_estimates": self.latency.stats(),
+            "latency_fillers": dict(self._fillers),
+            "execution": self.executor.stats(),
+            "latency_trace": self.trace.snapshot() if self.trace is not None else {},
+        }
@@ -0,0 +1,138 @@
+"""
+Execution of FUNCTION_MAP handlers inline, on a thread pool or on a process pool.
+
+Handlers are coroutine functions. Inline handlers are awaited on the session's
+event loop as before; thread and process handlers are run to completion with
+asyncio.run in a pool worker, so a long availability scan or order aggregation
+no longer blocks audio forwarding on the session loop. The mode per function
+comes from FUNCTION_EXECUTION in config.py (inline unless a function opts in,
+since a pool hop costs more than the mock handlers themselves). Pools are
+created on first use and shared by all sessions; queue metrics are kept per
+mode.
+"""
+
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from common.config import FUNCTION_EXECUTION
+from common.latency import CURRENT_FUNCTION
+
+MODES = ("inline", "thread", "process")
+
+
+def _run_handler(function_name, func, params):
+    """Pool worker entry point: run one handler and report when it started."""
+    started = time.time()
+    CURRENT_FUNCTION.set(function_name)
+    return started, asyncio.run(func(params))
+
+
+class FunctionExecutor:
+    """Runs handlers according to a per-function execution policy."""
+
+    def __init__(self, policy=FUNCTION_EXECUTION):
+        self.policy = policy
+        self._pools = {}
+        self._pool_lock = threading.Lock()
+        self._stats = {
+            mode: {
+                "submitted": 0,
+                "completed": 0,
+                "failed": 0,
+                "in_flight": 0,
+                "max_in_flight": 0,
+                "queue_wait_s": 0.0,
+                "max_queue_wait_s": 0.0,
+                "run_s": 0.0,
+            }
+            for mode in MODES
+        }
+
+    def mode_for(self, function_name):
+        mode = self.policy["functions"].get(function_name, self.policy["default"])
+        if mode not in MODES:
+            raise ValueError(f"Unknown execution mode {mode!r} for {function_name}")
+        return mode
+
+    def _pool(self, mode):
+        pool = self._pools.get(mode)
+        if pool is None:
+            with self._pool_lock:
+                pool = self._pools.get(mode)
+                if pool is None:
+                    workers = self.policy["pools"][mode]["max_workers"]
+                    if mode == "thread":
+                        pool = ThreadPoolExecutor(workers, thread_name_prefix="function")
+                    else:
+                        # spawn: workers never inherit the parent's locks or sockets
+                        pool = ProcessPoolExecutor(
+                            workers, mp_context=multiprocessing.get_context("spawn")
+                        )
+                    self._pools[mode] = pool
+        return pool
+
+    async def run(self, function_name, func, params):
+        """Run `func(params)` in the mode configured for `function_name` and return its result."""
+        mode = self.mode_for(function_name)
+        stats = self._stats[mode]
+        stats["submitted"] += 1
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        submitted = time.time()
+        token = CURRENT_FUNCTION.set(function_name)
+        try:
+            if mode == "inline":
+                result = await func(params)
+                started = submitted
+            else:
+                loop = asyncio.get_running_loop()
+                call = functools.partial(_run_handler, function_name, func, params)
+                if mode == "thread":
+                    # Carry the caller's context vars (e.g. the latency trace) into the worker
+                    call = functools.partial(contextvars.copy_context().run, call)
+                started, result = await loop.run_in_executor(self._pool(mode), call)
+        except BaseException:
+            stats["failed"] += 1
+            raise
+        else:
+            stats["completed"] += 1
+            wait = max(0.0, started - submitted)
+            stats["queue_wait_s"] += wait
+            stats["max_queue_wait_s"] = max(stats["max_queue_wait_s"], wait)
+            stats["run_s"] += time.time() - started
+            return result
+        finally:
+            stats["in_flight"] -= 1
+            CURRENT_FUNCTION.reset(token)
+
+    def stats(self):
+        """Per-mode counters; `queued` estimates calls waiting for a free worker."""
+        report = {}
+        for mode, stats in self._stats.items():
+            if not stats["submitted"]:
+                continue
+            entry = dict(stats)
+            done = stats["completed"] or 1
+            entry["avg_queue_wait_s"] = stats["queue_wait_s"] / done
+            entry["avg_run_s"] = stats["run_s"] / done
+            if mode != "inline":
+                workers = self.policy["pools"][mode]["max_workers"]
+                entry["max_workers"] = workers
+                entry["queued"] = max(0, stats["in_flight"] - workers)
+            report[mode] = entry
+        return report
+
+    def shutdown(self, wait=True):
+        with self._pool_lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.shutdown(wait=wait)
+
+
+# Shared by every session so pool sizes bound the whole process
+FUNCTION_EXECUTOR = FunctionExecutor()
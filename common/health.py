@@ -0,0 +1,151 @@
+"""
+Background health probing and rolling scores for external backends.
+
+Backends register a probe (a coroutine function returning True when the
+backend answered). HealthMonitor runs every probe concurrently, so a round
+takes as long as the slowest probe rather than the sum of all timeouts, and
+repeats the round every `interval` seconds on its own thread and event loop.
+Each backend keeps a rolling availability (share of successful probes in the
+last `window` rounds) and a moving average of probe latency, combined into a
+score between 0 and 1. The dispatcher and the backend router read
+`degraded()` to route around a backend before a caller waits on it.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+
+from common.config import HEALTH_CHECKS
+
+logger = logging.getLogger(__name__)
+
+
+class BackendHealth:
+    """Rolling probe results for one backend."""
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.results = deque(maxlen=settings["window"])
+        self.latency = None
+        self.last_checked = None
+        self.last_error = None
+
+    def record(self, ok, seconds, error=None):
+        self.results.append(ok)
+        self.last_checked = time.time()
+        self.last_error = error
+        if ok:
+            if self.latency is None:
+                self.latency = seconds
+            else:
+                self.latency += self.settings["smoothing"] * (seconds - self.latency)
+
+    def availability(self):
+        return sum(self.results) / len(self.results) if self.results else None
+
+    def score(self):
+        """Availability scaled down by latency above `slow_seconds`; None until first probed."""
+        availability = self.availability()
+        if availability is None:
+            return None
+        if self.latency is None or self.latency <= self.settings["slow_seconds"]:
+            return availability
+        return availability * self.settings["slow_seconds"] / self.latency
+
+    def degraded(self):
+        if len(self.results) < self.settings["min_samples"]:
+            return False
+        return self.score() < self.settings["degraded_below"]
+
+    def stats(self):
+        return {
+            "score": self.score(),
+            "availability": self.availability(),
+            "latency_ms": self.latency * 1e3 if self.latency is not None else None,
+            "probes": len(self.results),
+            "degraded": self.degraded(),
+            "last_checked": self.last_checked,
+            "last_error": self.last_error,
+        }
+
+
+class HealthMonitor:
+    def __init__(self, settings=HEALTH_CHECKS):
+        self.settings = settings
+        self._probes = {}
+        self._health = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._loop = None  # the probing thread's event loop, once it runs
+        self._stop = None  # asyncio.Event on that loop
+
+    def register(self, name, probe):
+        """Add a backend; `probe()` returns True if it is up, or (False, reason)."""
+        with self._lock:
+            self._probes[name] = probe
+            self._health.setdefault(name, BackendHealth(self.settings))
+
+    async def _probe(self, name, probe):
+        start = time.perf_counter()
+        try:
+            outcome = await asyncio.wait_for(probe(), self.settings["probe_timeout"])
+        except asyncio.TimeoutError:
+            outcome = (False, "probe timed out")
+        except Exception as e:
+            outcome = (False, str(e))
+        seconds = time.perf_counter() - start
+        ok, error = (outcome, None) if isinstance(outcome, bool) else outcome
+        self._health[name].record(ok, seconds, error)
+        return name, {"ok": ok, "latency_ms": seconds * 1e3, "error": error}
+
+    async def probe_all(self):
+        """Probe every backend concurrently; return {name: {"ok", "latency_ms", "error"}}."""
+        with self._lock:
+            probes = list(self._probes.items())
+        return dict(await asyncio.gather(*(self._probe(name, probe) for name, probe in probes)))
+
+    def degraded(self, name):
+        health = self._health.get(name)
+        return health is not None and health.degraded()
+
+    def scores(self):
+        with self._lock:
+            backends = list(self._health.items())
+        return {name: health.stats() for name, health in backends}
+
+    async def _run(self):
+        stop = self._stop = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        while not stop.is_set():
+            try:
+                await self.probe_all()
+            except Exception as e:
+                logger.error(f"Health probe round failed: {e}")
+            try:
+                await asyncio.wait_for(stop.wait(), self.settings["interval"])
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        """Start background probing (idempotent)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=asyncio.run, args=(self._run(),), name="health", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop probing after the current round, from any thread."""
+        loop, stop = self._loop, self._stop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(stop.set)
+        except RuntimeError:
+            pass  # already finished
+
+
+# Shared by webhook_functions (which registers its endpoints), the dispatcher, the router and /health
+HEALTH_MONITOR = HealthMonitor()
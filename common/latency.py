@@ -0,0 +1,140 @@
+"""
+Seeded latency and fault injection for simulated backends.
+
+simulate_delay (business logic) and call_webhook (per endpoint) ask the
+shared LatencyModel for a delay before doing their work. Profiles from
+LATENCY_PROFILES in config.py give a constant, lognormal or empirical
+(percentile table) delay, plus occasional timeouts and errors, per backend
+and per FUNCTION_MAP function. Every (backend, function) pair draws from
+its own seeded random stream, so a benchmark replays the same tail-latency
+sequence regardless of how calls from different functions interleave.
+"""
+
+import asyncio
+import contextvars
+import math
+import random
+import threading
+from bisect import bisect_right
+
+from common.config import ARTIFICIAL_DELAY, LATENCY_PROFILES
+
+# FUNCTION_MAP function currently executing, set by the executor
+CURRENT_FUNCTION = contextvars.ContextVar("current_function", default=None)
+
+
+class InjectedError(RuntimeError):
+    """A simulated backend failure."""
+
+
+class InjectedTimeout(asyncio.TimeoutError):
+    """A simulated backend timeout."""
+
+
+class _Profile:
+    """One compiled latency profile with its own random stream."""
+
+    def __init__(self, spec, rng):
+        self.rng = rng
+        self.distribution = spec.get("distribution", "constant")
+        self.timeout_rate = spec.get("timeout_rate", 0.0)
+        self.timeout = spec.get("timeout")
+        self.error_rate = spec.get("error_rate", 0.0)
+        if self.distribution == "constant":
+            self.value = spec.get("value", 0.0)
+        elif self.distribution == "lognormal":
+            self.mu = math.log(spec["median"])
+            self.sigma = spec.get("sigma", 0.5)
+            self.max = spec.get("max")
+        elif self.distribution == "empirical":
+            points = sorted((float(p), float(s)) for p, s in spec["percentiles"].items())
+            if points[0][0] > 0:
+                points.insert(0, (0.0, points[0][1]))
+            self.percentiles = [p for p, _ in points]
+            self.seconds = [s for _, s in points]
+        else:
+            raise ValueError(f"Unknown latency distribution {self.distribution!r}")
+
+    def delay(self):
+        if self.distribution == "constant":
+            return self.value
+        if self.distribution == "lognormal":
+            delay = self.rng.lognormvariate(self.mu, self.sigma)
+            return min(delay, self.max) if self.max is not None else delay
+        # Inverse CDF of the percentile table, linear between points
+        u = self.rng.random() * 100
+        i = bisect_right(self.percentiles, u)
+        if i >= len(self.percentiles):
+            return self.seconds[-1]
+        p0, p1 = self.percentiles[i - 1], self.percentiles[i]
+        s0, s1 = self.seconds[i - 1], self.seconds[i]
+        return s0 + (s1 - s0) * (u - p0) / (p1 - p0)
+
+    def sample(self):
+        """Return (delay seconds, fault) where fault is None, "timeout" or "error"."""
+        roll = self.rng.random() if (self.timeout_rate or self.error_rate) else 1.0
+        if roll < self.timeout_rate:
+            return None, "timeout"
+        delay = self.delay()
+        if roll < self.timeout_rate + self.error_rate:
+            return delay, "error"
+        return delay, None
+
+
+class LatencyModel:
+    """Resolves and samples the latency profile for a backend call."""
+
+    def __init__(self, profiles=LATENCY_PROFILES, fallback=ARTIFICIAL_DELAY):
+        self.profiles = profiles
+        self.fallback = fallback
+        self._compiled = {}
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _profile(self, backend, function_name):
+        key = (backend, function_name)
+        profile = self._compiled.get(key)
+        if profile is None:
+            spec = self.profiles["functions"].get(function_name) or self.profiles["backends"].get(
+                backend, {"distribution": "constant", "value": self.fallback.get(backend, 0.0)}
+            )
+            seed = self.profiles.get("seed")
+            rng = random.Random(None if seed is None else f"{seed}:{backend}:{function_name}")
+            with self._lock:
+                profile = self._compiled.setdefault(key, _Profile(spec, rng))
+        return profile
+
+    async def apply(self, backend, function_name=None, default_timeout=10.0):
+        """
+        Sleep for a sampled delay, then raise InjectedTimeout or InjectedError
+        if the sample is a fault. function_name defaults to the running function.
+        """
+        if function_name is None:
+            function_name = CURRENT_FUNCTION.get()
+        profile = self._profile(backend, function_name)
+        delay, fault = profile.sample()
+        stats = self._stats.setdefault(backend, {"calls": 0, "delay_s": 0.0, "timeouts": 0, "errors": 0})
+        stats["calls"] += 1
+        if fault == "timeout":
+            stats["timeouts"] += 1
+            timeout = profile.timeout if profile.timeout is not None else default_timeout
+            await asyncio.sleep(timeout)
+            raise InjectedTimeout(f"{backend} timed out after {timeout}s (injected)")
+        stats["delay_s"] += delay
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if fault == "error":
+            stats["errors"] += 1
+            raise InjectedError(f"{backend} failed (injected)")
+
+    def reset(self):
+        """Restart every random stream from its seed and clear the counters."""
+        with self._lock:
+            self._compiled = {}
+        self._stats = {}
+
+    def stats(self):
+        return {backend: dict(stats) for backend, stats in self._stats.items()}
+
+
+LATENCY_MODEL = LatencyModel()
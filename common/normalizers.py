@@ -0,0 +1,129 @@
+"""
+Normalization of customer identifiers as they arrive from speech-to-text.
+
+Callers read phone numbers digit by digit or in pairs ("forty two"), spell
+emails out with "dot" and "at", and give customer ids as bare numbers. These helpers turn those forms
+into the canonical values stored in the business data.
+"""
+
+import re
+
+_DIGIT_WORDS = {
+    "zero": "0", "oh": "0", "o": "0",
+    "one": "1", "two": "2", "to": "2", "too": "2", "three": "3",
+    "four": "4", "for": "4", "five": "5", "six": "6",
+    "seven": "7", "eight": "8", "nine": "9",
+}
+_TEEN_WORDS = {
+    "ten": "10", "eleven": "11", "twelve": "12", "thirteen": "13", "fourteen": "14",
+    "fifteen": "15", "sixteen": "16", "seventeen": "17", "eighteen": "18", "nineteen": "19",
+}
+_TENS_WORDS = {
+    "twenty": "2", "thirty": "3", "forty": "4", "fourty": "4", "fifty": "5",
+    "sixty": "6", "seventy": "7", "eighty": "8", "ninety": "9",
+}
+_REPEAT_WORDS = {"double": 2, "triple": 3}
+
+_WORD_RE = re.compile(r"[a-z]+|\d+|[^\sa-z\d]")
+_SPOKEN_EMAIL_SYMBOLS = {
+    "at": "@", "dot": ".", "period": ".", "underscore": "_",
+    "dash": "-", "hyphen": "-", "plus": "+",
+}
+_EMAIL_RE = re.compile(r"^[a-z0-9._%+\-]+@[a-z0-9.\-]+\.[a-z]{2,}$")
+_CUSTOMER_ID_FILLER = {
+    "cust", "customer", "id", "number", "num", "no", "is", "my", "#", "-", ".", ",", ":",
+}
+
+
+def spoken_digits(text):
+    """Turn 'five five five, one two three', 'forty two' or '(555) 123' into a digit string."""
+    digits = []
+    repeat = 1
+    tens = None  # a tens word waiting for its unit ('forty' in 'forty two')
+    for token in _WORD_RE.findall(text.lower()):
+        if tens is not None:
+            unit = _DIGIT_WORDS.get(token)
+            if unit is not None and unit != "0":
+                digits.append(tens + unit)
+                tens = None
+                continue
+            digits.append(tens + "0")
+            tens = None
+        if token.isdigit():
+            digits.append(token * repeat if repeat > 1 and len(token) == 1 else token)
+            repeat = 1
+        elif token in _REPEAT_WORDS:
+            repeat = _REPEAT_WORDS[token]
+        elif token in _DIGIT_WORDS:
+            digits.append(_DIGIT_WORDS[token] * repeat)
+            repeat = 1
+        elif token in _TEEN_WORDS:
+            digits.append(_TEEN_WORDS[token] * repeat)
+            repeat = 1
+        elif token in _TENS_WORDS:
+            tens = _TENS_WORDS[token]
+            repeat = 1
+    if tens is not None:
+        digits.append(tens + "0")
+    return "".join(digits)
+
+
+def normalize_phone(text, default_country="1"):
+    """
+    Return a phone number in E.164 form (+15551234567), or None if it does not
+    contain a plausible number of digits.
+    """
+    if not text:
+        return None
+    text = str(text)
+    digits = spoken_digits(text)
+    if text.strip().startswith("+") and 8 <= len(digits) <= 15:
+        return f"+{digits}"
+    if len(digits) == 10:
+        return f"+{default_country}{digits}"
+    if len(digits) == 11 and digits.startswith(default_country):
+        return f"+{digits}"
+    return None
+
+
+def normalize_email(text):
+    """
+    Return a lowercase email address, converting spoken forms such as
+    'j o h n dot smith at example dot com'. Returns None if the result is not
+    a plausible address.
+    """
+    if not text:
+        return None
+    text = str(text).strip().lower()
+    if _EMAIL_RE.match(text):
+        return text
+    parts = []
+    for token in _WORD_RE.findall(text):
+        parts.append(_SPOKEN_EMAIL_SYMBOLS.get(token, token))
+    email = "".join(parts)
+    return email if _EMAIL_RE.match(email) else None
+
+
+def email_local_key(email):
+    """Local part of an email with separators removed, for fuzzy comparison."""
+    local = email.split("@", 1)[0]
+    return re.sub(r"[._\-+]", "", local)
+
+
+def normalize_customer_id(text):
+    """
+    Return a customer id as CUSTnnnn ('42', 'cust 42', 'customer four two',
+    'customer forty two' -> 'CUST0042').
+    """
+    if text is None:
+        return None
+    tokens = [t for t in _WORD_RE.findall(str(text).lower()) if t not in _CUSTOMER_ID_FILLER]
+    if not tokens or not all(
+        t.isdigit() or t in _DIGIT_WORDS or t in _TEEN_WORDS or t in _TENS_WORDS or t in _REPEAT_WORDS
+        for t in tokens
+    ):
+        return None
+    digits = spoken_digits(" ".join(tokens))
+    if not digits or len(digits) > 9:
+        return None
+    return f"CUST{int(digits):04d}"
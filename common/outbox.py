@@ -0,0 +1,282 @@
+"""
+Durable write-behind outbox for webhook writes.
+
+A write (e.g. a booking) is stored in a local SQLite table and the caller
+returns immediately; a background thread with its own event loop delivers
+pending rows to the webhook, retrying timeouts, connection errors, 429 and
+5xx responses with exponential backoff until `max_attempts` is reached.
+Any other error response (a 4xx the receiver will not accept again) fails
+the row at once. Failed rows are logged and listed, with the session that
+queued them, under "recent_failures" in stats(). Each row has an idempotency
+key derived from its content, so a repeated request is only stored once, and
+the key is sent with every try so the receiver can ignore duplicates.
+Re-enqueueing a row that failed puts it back to pending, and `next_outcome()`
+lets the caller wait for that retry. The worker sleeps until the next retry
+is due or enqueue() wakes it, never polling an idle table. Rows survive a
+restart: anything still pending is delivered once `start()` runs again. The
+database is opened on first use, not when the Outbox is created.
+"""
+
+import asyncio
+import concurrent.futures
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from common.webhook_retry import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+DELIVERED = "delivered"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    delivered_at REAL,
+    last_error TEXT,
+    response TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+"""
+
+
+def _retryable(response):
+    """Worth another try: no HTTP status (timeout, connection error, open circuit), 429 or 5xx."""
+    status = response.get("status")
+    return status is None or status == 429 or status >= 500
+
+
+class Outbox:
+    def __init__(self, settings, deliver):
+        """
+        `deliver(kind, payload, idempotency_key)` is a coroutine function that
+        sends one row and returns the response dict ({"error": ...} on failure).
+        """
+        self.settings = settings
+        self.deliver = deliver
+        self._db = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._loop = None  # the worker's event loop, once it runs
+        self._wake = None  # asyncio.Event on that loop, set when a row is enqueued
+        self._lags = deque(maxlen=200)  # seconds from enqueue to delivery, recent rows
+        self._waiters = {}  # idempotency key -> futures resolved after the row's next attempt
+        self._sessions = {}  # idempotency key -> session that queued it, until delivered or failed
+        self._failures = deque(maxlen=20)
+        self._stats = {"enqueued": 0, "duplicates": 0, "requeued": 0, "delivered": 0, "retries": 0, "failed": 0}
+
+    def enqueue(self, kind, payload, idempotency_key, session_id=None):
+        """
+        Store a write for delivery; return (row id, status the row already had
+        or None if it is new). A row that had failed is put back to pending
+        with a fresh set of attempts. `session_id` is reported with the row
+        if it fails.
+        """
+        now = time.time()
+        with self._lock:
+            if session_id is not None:
+                self._sessions[idempotency_key] = session_id
+            row = self._connection().execute(
+                "SELECT id, status FROM outbox WHERE idempotency_key = ?", (idempotency_key,)
+            ).fetchone()
+            if row is None:
+                row_id = self._connection().execute(
+                    "INSERT INTO outbox (idempotency_key, kind, payload, status, created_at, next_attempt_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (idempotency_key, kind, json.dumps(payload), PENDING, now, now),
+                ).lastrowid
+                previous = None
+                self._stats["enqueued"] += 1
+            else:
+                row_id, previous = row
+                if previous == FAILED:
+                    self._connection().execute(
+                        "UPDATE outbox SET status = ?, attempts = 0, next_attempt_at = ? WHERE id = ?",
+                        (PENDING, now, row_id),
+                    )
+                    self._stats["requeued"] += 1
+                else:
+                    self._stats["duplicates"] += 1
+        self.start()
+        self._notify()
+        return row_id, previous
+
+    def _notify(self):
+        """Wake the worker from any thread."""
+        loop, wake = self._loop, self._wake
+        if loop is None:
+            return  # not running yet; its first pass picks up every due row
+        try:
+            loop.call_soon_threadsafe(wake.set)
+        except RuntimeError:
+            pass  # the loop closed at interpreter exit
+
+    def _connection(self):
+        """The database, opened (and the table created) on first use; call with the lock held."""
+        if self._db is None:
+            self._db = sqlite3.connect(self.settings["path"], check_same_thread=False, isolation_level=None)
+            self._db.executescript(_SCHEMA)
+        return self._db
+
+    async def next_outcome(self, idempotency_key, timeout):
+        """
+        Wait up to `timeout` seconds for the next delivery attempt of a queued
+        row; return its status() afterwards (still pending if the wait timed out
+        or the attempt will be retried). Database reads run in a worker thread.
+        """
+        future = concurrent.futures.Future()
+        with self._lock:
+            self._waiters.setdefault(idempotency_key, []).append(future)
+        # The attempt may have finished before the waiter was registered
+        if (await asyncio.to_thread(self.status, idempotency_key))["status"] == PENDING:
+            try:
+                await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+            except asyncio.TimeoutError:
+                pass
+        with self._lock:
+            waiters = self._waiters.get(idempotency_key, [])
+            if future in waiters:
+                waiters.remove(future)
+                if not waiters:
+                    del self._waiters[idempotency_key]
+        return await asyncio.to_thread(self.status, idempotency_key)
+
+    def _attempted(self, idempotency_key):
+        """Wake next_outcome() callers waiting on this row; call with the lock held."""
+        for future in self._waiters.pop(idempotency_key, []):
+            if not future.done():
+                future.set_result(None)
+
+    def status(self, idempotency_key):
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT status, attempts, last_error, response FROM outbox WHERE idempotency_key = ?",
+                (idempotency_key,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "status": row[0],
+            "attempts": row[1],
+            "last_error": row[2],
+            "response": json.loads(row[3]) if row[3] else None,
+        }
+
+    def _due(self):
+        with self._lock:
+            return self._connection().execute(
+                "SELECT id, idempotency_key, kind, payload, attempts, created_at FROM outbox"
+                " WHERE status = ? AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT ?",
+                (PENDING, time.time(), self.settings["batch_size"]),
+            ).fetchall()
+
+    async def _deliver_row(self, row):
+        row_id, key, kind, payload, attempts, created_at = row
+        try:
+            response = await self.deliver(kind, json.loads(payload), key)
+        except Exception as e:
+            response = {"error": str(e)}
+        attempts += 1
+        now = time.time()
+
+        with self._lock:
+            if "error" not in response:
+                self._connection().execute(
+                    "UPDATE outbox SET status = ?, attempts = ?, delivered_at = ?, response = ?, last_error = NULL"
+                    " WHERE id = ?",
+                    (DELIVERED, attempts, now, json.dumps(response, default=str), row_id),
+                )
+                self._stats["delivered"] += 1
+                self._lags.append(now - created_at)
+                self._sessions.pop(key, None)
+                self._attempted(key)
+                return
+            error = str(response["error"])
+            retryable = _retryable(response)
+            if not retryable or attempts >= self.settings["max_attempts"]:
+                self._connection().execute(
+                    "UPDATE outbox SET status = ?, attempts = ?, last_error = ? WHERE id = ?",
+                    (FAILED, attempts, error, row_id),
+                )
+                self._stats["failed"] += 1
+                self._failures.append({
+                    "idempotency_key": key,
+                    "kind": kind,
+                    "attempts": attempts,
+                    "error": error,
+                    "failed_at": now,
+                    "session_id": self._sessions.pop(key, None),
+                })
+                self._attempted(key)
+                outcome = f"gave up after {attempts} attempts" if retryable else "was rejected"
+                logger.error(f"Outbox delivery of {kind} {key} {outcome}: {error}")
+                return
+            delay = backoff_delay(self.settings, attempts - 1)
+            self._connection().execute(
+                "UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (attempts, now + delay, error, row_id),
+            )
+            self._stats["retries"] += 1
+            self._attempted(key)
+        logger.warning(f"Outbox delivery of {kind} {key} failed ({error}), retrying in {delay:.1f}s")
+
+    def _next_wakeup(self):
+        """Seconds until the next pending row is due, or None if nothing is pending."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT MIN(next_attempt_at) FROM outbox WHERE status = ?", (PENDING,)
+            ).fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+    async def _work(self):
+        self._wake = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        while True:
+            # Cleared on this loop before looking, so a row enqueued after the query still wakes the wait
+            self._wake.clear()
+            rows = self._due()
+            if rows:
+                await asyncio.gather(*(self._deliver_row(row) for row in rows))
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), self._next_wakeup())
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        """Start the delivery thread (idempotent); it first delivers anything a previous run left pending."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=asyncio.run, args=(self._work(),), name="outbox", daemon=True)
+            self._thread.start()
+
+    def stats(self):
+        with self._lock:
+            report = dict(self._stats)
+            counts = dict(self._connection().execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+            oldest = self._connection().execute(
+                "SELECT MIN(created_at) FROM outbox WHERE status = ?", (PENDING,)
+            ).fetchone()[0]
+            lags = sorted(self._lags)
+            failures = list(self._failures)
+        report["pending"] = counts.get(PENDING, 0)
+        report["failed_total"] = counts.get(FAILED, 0)
+        report["oldest_pending_s"] = time.time() - oldest if oldest is not None else 0.0
+        report["recent_failures"] = failures
+        if lags:
+            report["lag_p50_s"] = lags[len(lags) // 2]
+            report["lag_p95_s"] = lags[min(len(lags) - 1, int(len(lags) * 0.95))]
+        return report
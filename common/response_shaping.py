@@ -0,0 +1,76 @@
+"""
+Shaping and encoding of function results before they go back to the Voice Agent.
+
+Results are trimmed per function according to RESPONSE_SHAPES (omitted
+fields, upcoming-only filters, limits with a count of what was left out), so
+the same rule works for every backend's records (records without a date are
+never upcoming), encoded once with compact separators, and the encoded size is
+tracked per function.
+"""
+
+import json
+from datetime import datetime
+
+from common.config import RESPONSE_SHAPES
+
+
+def shape_response(function_name, result, now=None):
+    """Apply the RESPONSE_SHAPES rule for `function_name` to a result dict."""
+    shape = RESPONSE_SHAPES.get(function_name)
+    if not shape or not isinstance(result, dict) or "error" in result:
+        return result
+
+    records = result.get(shape["list"])
+    if not isinstance(records, list):
+        return result
+
+    if shape.get("upcoming_only"):
+        cutoff = (now or datetime.now()).isoformat()
+        records = [r for r in records if (r.get("date") or "") >= cutoff]
+    if shape.get("exclude_status"):
+        excluded = set(shape["exclude_status"])
+        records = [r for r in records if r.get("status") not in excluded]
+    if shape.get("newest_first"):
+        records = sorted(records, key=lambda r: r.get("date") or "", reverse=True)
+    elif records and isinstance(records[0], dict) and "date" in records[0]:
+        records = sorted(records, key=lambda r: r.get("date") or "")
+
+    shaped = dict(result)
+    limit = shape.get("limit")
+    if limit is not None and len(records) > limit:
+        shaped["more"] = len(records) - limit
+        records = records[:limit]
+
+    omit = shape.get("omit")
+    if omit:
+        records = [{f: v for f, v in r.items() if f not in omit} for r in records]
+
+    shaped[shape["list"]] = records
+    return shaped
+
+
+def encode_response(result):
+    """Serialize a function result once, with compact separators."""
+    return json.dumps(result, separators=(",", ":"))
+
+
+class ResponseSizeStats:
+    """Running count, total and maximum of encoded response bytes per function."""
+
+    def __init__(self):
+        self._stats = {}
+
+    def record(self, function_name, size):
+        stats = self._stats.setdefault(function_name, {"calls": 0, "total_bytes": 0, "max_bytes": 0})
+        stats["calls"] += 1
+        stats["total_bytes"] += size
+        stats["max_bytes"] = max(stats["max_bytes"], size)
+
+    def snapshot(self):
+        return {
+            name: dict(stats, avg_bytes=stats["total_bytes"] / stats["calls"])
+            for name, stats in self._stats.items()
+        }
+
+
+RESPONSE_SIZE_STATS = ResponseSizeStats()
@@ -0,0 +1,105 @@
+"""
+Per-session read-through cache for function calls.
+
+Within one call the LLM often repeats lookups (find_customer, then
+get_appointments and get_orders for the same customer, then find_customer
+again after a correction). Results of read functions are cached by function
+name, backend and normalized arguments for a short TTL, and write functions
+clear the reads they affect (see FUNCTION_CACHE in config.py).
+"""
+
+import time
+
+from common.config import FUNCTION_CACHE
+
+# Arguments whose values are case-insensitive for lookups
+_LOWERCASE_ARGS = {"email", "email_lowercase", "text"}
+_UPPERCASE_ARGS = {"customer_id"}
+
+
+def normalize_arguments(params):
+    """Return a hashable, order-independent form of function arguments."""
+    normalized = []
+    for key, value in params.items():
+        if isinstance(value, str):
+            value = " ".join(value.split())
+            if key in _LOWERCASE_ARGS:
+                value = value.lower()
+            elif key in _UPPERCASE_ARGS:
+                value = value.upper()
+        if value in (None, ""):
+            continue
+        if isinstance(value, (list, dict)):
+            value = repr(value)
+        normalized.append((key, value))
+    return tuple(sorted(normalized))
+
+
+class SessionCache:
+    """TTL cache of function results for a single voice agent session."""
+
+    def __init__(self, ttl=None, invalidated_by=None, clock=time.monotonic):
+        self.ttl = FUNCTION_CACHE["ttl"] if ttl is None else ttl
+        self.invalidated_by = (
+            FUNCTION_CACHE["invalidated_by"] if invalidated_by is None else invalidated_by
+        )
+        self._clock = clock
+        # function name -> {(scope, normalized args): (expiry, result)}
+        self._entries = {}
+        self._stats = {}
+
+    def _stat(self, function_name):
+        return self._stats.setdefault(
+            function_name, {"hits": 0, "misses": 0, "invalidations": 0}
+        )
+
+    def get(self, function_name, params, scope=None):
+        """Return (True, result) for a live entry, otherwise (False, None)."""
+        entry = self._entries.get(function_name, {}).get((scope, normalize_arguments(params)))
+        if entry and entry[0] > self._clock():
+            return True, entry[1]
+        return False, None
+
+    def put(self, function_name, params, result, scope=None):
+        ttl = self.ttl.get(function_name)
+        if not ttl or not isinstance(result, dict) or "error" in result:
+            return
+        self._entries.setdefault(function_name, {})[(scope, normalize_arguments(params))] = (
+            self._clock() + ttl,
+            result,
+        )
+
+    def invalidate(self, function_name):
+        """Drop every cached result for a function."""
+        dropped = self._entries.pop(function_name, None)
+        if dropped:
+            self._stat(function_name)["invalidations"] += len(dropped)
+
+    async def call(self, function_name, params, func, scope=None):
+        """
+        Return a cached result for `function_name(params)` or call `func(params)`
+        and cache it. Results are only shared between calls with the same
+        `scope` (the backend that answers them).
+        """
+        if function_name in self.ttl:
+            hit, result = self.get(function_name, params, scope)
+            stats = self._stat(function_name)
+            if hit:
+                stats["hits"] += 1
+                return result
+            stats["misses"] += 1
+
+        result = await func(params)
+
+        for affected in self.invalidated_by.get(function_name, ()):
+            self.invalidate(affected)
+        self.put(function_name, params, result, scope)
+        return result
+
+    def stats(self):
+        """Hits, misses, invalidations and hit rate per cached function."""
+        report = {}
+        for name, stats in self._stats.items():
+            lookups = stats["hits"] + stats["misses"]
+            report[name] = dict(stats, hit_rate=stats["hits"] / lookups if lookups else 0.0)
+        return report
@@ -0,0 +1,98 @@
+"""
+Request coalescing ("single flight") for idempotent webhook calls.
+
+When several callers ask for the same thing at the same time — e.g. many
+sessions checking availability for the same date — only the first one (the
+leader) sends the request; the others wait for its result and each get their
+own copy. Entries only live while the request is in flight, so this never
+serves old data; the TTL cache in webhook_cache.py covers repeat reads.
+Voice agent sessions run on separate event loops, so in-flight requests are
+tracked with thread-safe futures that any loop can await.
+"""
+
+import asyncio
+import concurrent.futures
+import copy
+import json
+import threading
+
+
+def flight_key(endpoint_name, path, method, data=None, params=None):
+    """Key identifying a request: endpoint, path, method and canonical JSON body/query."""
+    return (
+        endpoint_name,
+        path,
+        method.upper(),
+        json.dumps(data, sort_keys=True, default=str),
+        json.dumps(params, sort_keys=True, default=str),
+    )
+
+
+class _LeaderCancelled(Exception):
+    """Set on a flight whose leader was cancelled; followers then send the request themselves."""
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight = {}  # key -> concurrent.futures.Future
+        self._followers = {}  # key -> followers waiting on the current flight
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "leaders": 0, "coalesced": 0, "max_followers": 0}
+
+    async def run(self, key, func):
+        """
+        Return the result of `func()` (a coroutine function), sharing one call
+        among all concurrent callers that pass the same `key`.
+        """
+        with self._lock:
+            self._stats["calls"] += 1
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._inflight[key] = concurrent.futures.Future()
+                self._followers[key] = 0
+                self._stats["leaders"] += 1
+                leader = True
+            else:
+                self._followers[key] += 1
+                self._stats["coalesced"] += 1
+                self._stats["max_followers"] = max(self._stats["max_followers"], self._followers[key])
+                leader = False
+
+        if not leader:
+            try:
+                # Shielded: a follower that is cancelled must not cancel the flight the others share.
+                # Followers get a copy so no caller can mutate another's result
+                return copy.deepcopy(await asyncio.shield(asyncio.wrap_future(future)))
+            except _LeaderCancelled:
+                return await func()
+
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future = self._land(key)
+            if not future.done():
+                future.set_exception(_LeaderCancelled())
+            raise
+        except BaseException as e:
+            future = self._land(key)
+            if not future.done():
+                future.set_exception(e)
+            raise
+        # Followers copy from a snapshot, so the leader is free to modify what it returns
+        future = self._land(key)
+        if not future.done():
+            future.set_result(copy.deepcopy(result) if future.followers else result)
+        return result
+
+    def _land(self, key):
+        """Remove the flight for `key` so later callers start a new one; return its future."""
+        with self._lock:
+            future = self._inflight.pop(key)
+            future.followers = self._followers.pop(key)
+        return future
+
+    def stats(self):
+        with self._lock:
+            report = dict(self._stats)
+            report["in_flight"] = len(self._inflight)
+        return report
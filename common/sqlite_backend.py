@@ -0,0 +1,197 @@
+"""
+SQLite backend for the customer, appointment and order lookups.
+
+With DATABASE_CONFIG["enable"] False the database at DATABASE_CONFIG["path"]
+is a local copy of the mock store: it is rebuilt from the store on first use
+(and when the store is replaced), and appointments added to the store since
+then (bookings) are copied in before each appointment read, so lookups see
+the same data as the mock backend. The copy is built on a background thread
+when the router starts the backend, and any later rebuild or copy runs in a
+worker thread, so neither blocks a session's event loop. With "enable" True
+the file is used as is, as the system of record. Responses have the same
+shape as the mock functions; a customer that is not found gets no fuzzy
+candidates.
+"""
+
+import asyncio
+import logging
+import sqlite3
+import threading
+
+from common import business_logic
+from common.config import DATABASE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+DROP TABLE IF EXISTS customers;
+DROP TABLE IF EXISTS appointments;
+DROP TABLE IF EXISTS orders;
+CREATE TABLE customers (id TEXT PRIMARY KEY, name TEXT, phone TEXT, email TEXT, joined_date TEXT);
+CREATE TABLE appointments (
+    id TEXT PRIMARY KEY, customer_id TEXT, customer_name TEXT, date TEXT, service TEXT, status TEXT
+);
+CREATE TABLE orders (
+    id TEXT PRIMARY KEY, customer_id TEXT, customer_name TEXT, date TEXT,
+    items INTEGER, item_name TEXT, total REAL, status TEXT
+);
+CREATE INDEX customers_phone ON customers (phone);
+CREATE INDEX customers_email ON customers (email);
+CREATE INDEX appointments_customer ON appointments (customer_id);
+CREATE INDEX orders_customer ON orders (customer_id);
+"""
+
+_CUSTOMER_COLUMNS = ("id", "name", "phone", "email", "joined_date")
+_APPOINTMENT_COLUMNS = ("id", "customer_id", "customer_name", "date", "service", "status")
+_ORDER_COLUMNS = ("id", "customer_id", "customer_name", "date", "items", "item_name", "total", "status")
+
+
+def _insert(table, columns):
+    return f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+
+class SqliteStore:
+    def __init__(self, settings=DATABASE_CONFIG):
+        self.settings = settings
+        self._local = threading.local()  # one connection per thread (sessions, pool workers)
+        self._lock = threading.Lock()
+        self._store = None  # mock store the file was built from
+        self._synced_appointments = 0
+
+    def _connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.settings["path"], check_same_thread=False)
+        return db
+
+    def _materialize(self, store):
+        """Rebuild the database file from the mock store."""
+        db = self._connection()
+        with db:
+            db.executescript(_SCHEMA)
+            db.executemany(
+                _insert("customers", _CUSTOMER_COLUMNS),
+                ([c[k] for k in _CUSTOMER_COLUMNS] for c in map(store.customer_dict, range(store.customer_count))),
+            )
+            db.executemany(
+                _insert("appointments", _APPOINTMENT_COLUMNS),
+                ([a[k] for k in _APPOINTMENT_COLUMNS] for a in map(store.appointment_dict, range(store.appointment_count))),
+            )
+            db.executemany(
+                _insert("orders", _ORDER_COLUMNS),
+                ([o[k] for k in _ORDER_COLUMNS] for o in map(store.order_dict, range(store.order_count))),
+            )
+        self._store = store
+        self._synced_appointments = store.appointment_count
+        logger.info(
+            f"Materialized {store.customer_count} customers, {store.appointment_count} appointments "
+            f"and {store.order_count} orders into {self.settings['path']}"
+        )
+
+    def stale(self, appointments=False):
+        """True if the copy is behind the mock store (never when the file is the system of record)."""
+        if self.settings["enable"]:
+            return False
+        store = business_logic.get_mock_data()
+        return self._store is not store or (appointments and store.appointment_count > self._synced_appointments)
+
+    def sync(self, appointments=False):
+        """Bring the copy up to date with the mock store. Blocking: async callers run it in a thread."""
+        if not self.stale(appointments):
+            return
+        store = business_logic.get_mock_data()
+        with self._lock:
+            if self._store is not store:
+                self._materialize(store)
+            elif appointments and store.appointment_count > self._synced_appointments:
+                rows = range(self._synced_appointments, store.appointment_count)
+                db = self._connection()
+                with db:
+                    db.executemany(
+                        _insert("appointments", _APPOINTMENT_COLUMNS),
+                        ([a[k] for k in _APPOINTMENT_COLUMNS] for a in map(store.appointment_dict, rows)),
+                    )
+                self._synced_appointments = rows.stop
+
+    def _query(self, sql, args, columns):
+        return [dict(zip(columns, row)) for row in self._connection().execute(sql, args)]
+
+    def get_customer(self, phone=None, email=None, customer_id=None, name=None):
+        if phone:
+            column, value = "phone", phone
+        elif email:
+            column, value = "email", email
+        elif customer_id:
+            column, value = "id", customer_id
+        elif name:
+            return {"error": "Customer not found"}
+        else:
+            return {"error": "No search criteria provided"}
+        rows = self._query(
+            f"SELECT {', '.join(_CUSTOMER_COLUMNS)} FROM customers WHERE {column} = ? LIMIT 1",
+            (value,), _CUSTOMER_COLUMNS,
+        )
+        return rows[0] if rows else {"error": "Customer not found"}
+
+    def get_customer_appointments(self, customer_id):
+        appointments = self._query(
+            f"SELECT {', '.join(_APPOINTMENT_COLUMNS)} FROM appointments WHERE customer_id = ? ORDER BY rowid",
+            (customer_id,), _APPOINTMENT_COLUMNS,
+        )
+        return {"customer_id": customer_id, "appointments": appointments}
+
+    def get_customer_orders(self, customer_id):
+        orders = self._query(
+            f"SELECT {', '.join(_ORDER_COLUMNS)} FROM orders WHERE customer_id = ? ORDER BY rowid",
+            (customer_id,), _ORDER_COLUMNS,
+        )
+        return {"customer_id": customer_id, "orders": orders}
+
+
+SQLITE_STORE = SqliteStore()
+
+
+def start_background_tasks():
+    """Build the copy now, off the event loops, rather than on the first call."""
+    threading.Thread(target=SQLITE_STORE.sync, name="sqlite-materialize", daemon=True).start()
+
+
+async def _synced(appointments=False):
+    if SQLITE_STORE.stale(appointments):
+        await asyncio.to_thread(SQLITE_STORE.sync, appointments)
+
+
+async def find_customer(params):
+    """Look up a customer by phone, email, or ID."""
+    await _synced()
+    return SQLITE_STORE.get_customer(
+        phone=params.get("phone"),
+        email=params.get("email"),
+        customer_id=params.get("customer_id"),
+        name=params.get("name"),
+    )
+
+
+async def get_appointments(params):
+    """Get appointments for a customer."""
+    customer_id = params.get("customer_id")
+    if not customer_id:
+        return {"error": "customer_id is required"}
+    await _synced(appointments=True)
+    return SQLITE_STORE.get_customer_appointments(customer_id)
+
+
+async def get_orders(params):
+    """Get orders for a customer."""
+    customer_id = params.get("customer_id")
+    if not customer_id:
+        return {"error": "customer_id is required"}
+    await _synced()
+    return SQLITE_STORE.get_customer_orders(customer_id)
+
+
+SQLITE_FUNCTION_MAP = {
+    "find_customer": find_customer,
+    "get_appointments": get_appointments,
+    "get_orders": get_orders,
+}
@@ -0,0 +1,109 @@
+"""
+Per-session latency traces and trace-context propagation for outbound calls.
+
+Each voice agent session keeps a SessionTrace: a trace id for the session,
+the current turn number (advanced on every user utterance) and, for recent
+turns, the functions that ran and the webhook requests they made with a
+phase breakdown (DNS, connect, time to first byte, body). The dispatcher
+sets CURRENT_TRACE while a function runs; call_webhook reads it to add a
+W3C `traceparent` header (session trace id, a fresh span id per request)
+plus a `tracestate` entry with the session and turn id, and to file the
+request's timings under the turn that waited on it.
+"""
+
+import contextvars
+import copy
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, namedtuple
+
+from common.config import WEBHOOK_TRACING
+
+# (SessionTrace, turn number, function name) for the function currently running
+TraceContext = namedtuple("TraceContext", "trace turn function_name")
+CURRENT_TRACE = contextvars.ContextVar("current_trace", default=None)
+
+
+class RequestTiming:
+    """Timestamps (perf_counter) for one HTTP request, filled in by aiohttp trace hooks."""
+
+    __slots__ = (
+        "start", "dns_start", "dns_end", "connect_start", "connect_end",
+        "reused_connection", "headers_sent", "first_byte", "end",
+    )
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, None)
+        self.reused_connection = False
+
+    @staticmethod
+    def _ms(start, end):
+        return round((end - start) * 1e3, 3) if start is not None and end is not None else None
+
+    def phases(self):
+        """Durations in milliseconds; a phase that did not happen (e.g. DNS on a reused connection) is None."""
+        sent = self.headers_sent or self.connect_end or self.start
+        return {
+            "dns_ms": self._ms(self.dns_start, self.dns_end),
+            # TCP plus TLS: aiohttp reports the connection only once both are done
+            "connect_ms": self._ms(self.connect_start, self.connect_end),
+            "reused_connection": self.reused_connection,
+            "ttfb_ms": self._ms(sent, self.first_byte),
+            "body_ms": self._ms(self.first_byte, self.end),
+            "total_ms": self._ms(self.start, self.end),
+        }
+
+
+class SessionTrace:
+    def __init__(self, session_id=None, turns=WEBHOOK_TRACING["turns"]):
+        self.session_id = session_id or uuid.uuid4().hex
+        self.trace_id = uuid.uuid4().hex
+        self.turn = 0
+        self._turns = OrderedDict()  # turn -> {"started", "functions": [...]}
+        self._max_turns = turns
+        self._lock = threading.Lock()
+
+    def next_turn(self):
+        with self._lock:
+            self.turn += 1
+            self._turns[self.turn] = {"started": time.time(), "functions": []}
+            while len(self._turns) > self._max_turns:
+                self._turns.popitem(last=False)
+        return self.turn
+
+    def _function_entry(self, turn, function_name):
+        entry = self._turns.setdefault(turn, {"started": time.time(), "functions": []})
+        for function in reversed(entry["functions"]):
+            if function["name"] == function_name and "ms" not in function:
+                return function
+        function = {"name": function_name, "webhooks": []}
+        entry["functions"].append(function)
+        return function
+
+    def record_function(self, context, seconds):
+        """Close the entry for a finished function run."""
+        with self._lock:
+            self._function_entry(context.turn, context.function_name)["ms"] = round(seconds * 1e3, 3)
+
+    def record_webhook(self, context, request):
+        """File one webhook request (endpoint, path, status, phases) under its turn and function."""
+        with self._lock:
+            self._function_entry(context.turn, context.function_name)["webhooks"].append(request)
+
+    def headers(self, turn):
+        """traceparent/tracestate headers for one outbound request (a new span id each time)."""
+        span_id = os.urandom(8).hex()
+        return {
+            "traceparent": f"00-{self.trace_id}-{span_id}-01",
+            "tracestate": f"{WEBHOOK_TRACING['tracestate_key']}=s:{self.session_id};t:{turn}",
+        }
+
+    def snapshot(self):
+        with self._lock:
+            turns = [
+                dict(copy.deepcopy(entry), turn=turn) for turn, entry in self._turns.items() if entry["functions"]
+            ]
+        return {"session_id": self.session_id, "trace_id": self.trace_id, "turn": self.turn, "turns": turns}
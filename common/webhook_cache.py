@@ -0,0 +1,102 @@
+"""
+Shared TTL cache with stale-while-revalidate for webhook-backed lookups.
+
+Entries younger than `ttl` are served directly. Entries older than `ttl`
+but within `stale_ttl` more seconds are served immediately while one
+background refresh runs, so the caller never waits on a repeat lookup.
+Older entries are reloaded in the foreground; if that load fails, the old
+entry is still served rather than nothing. Writes call `invalidate(key)` so
+the next read goes to the backend. The cache is shared by every session.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class StaleWhileRevalidateCache:
+    def __init__(self, ttl, stale_ttl=0.0, clock=time.monotonic):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.clock = clock
+        self._entries = {}  # key -> (value, stored_at)
+        # Bumped by invalidate(), so a load started before a write never stores its older result
+        self._generations = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._tasks = set()
+        self._stats = {
+            "hits": 0, "stale_hits": 0, "misses": 0,
+            "refreshes": 0, "failed_loads": 0, "invalidations": 0,
+        }
+
+    def _store(self, key, value, generation):
+        if self._generations.get(key, 0) == generation:
+            self._entries[key] = (value, self.clock())
+
+    async def _refresh(self, key, loader, generation):
+        try:
+            value = await loader()
+            if value is not None:
+                self._store(key, value, generation)
+            else:
+                self._stats["failed_loads"] += 1
+        except Exception as e:
+            self._stats["failed_loads"] += 1
+            logger.warning(f"Background refresh of {key!r} failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    async def get_or_load(self, key, loader):
+        """
+        Return the value for `key`, calling `loader()` (a coroutine function
+        returning the value, or None on failure) when it is missing or stale.
+        Returns None only when nothing is cached and the load failed.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = self.clock() - stored_at
+            if age < self.ttl:
+                self._stats["hits"] += 1
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self._stats["stale_hits"] += 1
+                with self._lock:
+                    start = key not in self._refreshing
+                    self._refreshing.add(key)
+                if start:
+                    self._stats["refreshes"] += 1
+                    task = asyncio.ensure_future(
+                        self._refresh(key, loader, self._generations.get(key, 0))
+                    )
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+                return value
+
+        self._stats["misses"] += 1
+        generation = self._generations.get(key, 0)
+        value = await loader()
+        if value is None:
+            self._stats["failed_loads"] += 1
+            # Serve the expired entry rather than nothing
+            return entry[0] if entry is not None else None
+        self._store(key, value, generation)
+        return value
+
+    def invalidate(self, key):
+        self._generations[key] = self._generations.get(key, 0) + 1
+        if self._entries.pop(key, None) is not None:
+            self._stats["invalidations"] += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        report = dict(self._stats)
+        report["entries"] = len(self._entries)
+        return report
@@ -0,0 +1,112 @@
+"""
+Long-lived, pooled aiohttp sessions for webhook endpoints.
+
+Opening a ClientSession per request pays for a new connector, DNS lookup and
+TCP/TLS handshake on every call. WebhookClient keeps one session per
+WEBHOOK_CONFIG endpoint instead, with keep-alive connections, a DNS cache
+and connection limits from WEBHOOK_CONNECTION_POOL (overridable per endpoint
+with a "pool" entry). aiohttp sessions belong to the event loop that created
+them, and every voice agent session runs its own loop, so sessions are kept
+per loop and closed with `close()` when that loop finishes. Every session
+carries TRACE_CONFIG, whose hooks fill in the RequestTiming passed as a
+request's `trace_request_ctx` (see common/tracing.py).
+"""
+
+import asyncio
+import threading
+import time
+import weakref
+
+import aiohttp
+
+from common.config import WEBHOOK_CONNECTION_POOL
+from common.tracing import RequestTiming
+
+
+def _timing_hook(*fields, value=None):
+    """Trace hook that stamps `fields` on the request's RequestTiming (if it has one and they are unset)."""
+
+    async def hook(session, context, params):
+        timing = context.trace_request_ctx
+        if isinstance(timing, RequestTiming):
+            for field in fields:
+                if getattr(timing, field) is None or getattr(timing, field) is False:
+                    setattr(timing, field, time.perf_counter() if value is None else value)
+
+    return hook
+
+
+def _trace_config():
+    config = aiohttp.TraceConfig()
+    config.on_request_start.append(_timing_hook("start"))
+    config.on_dns_resolvehost_start.append(_timing_hook("dns_start"))
+    config.on_dns_resolvehost_end.append(_timing_hook("dns_end"))
+    config.on_connection_create_start.append(_timing_hook("connect_start"))
+    config.on_connection_create_end.append(_timing_hook("connect_end"))
+    config.on_connection_reuseconn.append(_timing_hook("reused_connection", value=True))
+    config.on_request_headers_sent.append(_timing_hook("headers_sent"))
+    # Fired once the response status and headers have arrived
+    config.on_request_end.append(_timing_hook("first_byte"))
+    return config
+
+
+TRACE_CONFIG = _trace_config()
+
+
+class WebhookClient:
+    """Per-endpoint pooled ClientSessions, created on first use."""
+
+    def __init__(self, endpoints, pool=WEBHOOK_CONNECTION_POOL):
+        self.endpoints = endpoints
+        self.pool = pool
+        # event loop -> {endpoint name: ClientSession}
+        self._sessions = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._stats = {"sessions_opened": 0, "sessions_closed": 0}
+
+    def _pool_settings(self, endpoint_name):
+        settings = dict(self.pool)
+        settings.update(self.endpoints.get(endpoint_name, {}).get("pool", {}))
+        return settings
+
+    def session(self, endpoint_name):
+        """Return the pooled session for `endpoint_name` on the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            sessions = self._sessions.setdefault(loop, {})
+            session = sessions.get(endpoint_name)
+            if session is None or session.closed:
+                settings = self._pool_settings(endpoint_name)
+                connector = aiohttp.TCPConnector(
+                    limit=settings["limit"],
+                    limit_per_host=settings["limit_per_host"],
+                    ttl_dns_cache=settings["ttl_dns_cache"],
+                    keepalive_timeout=settings["keepalive_timeout"],
+                )
+                session = aiohttp.ClientSession(connector=connector, trace_configs=[TRACE_CONFIG])
+                sessions[endpoint_name] = session
+                self._stats["sessions_opened"] += 1
+        return session
+
+    async def start(self, endpoint_names=None):
+        """Open sessions up front (all endpoints by default) so the first call skips setup."""
+        for name in endpoint_names or self.endpoints:
+            self.session(name)
+
+    async def close(self):
+        """Close every session opened on the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            sessions = self._sessions.pop(loop, {})
+        for session in sessions.values():
+            if not session.closed:
+                await session.close()
+                self._stats["sessions_closed"] += 1
+
+    def stats(self):
+        report = dict(self._stats)
+        with self._lock:
+            report["open_sessions"] = sum(
+                1 for sessions in self._sessions.values() for s in sessions.values() if not s.closed
+            )
+        return report
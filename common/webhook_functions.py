@@ -5,9 +5,28 @@ Integrates with external APIs and services via HTTP webhooks
 
 import aiohttp
 import asyncio
+import hashlib
 import json
 from datetime import datetime
 import logging
+import time
+
+from common.circuit_breaker import CircuitBreakers
+from common.config import BOOKING_OUTBOX, HEALTH_CHECKS, SINGLE_FLIGHT, WEBHOOK_CACHE, WEBHOOK_TRACING
+from common.date_parser import parse_date_phrase
+from common.health import HEALTH_MONITOR
+from common.latency import LATENCY_MODEL, InjectedError
+from common.outbox import DELIVERED, FAILED, Outbox
+from common.single_flight import SingleFlight, flight_key
+from common.tracing import CURRENT_TRACE, RequestTiming
+from common.webhook_cache import StaleWhileRevalidateCache
+from common.webhook_client import WebhookClient
+from common.webhook_retry import (
+    IDEMPOTENT_METHODS,
+    WebhookResilience,
+    backoff_delay,
+    retry_policy,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -34,7 +53,148 @@ WEBHOOK_CONFIG = {
     }
 }
 
-async def call_webhook(endpoint_name, path, method="POST", data=None, params=None):
+# One pooled, keep-alive session per endpoint (see common/webhook_client.py)
+WEBHOOK_CLIENT = WebhookClient(WEBHOOK_CONFIG)
+
+# Latency samples for hedging, retry and hedge counters
+WEBHOOK_RESILIENCE = WebhookResilience()
+
+# Fail fast to the caller's fallback while an endpoint is down
+WEBHOOK_BREAKERS = CircuitBreakers(WEBHOOK_CONFIG)
+
+# Coalesces identical idempotent requests that are in flight at the same time
+WEBHOOK_FLIGHTS = SingleFlight()
+
+# Availability per date from the bookings webhook, shared by all sessions
+BOOKINGS_CACHE = StaleWhileRevalidateCache(**WEBHOOK_CACHE["bookings"])
+
+
+async def _attempt(endpoint_name, url, method, headers, data, params, timeout):
+    """
+    One HTTP request. Returns (response data or error dict, retryable), where
+    retryable marks timeouts, connection failures, 429 and 5xx responses.
+    The request's phase timings go to the log and, when it runs for a
+    function, to that session's latency trace.
+    """
+    session = WEBHOOK_CLIENT.session(endpoint_name)
+    timing = RequestTiming() if WEBHOOK_TRACING["enable"] else None
+    context = CURRENT_TRACE.get()
+    if timing is not None and context is not None:
+        headers = dict(headers, **context.trace.headers(context.turn))
+    outcome = {}
+    try:
+        # Simulated endpoint latency/faults from LATENCY_PROFILES (no-op by default)
+        await LATENCY_MODEL.apply(endpoint_name, default_timeout=timeout)
+        async with session.request(
+            method=method,
+            url=url,
+            headers=headers,
+            json=data,
+            params=params,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+            trace_request_ctx=timing
+        ) as response:
+            response_data = await response.json()
+            if timing is not None:
+                timing.end = time.perf_counter()
+            outcome["status"] = response.status
+            
+            if response.status >= 200 and response.status < 300:
+                logger.info(f"Webhook success: {response.status}{_format_timing(timing)}")
+                return response_data, False
+            else:
+                logger.error(f"Webhook error: {response.status} - {response_data}{_format_timing(timing)}")
+                return {
+                    "error": f"API error: {response.status}",
+                    "status": response.status,
+                    "details": response_data
+                }, response.status == 429 or response.status >= 500
+                
+    except asyncio.TimeoutError:
+        logger.error(f"Webhook timeout for {url}")
+        outcome["error"] = "timeout"
+        return {"error": "Request timed out"}, True
+    except (aiohttp.ClientConnectionError, InjectedError) as e:
+        logger.error(f"Webhook connection error: {str(e)}")
+        outcome["error"] = str(e)
+        return {"error": str(e)}, True
+    except Exception as e:
+        logger.error(f"Webhook exception: {str(e)}")
+        outcome["error"] = str(e)
+        return {"error": str(e)}, False
+    finally:
+        if timing is not None and timing.start is not None and timing.end is None:
+            timing.end = time.perf_counter()  # failed requests: time until the failure
+        if timing is not None and context is not None and timing.start is not None:
+            context.trace.record_webhook(
+                context, dict(outcome, endpoint=endpoint_name, method=method, url=url, **timing.phases())
+            )
+
+
+def _format_timing(timing):
+    if timing is None or timing.start is None:
+        return ""
+    phases = timing.phases()
+    parts = [f"{name[:-3]} {phases[name]:.1f}ms" for name in ("dns_ms", "connect_ms", "ttfb_ms", "body_ms")
+             if phases[name] is not None]
+    return f" ({phases['total_ms']:.1f}ms: {', '.join(parts)})"
+
+
+async def _send(endpoint_name, config, path, url, method, headers, data, params, idempotent):
+    """Send one logical request: retries, hedging and the circuit breaker."""
+    policy = retry_policy(config)
+    attempts = policy["attempts"] if idempotent else 1
+    hedge_delay = WEBHOOK_RESILIENCE.hedge_delay(endpoint_name, path) if idempotent else None
+    breaker = WEBHOOK_BREAKERS.get(endpoint_name)
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + min(policy["budget"], config['timeout'] * attempts)
+    for retry in range(attempts):
+        timeout = min(config['timeout'], deadline - loop.time())
+        if idempotent:
+            timeout = min(timeout, policy["attempt_timeout"])
+
+        async def attempt():
+            if not breaker.allow():
+                logger.warning(f"Circuit open for {endpoint_name}, skipping {method} {url}")
+                return {"error": f"{endpoint_name} is unavailable", "circuit_open": True}, False
+            start = loop.time()
+            recorded = False
+            try:
+                outcome = await _attempt(endpoint_name, url, method, headers, data, params, timeout)
+                elapsed = loop.time() - start
+                # Client errors (4xx) mean the endpoint is up, so only retryable failures trip the breaker
+                breaker.record(not outcome[1], elapsed)
+                recorded = True
+            finally:
+                if not recorded:
+                    # Cancelled (e.g. a hedge that lost, or the session ended): free a half-open probe slot
+                    breaker.release()
+            if "error" not in outcome[0]:
+                WEBHOOK_RESILIENCE.latency.observe((endpoint_name, path), elapsed)
+            return outcome
+
+        if hedge_delay is not None and hedge_delay < timeout:
+            result, retryable = await WEBHOOK_RESILIENCE.hedged(endpoint_name, attempt, hedge_delay)
+        else:
+            result, retryable = await attempt()
+
+        if not retryable or retry == attempts - 1:
+            break
+        delay = backoff_delay(policy, retry)
+        if loop.time() + delay >= deadline:
+            break
+        WEBHOOK_RESILIENCE.count(endpoint_name, "retries")
+        logger.info(f"Retrying webhook {method} {url} in {delay:.2f}s ({result.get('error')})")
+        await asyncio.sleep(delay)
+
+    if "error" in result and retryable:
+        WEBHOOK_RESILIENCE.count(endpoint_name, "gave_up")
+    return result
+
+
+async def call_webhook(endpoint_name, path, method="POST", data=None, params=None, idempotent=None,
+                       extra_headers=None):
     """
     Generic webhook caller with error handling and retry logic
     
@@ -44,6 +204,10 @@ async def call_webhook(endpoint_name, path, method="POST", data=None, params=Non
         method: HTTP method (GET, POST, PUT, DELETE)
         data: Request body data
         params: Query parameters
+        idempotent: Whether the call is safe to repeat; defaults to True for
+            GET/HEAD/OPTIONS/PUT/DELETE. Only idempotent calls are retried
+            (WEBHOOK_RETRY_POLICY) or hedged (HEDGED_REQUESTS).
+        extra_headers: Additional request headers (e.g. Idempotency-Key)
     
     Returns:
         Response data or error dict
@@ -65,37 +229,22 @@ async def call_webhook(endpoint_name, path, method="POST", data=None, params=Non
     # Only add auth header if API key exists
     if config.get('api_key'):
         headers["Authorization"] = f"Bearer {config['api_key']}"
+    if extra_headers:
+        headers.update(extra_headers)
     
     logger.info(f"Calling webhook: {method} {url}")
-    
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.request(
-                method=method,
-                url=url,
-                headers=headers,
-                json=data,
-                params=params,
-                timeout=aiohttp.ClientTimeout(total=config['timeout'])
-            ) as response:
-                response_data = await response.json()
-                
-                if response.status >= 200 and response.status < 300:
-                    logger.info(f"Webhook success: {response.status}")
-                    return response_data
-                else:
-                    logger.error(f"Webhook error: {response.status} - {response_data}")
-                    return {
-                        "error": f"API error: {response.status}",
-                        "details": response_data
-                    }
-                    
-        except asyncio.TimeoutError:
-            logger.error(f"Webhook timeout for {url}")
-            return {"error": "Request timed out"}
-        except Exception as e:
-            logger.error(f"Webhook exception: {str(e)}")
-            return {"error": str(e)}
+
+    if idempotent is None:
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+    WEBHOOK_RESILIENCE.count(endpoint_name, "calls")
+
+    def send():
+        return _send(endpoint_name, config, path, url, method, headers, data, params, idempotent)
+
+    # Identical idempotent requests already in flight (from any session) share one HTTP call
+    if idempotent and SINGLE_FLIGHT["enable"]:
+        return await WEBHOOK_FLIGHTS.run(flight_key(endpoint_name, path, method, data, params), send)
+    return await send()
 
 
 # APPOINTMENT BOOKING FUNCTIONS WITH WEBHOOKS
@@ -103,104 +252,27 @@ async def call_webhook(endpoint_name, path, method="POST", data=None, params=Non
 async def check_date(params):
     """
     CheckDate function - converts natural language date to YYYY-MM-DD format
-    Uses n8n webhook to process natural language dates like 'next saturday' or 'tomorrow'
-    
+    Parsed locally; the n8n round trip added latency without handling more phrases.
+
     This function is called by the voice agent when users mention dates in natural language.
     """
-    # Extract the natural language date input
-    # The parameter name is 'text' as expected by the voice agent
     input_text = params.get("text", "")
-    
+
     if not input_text:
         return {"error": "No date input provided"}
-    
-    # Call the n8n webhook with the exact format expected
-    webhook_data = {
-        "input": input_text  # n8n webhook expects 'input' field
-    }
-    
-    logger.info(f"Calling CheckDate webhook with input: {input_text}")
-    
-    # Call the n8n webhook
-    response = await call_webhook(
-        "n8n_webhooks",
-        "check_date",  # This appends to make: https://luccatora.app.n8n.cloud/webhook/check_date
-        method="POST",
-        data=webhook_data
-    )
-    
-    if "error" in response:
-        # If webhook fails, fall back to local parsing
-        logger.warning(f"CheckDate webhook failed, using fallback: {response}")
-        
-        from datetime import datetime, timedelta
-        text = input_text.lower()
-        today = datetime.now()
-        
-        if "today" in text:
-            target_date = today
-        elif "tomorrow" in text:
-            target_date = today + timedelta(days=1)
-        elif "monday" in text:
-            days_ahead = 0 - today.weekday()
-            if days_ahead <= 0:
-                days_ahead += 7
-            target_date = today + timedelta(days=days_ahead)
-        elif "tuesday" in text:
-            days_ahead = 1 - today.weekday()
-            if days_ahead <= 0:
-                days_ahead += 7
-            target_date = today + timedelta(days=days_ahead)
-        elif "wednesday" in text:
-            days_ahead = 2 - today.weekday()
-            if days_ahead <= 0:
-                days_ahead += 7
-            target_date = today + timedelta(days=days_ahead)
-        elif "thursday" in text:
-            days_ahead = 3 - today.weekday()
-            if days_ahead <= 0:
-                days_ahead += 7
-            target_date = today + timedelta(days=days_ahead)
-        elif "friday" in text:
-            days_ahead = 4 - today.weekday()
-            if days_ahead <= 0:
-                days_ahead += 7
-            target_date = today + timedelta(days=days_ahead)
-        elif "saturday" in text:
-            days_ahead = 5 - today.weekday()
-            if days_ahead <= 0:
-                days_ahead += 7
-            target_date = today + timedelta(days=days_ahead)
-        elif "sunday" in text:
-            days_ahead = 6 - today.weekday()
-            if days_ahead <= 0:
-                days_ahead += 7
-            target_date = today + timedelta(days=days_ahead)
-        else:
-            # Default to tomorrow if can't parse
-            target_date = today + timedelta(days=1)
-        
-        return {"date": target_date.strftime("%Y-%m-%d")}
-    
-    # Return the response from n8n webhook
-    # The webhook should return a date in YYYY-MM-DD format
-    logger.info(f"CheckDate webhook response: {response}")
-    return response
 
+    parsed = parse_date_phrase(input_text, params.get("reference_date"))
+    if parsed.date is None:
+        return {"error": f"Could not understand the date in {input_text!r}"}
 
-async def bookings(params):
-    """
-    Bookings function - checks availability for a specific day
-    Uses n8n webhook to get available appointment times for the given date
-    
-    This function is called by the voice agent after check_date to find available slots.
-    """
-    # Extract the date parameter - should be in YYYY-MM-DD format from check_date
-    date = params.get("date")
-    
-    if not date:
-        return {"error": "Date is required"}
-    
+    result = {"date": parsed.date.strftime("%Y-%m-%d")}
+    if parsed.time:
+        result["time"] = parsed.time
+    return result
+
+
+async def _fetch_bookings(date):
+    """Available times for `date` from the n8n webhook, or None if the call failed."""
     # Call the n8n webhook with the exact format expected
     webhook_data = {
         "chatinput": date  # n8n webhook expects 'chatinput' field with YYYY-MM-DD format
@@ -213,17 +285,13 @@ async def bookings(params):
         "n8n_webhooks",
         "bookings",  # This appends to make: https://luccatora.app.n8n.cloud/webhook/bookings
         method="POST",
-        data=webhook_data
+        data=webhook_data,
+        idempotent=True  # Read-only lookup, safe to retry and hedge
     )
     
     if "error" in response:
-        # If webhook fails, fall back to mock data
-        logger.warning(f"Bookings webhook failed, using fallback: {response}")
-        
-        # Return mock availability times for testing
-        return {
-            "times": ["09:00", "10:00", "11:00", "14:00", "15:00", "16:00", "17:00"]
-        }
+        logger.warning(f"Bookings webhook failed: {response}")
+        return None
     
     # Return the response from n8n webhook
     # The webhook should return available times in HH:MM format
@@ -244,10 +312,41 @@ async def bookings(params):
         return {"times": response.get("slots", response.get("availability", []))}
 
 
+async def bookings(params):
+    """
+    Bookings function - checks availability for a specific day
+    Uses n8n webhook to get available appointment times for the given date,
+    served from BOOKINGS_CACHE when the date was looked up recently
+    
+    This function is called by the voice agent after check_date to find available slots.
+    """
+    # Extract the date parameter - should be in YYYY-MM-DD format from check_date
+    date = params.get("date")
+    
+    if not date:
+        return {"error": "Date is required"}
+    
+    result = await BOOKINGS_CACHE.get_or_load(date, lambda: _fetch_bookings(date))
+    if result is None:
+        # If webhook fails, fall back to mock data
+        logger.warning("Bookings webhook failed, using fallback")
+        
+        # Return mock availability times for testing
+        return {
+            "times": ["09:00", "10:00", "11:00", "14:00", "15:00", "16:00", "17:00"]
+        }
+    return result
+
+
 async def create_event(params):
     """
     create_event function - creates an appointment booking
-    Uses n8n webhook to book the appointment with customer details
+    Uses n8n webhook to book the appointment with customer details. With
+    BOOKING_OUTBOX enabled the booking is queued locally and confirmed right
+    away ("provisional": True); the outbox delivers it in the background. A
+    repeat of a booking that already went through returns its confirmation;
+    a repeat of one the outbox gave up on is re-sent and only confirmed if
+    that attempt succeeds.
     
     This function is called by the voice agent after collecting customer information.
     """
@@ -275,7 +374,67 @@ async def create_event(params):
         "datetime": start_time  # Including the datetime for the appointment
     }
     
-    logger.info(f"Calling create_event webhook for {name}, phone: {phone}, email: {email_lowercase}, time: {start_time}")
+    if not BOOKING_OUTBOX["enable"]:
+        return await _create_event_now(webhook_data)
+
+    # Same booking details -> same key, so a repeated request is only queued (and booked) once
+    key = hashlib.sha256(json.dumps(webhook_data, sort_keys=True).encode()).hexdigest()
+    context = CURRENT_TRACE.get()
+    # SQLite writes stay off the session's event loop
+    _, previous = await asyncio.to_thread(
+        BOOKING_OUTBOX_QUEUE.enqueue,
+        "create_event", webhook_data, key, session_id=context.trace.session_id if context else None,
+    )
+    logger.info(f"Queued create_event for {name}, phone: {phone}, email: {email_lowercase}, time: {start_time}"
+                f"{f' (previously {previous})' if previous else ''}")
+
+    # The slot is taken as of now, not once delivery finishes
+    BOOKINGS_CACHE.invalidate(start_time[:10])
+
+    booking_id = f"BOOK{key[:10].upper()}"
+    result = {
+        "success": True,
+        "provisional": True,
+        "booking_id": booking_id,
+        "confirmation_number": booking_id,
+        "name": name,
+        "email": email_lowercase,
+        "phone": phone,
+        "appointment_time": start_time,
+        "message": f"Appointment booked for {name} on {start_time}. Confirmation will be sent to {email_lowercase}."
+    }
+
+    if previous == FAILED:
+        # This booking could not be delivered before: wait for the retry rather than confirming blindly
+        status = await BOOKING_OUTBOX_QUEUE.next_outcome(key, BOOKING_OUTBOX["confirm_timeout"])
+        if status["status"] == FAILED:
+            logger.error(f"Re-sent create_event {key} failed: {status['last_error']}")
+            return {
+                "success": False,
+                "error": "Unable to complete booking at this time. Please call us at (256) 935-1911."
+            }
+        if status["status"] != DELIVERED:
+            # Still pending: the outbox keeps retrying, so the caller must not book again
+            return result
+    elif previous == DELIVERED:
+        status = await asyncio.to_thread(BOOKING_OUTBOX_QUEUE.status, key)
+    if previous in (FAILED, DELIVERED):
+        response = status["response"] or {}
+        result.update(
+            provisional=False,
+            booking_id=response.get("booking_id", booking_id),
+            confirmation_number=response.get("confirmation_code", response.get("booking_id", booking_id)),
+            message=f"Appointment confirmed for {name} on {start_time}. Confirmation sent to {email_lowercase}.",
+        )
+    return result
+
+
+async def _create_event_now(webhook_data):
+    """Book synchronously through the n8n webhook (used when the outbox is disabled)."""
+    name = webhook_data["name"]
+    start_time = webhook_data["datetime"]
+    email_lowercase = webhook_data["email"]
+    logger.info(f"Calling create_event webhook for {name}, phone: {webhook_data['number']}, email: {email_lowercase}, time: {start_time}")
     
     # Call the n8n webhook
     response = await call_webhook(
@@ -296,6 +455,9 @@ async def create_event(params):
     # Return success response
     logger.info(f"create_event webhook response: {response}")
     
+    # The booked slot is no longer free; drop the cached availability for that day
+    BOOKINGS_CACHE.invalidate(start_time[:10])
+
     # Build success response for the voice agent
     booking_id = response.get("booking_id", f"BOOK{datetime.now().strftime('%Y%m%d%H%M%S')}")
     
@@ -305,12 +467,31 @@ async def create_event(params):
         "confirmation_number": response.get("confirmation_code", booking_id),
         "name": name,
         "email": email_lowercase,
-        "phone": phone,
+        "phone": webhook_data["number"],
         "appointment_time": start_time,
         "message": f"Appointment confirmed for {name} on {start_time}. Confirmation sent to {email_lowercase}."
     }
 
 
+async def _deliver_outbox(kind, payload, idempotency_key):
+    """Send one queued write from the outbox; the key lets the receiver drop duplicates."""
+    response = await call_webhook(
+        "n8n_webhooks",
+        "create",
+        method="POST",
+        data=dict(payload, idempotency_key=idempotency_key),
+        extra_headers={"Idempotency-Key": idempotency_key},
+    )
+    if "error" not in response:
+        logger.info(f"Outbox delivered {kind} {idempotency_key}: {response}")
+        BOOKINGS_CACHE.invalidate(payload["datetime"][:10])
+    return response
+
+
+# Bookings queued by create_event and delivered in the background (started by start_background_tasks)
+BOOKING_OUTBOX_QUEUE = Outbox(BOOKING_OUTBOX, _deliver_outbox) if BOOKING_OUTBOX["enable"] else None
+
+
 async def find_customer_webhook(params):
     """
     Look up customer via webhook to CRM or customer database
@@ -339,8 +520,10 @@ async def find_customer_webhook(params):
     )
     
     if "error" in response:
+        # The "error" key keeps the session cache from storing the failure
         return {
             "found": False,
+            "error": "Unable to find customer record",
             "message": "Unable to find customer record"
         }
     
@@ -382,6 +565,7 @@ async def get_appointments_webhook(params):
     if "error" in response:
         return {
             "appointments": [],
+            "error": "Unable to retrieve appointments",
             "message": "Unable to retrieve appointments"
         }
     
@@ -411,28 +595,58 @@ WEBHOOK_FUNCTION_MAP = {
 }
 
 
+def webhook_stats():
+    """Connection pool, retry/hedge, circuit breaker, cache and outbox metrics."""
+    return {
+        "sessions": WEBHOOK_CLIENT.stats(),
+        "requests": WEBHOOK_RESILIENCE.stats(),
+        "circuit_breakers": WEBHOOK_BREAKERS.stats(),
+        "bookings_cache": BOOKINGS_CACHE.stats(),
+        "single_flight": WEBHOOK_FLIGHTS.stats(),
+        "outbox": BOOKING_OUTBOX_QUEUE.stats() if BOOKING_OUTBOX_QUEUE is not None else {},
+    }
+
+
+def _health_probe(endpoint_name):
+    """Probe for HEALTH_MONITOR: one GET to the endpoint's health path, no retries or breaker."""
+    config = WEBHOOK_CONFIG[endpoint_name]
+    headers = {"Authorization": f"Bearer {config['api_key']}"} if config.get("api_key") else {}
+
+    async def probe():
+        result, retryable = await _attempt(
+            endpoint_name, f"{config['url']}/{HEALTH_CHECKS['path']}", "GET", headers, None, None,
+            HEALTH_CHECKS["probe_timeout"],
+        )
+        # Any answer short of a timeout, connection error or 5xx means the endpoint is up
+        return (False, result.get("error")) if retryable else True
+
+    return probe
+
+
+for _endpoint_name in WEBHOOK_CONFIG:
+    HEALTH_MONITOR.register(_endpoint_name, _health_probe(_endpoint_name))
+
+
+def start_background_tasks():
+    """Start the outbox worker, which also delivers bookings a previous run left pending, and health probes."""
+    if BOOKING_OUTBOX_QUEUE is not None:
+        BOOKING_OUTBOX_QUEUE.start()
+    if HEALTH_CHECKS["enable"]:
+        HEALTH_MONITOR.start()
+
+
 # Health check function to test webhook connectivity
 async def test_webhooks():
     """
-    Test all configured webhooks and return status
+    Test all configured webhooks concurrently and return status
     """
-    results = {}
-    
-    for endpoint_name, config in WEBHOOK_CONFIG.items():
-        try:
-            response = await call_webhook(
-                endpoint_name,
-                "health",
-                method="GET"
-            )
-            results[endpoint_name] = {
-                "status": "connected" if "error" not in response else "error",
-                "response": response
-            }
-        except Exception as e:
-            results[endpoint_name] = {
-                "status": "error",
-                "error": str(e)
-            }
-    
-    return results
\ No newline at end of file
+    results = await HEALTH_MONITOR.probe_all()
+    return {
+        endpoint_name: {
+            "status": "connected" if result["ok"] else "error",
+            "latency_ms": result["latency_ms"],
+            **({"error": result["error"]} if result["error"] else {}),
+        }
+        for endpoint_name, result in results.items()
+        if endpoint_name in WEBHOOK_CONFIG
+    }
@@ -0,0 +1,125 @@
+"""
+Retry and hedging helpers for webhook calls.
+
+- Retries use exponential backoff with full jitter and are only applied to
+  calls that are safe to repeat; each try gets its own timeout and all tries
+  share one time budget, so a retry never doubles the dead air.
+- Hedged requests cut tail latency on read paths: when the first request has
+  not answered after the path's recent p95 latency, one duplicate is sent
+  and whichever answers first wins. Only the slowest ~5% of calls are
+  hedged, so the extra load stays small.
+"""
+
+import asyncio
+import random
+from collections import deque
+
+from common.config import HEDGED_REQUESTS, WEBHOOK_RETRY_POLICY
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+def retry_policy(endpoint_config):
+    policy = dict(WEBHOOK_RETRY_POLICY)
+    policy.update(endpoint_config.get("retry", {}))
+    return policy
+
+
+def backoff_delay(policy, retry, rng=random):
+    """Seconds to wait before retry number `retry` (0-based): full jitter up to the exponential bound."""
+    bound = min(policy["max_delay"], policy["base_delay"] * (2 ** retry))
+    return rng.uniform(0, bound)
+
+
+class LatencyTracker:
+    """Recent successful request latencies per (endpoint, path)."""
+
+    def __init__(self, window=200):
+        self.window = window
+        self._samples = {}
+
+    def observe(self, key, seconds):
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def percentile(self, key, pct):
+        samples = self._samples.get(key)
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def count(self, key):
+        return len(self._samples.get(key, ()))
+
+    def keys(self):
+        return list(self._samples)
+
+
+class WebhookResilience:
+    """Shared latency samples and retry/hedge counters for call_webhook."""
+
+    def __init__(self, hedging=HEDGED_REQUESTS):
+        self.hedging = hedging
+        self.latency = LatencyTracker()
+        self._stats = {}
+
+    def _counters(self, endpoint_name):
+        return self._stats.setdefault(
+            endpoint_name,
+            {"calls": 0, "retries": 0, "gave_up": 0, "hedges_sent": 0, "hedge_wins": 0},
+        )
+
+    def count(self, endpoint_name, counter):
+        self._counters(endpoint_name)[counter] += 1
+
+    def hedge_delay(self, endpoint_name, path):
+        """Seconds to wait before hedging this call, or None if the path is not hedged."""
+        if not self.hedging["enable"] or path not in self.hedging["paths"].get(endpoint_name, ()):
+            return None
+        key = (endpoint_name, path)
+        if self.latency.count(key) < self.hedging["min_samples"]:
+            return self.hedging["default_delay"]
+        return max(self.hedging["min_delay"], self.latency.percentile(key, self.hedging["percentile"]))
+
+    async def hedged(self, endpoint_name, attempt, delay):
+        """
+        Run `attempt()` (a coroutine function returning (result, retryable)) and,
+        if it has not finished after `delay` seconds, a second copy; return the
+        first successful outcome, or the last failure if both fail.
+        """
+        first = asyncio.ensure_future(attempt())
+        pending = {first}
+        outcome = None
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return first.result()
+
+            self.count(endpoint_name, "hedges_sent")
+            second = asyncio.ensure_future(attempt())
+            pending.add(second)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    outcome = task.result()
+                    if "error" not in outcome[0]:
+                        if task is second:
+                            self.count(endpoint_name, "hedge_wins")
+                        return outcome
+            return outcome
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self):
+        report = {}
+        for endpoint_name, counters in self._stats.items():
+            entry = dict(counters)
+            for name, path in self.latency.keys():
+                if name == endpoint_name:
+                    entry.setdefault("p95_s", {})[path] = self.latency.percentile((name, path), 95)
+            report[endpoint_name] = entry
+        return report
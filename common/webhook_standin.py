@@ -0,0 +1,213 @@
+"""
+Local stand-in for the external webhook APIs used by webhook_functions.
+
+Serves the n8n (check_date, bookings, create), CRM (customers/search) and
+booking system (customers/{id}/appointments) endpoints, plus `health` on
+each, in the response shapes webhook_functions expects. Data comes from the
+mock store, and bookings made through `create` take the slot in the shared
+availability index, so `bookings` stops offering it. Every route draws a
+delay, and optionally an injected error (HTTP 500) or timeout (hang, then
+HTTP 504), from WEBHOOK_STANDIN["latency"], a LATENCY_PROFILES-style table
+keyed by route name with "default" for the rest. This makes the webhook
+path testable offline and lets benchmarks measure pooling, retries,
+hedging and caching against controlled latency.
+
+Usage:
+    python -m common.webhook_standin [--port 8765]
+
+or in-process:
+    runner, base_url = await start_standin()
+    use_standin(base_url)  # point WEBHOOK_CONFIG at it
+    ...
+    await runner.cleanup()
+"""
+
+import argparse
+import logging
+from datetime import datetime
+
+from aiohttp import web
+
+from common import business_logic
+from common.config import WEBHOOK_STANDIN
+from common.date_parser import parse_date_phrase
+from common.latency import InjectedError, InjectedTimeout, LatencyModel
+
+logger = logging.getLogger(__name__)
+
+# WEBHOOK_CONFIG endpoint -> path prefix on the stand-in
+PREFIXES = {
+    "n8n_webhooks": "/webhook",
+    "booking_system": "/booking",
+    "calendar_service": "/calendar",
+    "crm_system": "/crm",
+}
+
+
+class WebhookStandin:
+    def __init__(self, latency=None):
+        self.latency_profiles = WEBHOOK_STANDIN["latency"] if latency is None else latency
+        self.latency = LatencyModel(self.latency_profiles, fallback={})
+        self._created = {}  # idempotency key -> create response
+        self._stats = {}
+
+    def _count(self, route, counter):
+        counters = self._stats.setdefault(
+            route, {"requests": 0, "errors_injected": 0, "timeouts_injected": 0, "replays": 0}
+        )
+        counters[counter] += 1
+
+    def _route(self, name, handler):
+        """Wrap a handler with request counting and latency/fault injection for route `name`."""
+        backend = name if name in self.latency_profiles["backends"] else "default"
+
+        async def route(request):
+            self._count(name, "requests")
+            try:
+                # An empty function name keeps CURRENT_FUNCTION from selecting a profile
+                await self.latency.apply(backend, function_name="", default_timeout=30.0)
+            except InjectedTimeout:
+                self._count(name, "timeouts_injected")
+                return web.json_response({"error": "Gateway timeout (injected)"}, status=504)
+            except InjectedError:
+                self._count(name, "errors_injected")
+                return web.json_response({"error": "Internal error (injected)"}, status=500)
+            return await handler(request)
+
+        return route
+
+    async def check_date(self, request):
+        body = await request.json()
+        parsed = parse_date_phrase(body.get("chatinput", ""))
+        if parsed.date is None:
+            return web.json_response({"error": "Could not understand the date"}, status=400)
+        result = {"date": parsed.date.isoformat()}
+        if parsed.time:
+            result["time"] = parsed.time
+        return web.json_response(result)
+
+    async def bookings(self, request):
+        body = await request.json()
+        try:
+            result = await business_logic.get_available_times(body.get("chatinput", ""))
+        except ValueError:
+            return web.json_response({"error": "chatinput must be YYYY-MM-DD"}, status=400)
+        return web.json_response(result)
+
+    async def create(self, request):
+        body = await request.json()
+        key = request.headers.get("Idempotency-Key") or body.get("idempotency_key")
+        if key in self._created:
+            self._count("create", "replays")
+            return web.json_response(self._created[key])
+        missing = [field for field in ("name", "number", "email", "datetime") if not body.get(field)]
+        if missing:
+            return web.json_response({"error": f"Missing fields: {', '.join(missing)}"}, status=400)
+        try:
+            when = datetime.fromisoformat(body["datetime"])
+        except ValueError:
+            return web.json_response({"error": "datetime must be YYYY-MM-DDTHH:MM"}, status=400)
+        if not business_logic.get_availability_index().book(when):
+            return web.json_response({"error": "That time slot is not available"}, status=409)
+        booking_id = f"N8N{len(self._created) + 1:05d}"
+        response = {"booking_id": booking_id, "confirmation_code": f"CONF{booking_id[3:]}"}
+        if key:
+            self._created[key] = response
+        return web.json_response(response)
+
+    async def customer_search(self, request):
+        query = request.query
+        customer = await business_logic.get_customer(
+            phone=query.get("phone"), email=query.get("email"), customer_id=query.get("id")
+        )
+        if "error" in customer:
+            return web.json_response({"customer": None})
+        appointments = (await business_logic.get_customer_appointments(customer["id"]))["appointments"]
+        dates = sorted(apt["date"] for apt in appointments if apt["status"] == "Completed")
+        return web.json_response({
+            "customer": {
+                "id": customer["id"],
+                "name": customer["name"],
+                "email": customer["email"],
+                "phone": customer["phone"],
+                "last_appointment_date": dates[-1] if dates else None,
+                "visit_count": len(dates),
+                "notes": None,
+            }
+        })
+
+    async def customer_appointments(self, request):
+        result = await business_logic.get_customer_appointments(request.match_info["customer_id"])
+        appointments = result["appointments"]
+        if request.query.get("status") == "upcoming":
+            now = datetime.now().isoformat()
+            appointments = [apt for apt in appointments if apt["date"] >= now]
+        return web.json_response({
+            "appointments": [
+                {
+                    "datetime": apt["date"],
+                    "service_name": apt["service"],
+                    "provider_name": None,
+                    "status": apt["status"],
+                    "confirmation_code": apt["id"],
+                }
+                for apt in appointments
+            ]
+        })
+
+    async def health(self, request):
+        return web.json_response({"status": "ok"})
+
+    def app(self):
+        app = web.Application()
+        n8n, booking, crm = PREFIXES["n8n_webhooks"], PREFIXES["booking_system"], PREFIXES["crm_system"]
+        app.router.add_post(f"{n8n}/check_date", self._route("check_date", self.check_date))
+        app.router.add_post(f"{n8n}/bookings", self._route("bookings", self.bookings))
+        app.router.add_post(f"{n8n}/create", self._route("create", self.create))
+        app.router.add_get(f"{crm}/customers/search", self._route("customers/search", self.customer_search))
+        app.router.add_get(
+            f"{booking}/customers/{{customer_id}}/appointments",
+            self._route("appointments", self.customer_appointments),
+        )
+        for prefix in PREFIXES.values():
+            app.router.add_get(f"{prefix}/health", self._route("health", self.health))
+        return app
+
+    def stats(self):
+        return {route: dict(counters) for route, counters in self._stats.items()}
+
+
+async def start_standin(standin=None, host=None, port=0):
+    """Serve `standin` (a default WebhookStandin) on the running loop; return (runner, base url)."""
+    runner = web.AppRunner((standin or WebhookStandin()).app())
+    await runner.setup()
+    site = web.TCPSite(runner, host or WEBHOOK_STANDIN["host"], port)
+    await site.start()
+    bound_host, bound_port = runner.addresses[0][:2]  # the real port when `port` is 0
+    return runner, f"http://{bound_host}:{bound_port}"
+
+
+def use_standin(base_url, endpoints=None):
+    """Point WEBHOOK_CONFIG (or `endpoints`) at a stand-in, keeping the other endpoint settings."""
+    if endpoints is None:
+        from common.webhook_functions import WEBHOOK_CONFIG as endpoints
+    for name, prefix in PREFIXES.items():
+        if name in endpoints:
+            endpoints[name]["url"] = f"{base_url}{prefix}"
+    return endpoints
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the webhook APIs")
+    parser.add_argument("--host", default=WEBHOOK_STANDIN["host"])
+    parser.add_argument("--port", type=int, default=WEBHOOK_STANDIN["port"])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    for name, prefix in PREFIXES.items():
+        logger.info(f"{name}: http://{args.host}:{args.port}{prefix}")
+    web.run_app(WebhookStandin().app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+from common.agent_functions import FUNCTION_DEFINITIONS
+from common.argument_validation import ValidatorRegistry
+
+
+def validate(function_name, params):
+    return ValidatorRegistry(FUNCTION_DEFINITIONS).validate(function_name, params)
+
+
+def test_spoken_identifiers_are_normalized():
+    result = validate("find_customer", {
+        "customer_id": "customer forty two",
+        "phone": "five five five one two three four five six seven",
+        "email": "john dot smith at example dot com",
+    })
+    assert result.errors == []
+    assert result.params == {
+        "customer_id": "CUST0042",
+        "phone": "+15551234567",
+        "email": "john.smith@example.com",
+    }
+    assert result.rescued
+
+
+def test_offset_time_is_converted_to_clinic_time():
+    result = validate("create_event", {
+        "name": "Ann Lee",
+        "email_lowercase": "ann@example.com",
+        "phone": "+15551234567",
+        "start_time": "2030-01-08T21:00:00Z",
+    })
+    assert result.errors == []
+    assert result.params["start_time"] == "2030-01-08T15:00"
+
+
+def test_am_pm_time_is_converted():
+    result = validate("hold_appointment", {"date": "2030-01-08 3pm"})
+    assert result.errors == []
+    assert result.params["date"].startswith("2030-01-08T15:00")
+    assert result.rescued
+
+
+def test_required_date_without_time_is_rejected():
+    result = validate("create_event", {
+        "name": "Ann Lee",
+        "email_lowercase": "ann@example.com",
+        "phone": "+15551234567",
+        "start_time": "2030-01-08",
+    })
+    assert [error.split(":")[0] for error in result.errors] == ["start_time"]
+
+
+def test_unreadable_optional_context_is_passed_through():
+    result = validate("check_date", {"text": "tomorrow", "reference_date": "today"})
+    assert result.errors == []
+    assert result.params["reference_date"] == "today"
+
+
+def test_enum_typo_is_corrected_and_distant_value_gets_a_hint():
+    assert validate("end_call", {"farewell_type": "Generl"}).params["farewell_type"] == "general"
+    result = validate("create_appointment", {"customer_id": "CUST0001", "service": "wellness"})
+    assert result.errors
+    assert "did you mean 'Wellness Check'?" in result.errors[0]
+
+
+def test_only_rescued_calls_count_as_round_trips_saved():
+    registry = ValidatorRegistry(FUNCTION_DEFINITIONS)
+    registry.validate("get_orders", {"customer_id": "cust0042"})
+    registry.validate("get_orders", {"customer_id": "42"})
+    stats = registry.stats()
+    assert stats["functions"]["get_orders"]["corrected"] == 2
+    assert stats["round_trips_saved"] == 1
@@ -0,0 +1,86 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from common import business_logic
+from common.availability import AvailabilityIndex
+
+# A Tuesday: slots start at 10:00 ... 13:30 and 14:45, 15:15 ... 18:15
+TUESDAY = "2030-01-08"
+
+
+@pytest.fixture
+def store():
+    business_logic.reset_mock_data(
+        business_logic.generate_mock_data(
+            {"customers": 3, "appointments": 0, "orders": 0}, include_sample=False
+        )
+    )
+    yield business_logic.get_mock_data()
+    business_logic.reset_mock_data()
+
+
+def test_slot_start_is_the_slot_containing_the_time():
+    index = AvailabilityIndex()
+    assert index.slot_start(f"{TUESDAY}T16:00:00") == datetime(2030, 1, 8, 15, 45)
+    assert index.slot_start(f"{TUESDAY}T15:45:00") == datetime(2030, 1, 8, 15, 45)
+    assert index.slot_start(f"{TUESDAY}T14:15:00") is None  # lunch break
+    assert index.slot_start("2030-01-13T11:00:00") is None  # Sunday
+
+
+def test_book_takes_a_slot_once():
+    index = AvailabilityIndex()
+    assert index.book(f"{TUESDAY}T10:00:00")
+    assert not index.book(f"{TUESDAY}T10:15:00")
+    assert "10:00" not in index.available_times(TUESDAY)
+
+
+def test_hold_blocks_booking_until_released():
+    index = AvailabilityIndex()
+    hold_id = index.hold(f"{TUESDAY}T11:00:00")
+    assert hold_id
+    assert not index.book(f"{TUESDAY}T11:00:00")
+    assert index.hold(f"{TUESDAY}T11:00:00") is None
+    assert index.release(hold_id)
+    assert index.book(f"{TUESDAY}T11:00:00")
+
+
+def test_confirm_turns_a_hold_into_a_booking():
+    index = AvailabilityIndex()
+    hold_id = index.hold(f"{TUESDAY}T12:00:00")
+    assert index.confirm(hold_id)
+    assert not index.confirm(hold_id)
+    assert not index.is_available(f"{TUESDAY}T12:00:00")
+
+
+def test_off_grid_booking_is_stored_at_the_slot_it_took(store):
+    customer_id = store.customer_dict(0)["id"]
+    result = asyncio.run(
+        business_logic.schedule_appointment(customer_id, f"{TUESDAY}T16:00:00", "Wellness Check")
+    )
+    assert result["date"] == f"{TUESDAY}T15:45:00"
+    assert "15:45" not in business_logic.get_availability_index().available_times(TUESDAY)
+    again = asyncio.run(
+        business_logic.schedule_appointment(customer_id, f"{TUESDAY}T15:50:00", "Wellness Check")
+    )
+    assert "error" in again
+
+
+def test_hold_can_be_booked_with_the_time_that_was_held(store):
+    customer_id = store.customer_dict(0)["id"]
+    hold = asyncio.run(business_logic.hold_appointment_slot(f"{TUESDAY}T17:30:00"))
+    assert hold["date"] == f"{TUESDAY}T17:15:00"
+    result = asyncio.run(business_logic.schedule_appointment(
+        customer_id, f"{TUESDAY}T17:30:00", "Wellness Check", hold_id=hold["hold_id"]
+    ))
+    assert result["date"] == f"{TUESDAY}T17:15:00"
+
+
+def test_hold_rejects_a_date_in_another_slot(store):
+    customer_id = store.customer_dict(0)["id"]
+    hold = asyncio.run(business_logic.hold_appointment_slot(f"{TUESDAY}T17:30:00"))
+    result = asyncio.run(business_logic.schedule_appointment(
+        customer_id, f"{TUESDAY}T18:00:00", "Wellness Check", hold_id=hold["hold_id"]
+    ))
+    assert "error" in result
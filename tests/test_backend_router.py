@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from common.backend_router import BackendRouter
+from common.session_cache import SessionCache
+
+SETTINGS = {"default": "mock", "fallback": "mock", "functions": {}}
+
+
+class FakeHealth:
+    def __init__(self, degraded=()):
+        self.down = set(degraded)
+
+    def degraded(self, name):
+        return name in self.down
+
+
+def router(degraded=()):
+    return BackendRouter(dict(SETTINGS, functions={}), health=FakeHealth(degraded))
+
+
+def test_functions_use_the_default_backend():
+    handler = router().get("get_orders")
+    assert handler.backend == "mock"
+    assert handler.function_name == "get_orders"
+
+
+def test_assign_routes_the_next_call():
+    routes = router()
+    routes.assign("get_appointments", "webhook")
+    assert routes.get("get_appointments").backend == "webhook"
+    assert routes.stats()["assignments"]["get_appointments"] == "webhook"
+
+
+def test_assign_rejects_unknown_backends_and_functions():
+    routes = router()
+    with pytest.raises(ValueError):
+        routes.assign("get_orders", "ftp")
+    with pytest.raises(ValueError):
+        routes.assign("no_such_function", "mock")
+
+
+def test_degraded_webhook_falls_back():
+    routes = router(degraded={"booking_system"})
+    routes.assign("get_appointments", "webhook")
+    assert routes.get("get_appointments").backend == "mock"
+    assert routes.stats()["backends"]["webhook"]["get_appointments"]["rerouted"] == 1
+
+
+def test_function_missing_from_backend_falls_back():
+    routes = router()
+    routes.assign("get_orders", "webhook")
+    assert routes.get("get_orders").backend == "mock"
+
+
+def test_observe_counts_calls_and_errors_per_backend():
+    routes = router()
+    handler = routes.get("get_orders")
+    routes.observe(handler, 0.01)
+    routes.observe(handler, 0.02, failed=True)
+    entry = routes.stats()["backends"]["mock"]["get_orders"]
+    assert entry["calls"] == 2
+    assert entry["errors"] == 1
+    assert "p95_ms" in entry
+
+
+def test_cached_results_are_kept_per_backend():
+    cache = SessionCache(ttl={"get_orders": 60}, invalidated_by={})
+
+    async def answer(backend):
+        async def func(params):
+            return {"backend": backend}
+        return await cache.call("get_orders", {"customer_id": "CUST0001"}, func, scope=backend)
+
+    async def run():
+        return [await answer("mock"), await answer("webhook"), await answer("mock")]
+
+    assert [r["backend"] for r in asyncio.run(run())] == ["mock", "webhook", "mock"]
+    assert cache.stats()["get_orders"]["hits"] == 1
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from common.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+SETTINGS = {
+    "enable": True,
+    "failure_threshold": 2,
+    "slow_call_seconds": 5.0,
+    "open_seconds": 30.0,
+    "half_open_probes": 1,
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def half_open_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", dict(SETTINGS), clock=clock)
+    for _ in range(SETTINGS["failure_threshold"]):
+        assert breaker.allow()
+        breaker.record(False)
+    assert breaker.state == OPEN
+    clock.now += SETTINGS["open_seconds"]
+    return breaker
+
+
+def test_half_open_allows_limited_probes():
+    breaker = half_open_breaker()
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+
+def test_released_probe_frees_its_slot():
+    breaker = half_open_breaker()
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state == CLOSED
+
+
+def test_release_outside_half_open_is_a_no_op():
+    breaker = CircuitBreaker("test", dict(SETTINGS), clock=FakeClock())
+    breaker.release()
+    assert breaker.allow()
+    assert breaker.state == CLOSED
+
+
+def test_cancelled_webhook_probe_releases_its_slot(monkeypatch):
+    pytest.importorskip("aiohttp")
+    from common import webhook_functions
+
+    breaker = half_open_breaker()
+    monkeypatch.setattr(webhook_functions.WEBHOOK_BREAKERS, "get", lambda endpoint_name: breaker)
+    started = asyncio.Event()
+
+    async def hang(*args):
+        started.set()
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(webhook_functions, "_attempt", hang)
+    config = {"url": "http://backend.invalid", "timeout": 10}
+
+    async def run():
+        probe = asyncio.ensure_future(webhook_functions._send(
+            "test", config, "create", "http://backend.invalid/create", "POST", {}, {}, None, False
+        ))
+        await started.wait()
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+    asyncio.run(run())
+    assert breaker.allow()
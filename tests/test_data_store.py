@@ -0,0 +1,49 @@
+import threading
+from datetime import datetime
+
+from common import business_logic
+
+
+def small_store(appointments=0):
+    return business_logic.generate_mock_data(
+        {"customers": 5, "appointments": appointments, "orders": 5}, include_sample=False
+    )
+
+
+def test_lookups_by_phone_and_email():
+    store = small_store()
+    customer = store.customer_dict(3)
+    assert store.find_customer_by_phone(customer["phone"]) == 3
+    assert store.find_customer_by_email(customer["email"]) == 3
+    assert store.find_customer_by_phone("+10000000000") is None
+
+
+def test_appointments_added_before_and_after_the_index_is_built():
+    store = small_store()
+    before = store.add_appointment(1, datetime(2030, 1, 8, 10), "Wellness Check")
+    assert store.appointment_rows_for(1) == [before]
+    after = store.add_appointment(1, datetime(2030, 1, 8, 11), "Wellness Check")
+    assert store.appointment_rows_for(1) == [before, after]
+
+
+def test_concurrent_bookings_are_all_indexed():
+    store = small_store()
+    start = threading.Barrier(5)
+    rows = []
+
+    def book():
+        start.wait()
+        for minute in range(200):
+            rows.append(store.add_appointment(2, datetime(2030, 1, 8, 10, minute % 60), "Wellness Check"))
+
+    def look_up():
+        start.wait()
+        for _ in range(200):
+            store.appointment_rows_for(2)
+
+    threads = [threading.Thread(target=book) for _ in range(4)] + [threading.Thread(target=look_up)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(store.appointment_rows_for(2)) == sorted(rows)
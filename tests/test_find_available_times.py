@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+
+from common import business_logic
+from common.agent_functions import find_available_times
+
+# Monday; "Tuesday" below resolves to 2030-01-08
+REFERENCE_DATE = "2030-01-07"
+
+
+@pytest.fixture(autouse=True)
+def empty_book():
+    business_logic.reset_mock_data(
+        business_logic.generate_mock_data(
+            {"customers": 3, "appointments": 0, "orders": 0}, include_sample=False
+        )
+    )
+    yield
+    business_logic.reset_mock_data()
+
+
+def find(text):
+    return asyncio.run(find_available_times({"text": text, "reference_date": REFERENCE_DATE}))
+
+
+def test_round_hour_request_uses_the_slot_containing_it():
+    result = find("Tuesday at 3pm")
+    assert result["requested_date"] == "2030-01-08"
+    assert result["requested_time"] == "15:00"
+    assert result["requested_time_available"] is True
+    assert result["requested_slot"] == "14:45"
+
+
+def test_booked_slot_is_not_available():
+    business_logic.get_availability_index().book("2030-01-08T14:45:00")
+    assert find("Tuesday at 3pm")["requested_time_available"] is False
+
+
+def test_slot_start_request_has_no_separate_slot():
+    result = find("Tuesday at 10am")
+    assert result["requested_time_available"] is True
+    assert "requested_slot" not in result
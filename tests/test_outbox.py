@@ -0,0 +1,115 @@
+import asyncio
+
+from common.outbox import DELIVERED, FAILED, PENDING, Outbox
+
+
+def outbox(tmp_path, responses, max_attempts=3):
+    """An Outbox whose deliver() returns `responses` in order, then succeeds."""
+    settings = {
+        "path": str(tmp_path / "outbox.db"),
+        "max_attempts": max_attempts,
+        "base_delay": 0.01,
+        "max_delay": 0.01,
+        "batch_size": 10,
+    }
+    calls = []
+
+    async def deliver(kind, payload, idempotency_key):
+        calls.append((kind, payload, idempotency_key))
+        return responses.pop(0) if responses else {"booking_id": "B1"}
+
+    return Outbox(settings, deliver), calls
+
+
+def test_enqueue_delivers_once(tmp_path):
+    box, calls = outbox(tmp_path, [])
+
+    async def run():
+        _, previous = box.enqueue("create_event", {"name": "Ann"}, "k1")
+        assert previous is None
+        return await box.next_outcome("k1", 5.0)
+
+    status = asyncio.run(run())
+    assert status["status"] == DELIVERED
+    assert status["response"] == {"booking_id": "B1"}
+    assert calls == [("create_event", {"name": "Ann"}, "k1")]
+    assert box.enqueue("create_event", {"name": "Ann"}, "k1")[1] == DELIVERED
+    assert box.stats()["duplicates"] == 1
+
+
+def test_retryable_error_stays_pending(tmp_path, monkeypatch):
+    monkeypatch.setattr("common.outbox.backoff_delay", lambda settings, retry: 60.0)
+    box, calls = outbox(tmp_path, [{"error": "timeout"}])
+
+    async def run():
+        box.enqueue("create_event", {}, "k1")
+        return await box.next_outcome("k1", 5.0)
+
+    status = asyncio.run(run())
+    assert status["status"] == PENDING
+    assert status["attempts"] == 1
+    assert status["last_error"] == "timeout"
+    assert len(calls) == 1
+
+
+def test_retryable_errors_are_retried_until_delivered(tmp_path):
+    box, calls = outbox(tmp_path, [{"error": "timeout"}, {"error": "busy", "status": 503}])
+
+    async def run():
+        box.enqueue("create_event", {}, "k1")
+        while (status := box.status("k1"))["status"] == PENDING:
+            await asyncio.sleep(0.01)
+        return status
+
+    status = asyncio.run(run())
+    assert status["status"] == DELIVERED
+    assert status["attempts"] == 3
+    assert box.stats()["retries"] == 2
+    assert len(calls) == 3
+
+
+def test_rejection_fails_at_once(tmp_path):
+    box, calls = outbox(tmp_path, [{"error": "bad request", "status": 400}])
+
+    async def run():
+        box.enqueue("create_event", {}, "k1", session_id="s1")
+        return await box.next_outcome("k1", 5.0)
+
+    status = asyncio.run(run())
+    assert status["status"] == FAILED
+    assert status["attempts"] == 1
+    assert len(calls) == 1
+    failure, = box.stats()["recent_failures"]
+    assert failure["session_id"] == "s1"
+
+
+def test_gives_up_after_max_attempts(tmp_path):
+    box, calls = outbox(tmp_path, [{"error": "timeout"}] * 2, max_attempts=2)
+
+    async def run():
+        box.enqueue("create_event", {}, "k1")
+        while (status := box.status("k1"))["status"] == PENDING:
+            await asyncio.sleep(0.01)
+        return status
+
+    status = asyncio.run(run())
+    assert status["status"] == FAILED
+    assert status["last_error"] == "timeout"
+    assert len(calls) == 2
+
+
+def test_failed_row_is_requeued(tmp_path):
+    box, calls = outbox(tmp_path, [{"error": "bad request", "status": 400}])
+
+    async def run():
+        box.enqueue("create_event", {}, "k1")
+        assert (await box.next_outcome("k1", 5.0))["status"] == FAILED
+        _, previous = box.enqueue("create_event", {}, "k1")
+        assert previous == FAILED
+        return await box.next_outcome("k1", 5.0)
+
+    status = asyncio.run(run())
+    assert status["status"] == DELIVERED
+    assert status["attempts"] == 1
+    assert box.stats()["requeued"] == 1
+    assert len(calls) == 2
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from common.single_flight import SingleFlight, flight_key
+
+
+def test_flight_key_ignores_dict_order():
+    assert flight_key("crm", "search", "get", {"a": 1, "b": 2}) == flight_key("crm", "search", "GET", {"b": 2, "a": 1})
+
+
+def test_concurrent_calls_share_one_request():
+    flights = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"times": ["09:00"]}
+
+    async def run():
+        return await asyncio.gather(*(flights.run("key", fetch) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert results == [{"times": ["09:00"]}] * 5
+    # Every caller gets its own copy
+    assert len({id(result) for result in results}) == 5
+    assert flights.stats()["coalesced"] == 4
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_cancelled_follower_does_not_fail_the_others():
+    flights = SingleFlight()
+
+    async def run():
+        gate = asyncio.Event()
+
+        async def fetch():
+            await gate.wait()
+            return {"ok": True}
+
+        leader = asyncio.ensure_future(flights.run("key", fetch))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(flights.run("key", fetch)) for _ in range(3)]
+        await asyncio.sleep(0)
+        followers[0].cancel()
+        await asyncio.sleep(0)
+        gate.set()
+        return await leader, await asyncio.gather(*followers, return_exceptions=True)
+
+    leader, followers = asyncio.run(run())
+    assert leader == {"ok": True}
+    assert isinstance(followers[0], asyncio.CancelledError)
+    assert followers[1:] == [{"ok": True}, {"ok": True}]
+
+
+def test_cancelled_leader_hands_over_to_followers():
+    flights = SingleFlight()
+    calls = []
+
+    async def run():
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"ok": True}
+
+        leader = asyncio.ensure_future(flights.run("key", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.run("key", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(run()) == {"ok": True}
+    assert len(calls) == 2
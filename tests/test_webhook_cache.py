@@ -0,0 +1,101 @@
+import asyncio
+
+from common.webhook_cache import StaleWhileRevalidateCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def loader(values):
+    """A loader returning `values` in order and counting its calls."""
+    calls = []
+
+    async def load():
+        calls.append(None)
+        return values.pop(0)
+
+    return load, calls
+
+
+def test_fresh_entry_is_served_without_loading():
+    cache = StaleWhileRevalidateCache(ttl=10, clock=FakeClock())
+    load, calls = loader(["a", "b"])
+
+    async def run():
+        return await cache.get_or_load("k", load), await cache.get_or_load("k", load)
+
+    assert asyncio.run(run()) == ("a", "a")
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_stale_entry_is_served_while_refreshing():
+    clock = FakeClock()
+    cache = StaleWhileRevalidateCache(ttl=10, stale_ttl=30, clock=clock)
+    load, calls = loader(["a", "b"])
+
+    async def run():
+        await cache.get_or_load("k", load)
+        clock.now = 15
+        stale = await cache.get_or_load("k", load)
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        return stale, await cache.get_or_load("k", load)
+
+    assert asyncio.run(run()) == ("a", "b")
+    assert len(calls) == 2
+    assert cache.stats()["stale_hits"] == 1
+    assert cache.stats()["refreshes"] == 1
+
+
+def test_invalidate_forces_a_reload():
+    cache = StaleWhileRevalidateCache(ttl=10, clock=FakeClock())
+    load, calls = loader(["a", "b"])
+
+    async def run():
+        await cache.get_or_load("k", load)
+        cache.invalidate("k")
+        return await cache.get_or_load("k", load)
+
+    assert asyncio.run(run()) == "b"
+    assert len(calls) == 2
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_load_started_before_invalidate_is_not_stored():
+    cache = StaleWhileRevalidateCache(ttl=10, clock=FakeClock())
+
+    async def run():
+        gate = asyncio.Event()
+
+        async def slow_load():
+            await gate.wait()
+            return "old"
+
+        pending = asyncio.ensure_future(cache.get_or_load("k", slow_load))
+        await asyncio.sleep(0)
+        cache.invalidate("k")
+        gate.set()
+        assert await pending == "old"
+        return await cache.get_or_load("k", loader(["new"])[0])
+
+    assert asyncio.run(run()) == "new"
+
+
+def test_failed_load_serves_the_expired_entry():
+    clock = FakeClock()
+    cache = StaleWhileRevalidateCache(ttl=10, clock=clock)
+    load, _ = loader(["a", None])
+
+    async def run():
+        await cache.get_or_load("k", load)
+        clock.now = 20
+        return await cache.get_or_load("k", load)
+
+    assert asyncio.run(run()) == "a"
+    assert cache.stats()["failed_loads"] == 1